@@ -0,0 +1,12 @@
+"""
+端到端基准测试
+用固定随机种子生成的数据集（1 万 / 100 万 / 1000 万行，窄表 / 宽表，含脏数据）无界面运行完整的抽取流程，
+记录总耗时、行/秒、峰值内存以及各阶段（读取、字段映射、项目标准化、数值解析、日期解析、质量统计、导出）的耗时，
+结果保存为 JSON，并可与之前的结果比较、标出超过阈值的性能退化
+
+用法:
+    python -m benchmarks.run                                   # 默认 10k,1m × narrow,wide
+    python -m benchmarks.run --sizes 10k --layouts narrow
+    python -m benchmarks.run --compare benchmarks/results/上次的结果.json --threshold 0.1
+    python -m benchmarks.datasets --sizes 10m                  # 只生成数据集
+"""
@@ -0,0 +1,377 @@
+"""
+基准测试数据集
+按固定随机种子生成 LIS 导出格式的 Excel 文件和对应的 profile，生成后保存在 benchmarks/data 下重复使用
+
+脏数据包括：
+- 结果值混有数字文本、数值单元格、<、>、阳性/阴性/+/-、溶血等无效值和空单元格
+- 日期混有多种文本格式、Excel 日期单元格、空单元格和无法解析的文本
+- 项目名称使用别名的大小写和首尾空格变体，约 30% 的行是 profile 未选择的项目
+- 部分病人 ID 为数值单元格
+宽表在映射的 9 列之外还有与抽取无关的附加列
+
+另有校验脚本共用的小型样本（SAMPLE_PROFILE、build_sample_raw），只在内存中生成
+
+用法:
+    python -m benchmarks.datasets [--sizes 10k,1m,10m] [--layouts narrow,wide] [--force]
+"""
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+import yaml
+
+SIZES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+LAYOUTS = ('narrow', 'wide')
+
+DATA_DIR = Path(__file__).parent / 'data'
+GENERATOR_VERSION = 1  # 生成规则变化时递增，使已有的数据集重新生成
+SEED = 20240101
+FILE_ROWS = 500_000  # 每个文件的最大行数（低于 Excel 单表上限，大数据集分为多个文件）
+WIDE_COLUMNS = 60  # 宽表的总列数
+UNSELECTED_TESTS = 200  # profile 未选择的项目数
+UNSELECTED_RATIO = 0.3  # 未选择项目所占的行比例
+
+COLUMN_MAPPING = {
+    'patient_id': '病人ID',
+    'visit_id': '住院病人门诊ID',
+    'sample_datetime': '检验日期',
+    'test_name': '项目名称',
+    'test_value': '检验结果',
+    'unit': '单位',
+    'ref_range': '参考值',
+    'result_flag': '结果标志',
+    'specimen_type': '标本类型',
+}
+
+# profile 选择的项目: 标准名称 -> (别名, 单位, 参考范围)
+TESTS = {
+    'WBC': (['WBC', '白细胞', '白细胞计数'], '10^9/L', (3.5, 9.5)),
+    'RBC': (['RBC', '红细胞', '红细胞计数'], '10^12/L', (3.8, 5.1)),
+    'HGB': (['HGB', 'Hb', '血红蛋白'], 'g/L', (115, 150)),
+    'PLT': (['PLT', '血小板', '血小板计数'], '10^9/L', (125, 350)),
+    'ALT': (['ALT', '谷丙转氨酶', '丙氨酸氨基转移酶'], 'U/L', (7, 40)),
+    'AST': (['AST', '谷草转氨酶', '天门冬氨酸氨基转移酶'], 'U/L', (13, 35)),
+    'TBIL': (['TBIL', '总胆红素'], 'umol/L', (0, 21)),
+    'ALB': (['ALB', '白蛋白'], 'g/L', (40, 55)),
+    'CREA': (['CREA', 'Cr', '肌酐'], 'umol/L', (41, 73)),
+    'UREA': (['UREA', 'BUN', '尿素'], 'mmol/L', (2.6, 7.5)),
+    'GLU': (['GLU', '葡萄糖', '血糖'], 'mmol/L', (3.9, 6.1)),
+    'K': (['K', '钾'], 'mmol/L', (3.5, 5.3)),
+    'NA': (['Na', '钠'], 'mmol/L', (137, 147)),
+    'CRP': (['CRP', 'C反应蛋白'], 'mg/L', (0, 10)),
+    'CEA': (['CEA', 'CEA(CLIA)', '癌胚抗原'], 'ng/mL', (0, 5)),
+    'AFP': (['AFP', '甲胎蛋白'], 'ng/mL', (0, 20)),
+    'CA199': (['CA19-9', 'CA199', '糖类抗原19-9'], 'U/mL', (0, 37)),
+    'HBSAG': (['HBsAg', '乙肝表面抗原'], 'IU/mL', (0, 0.05)),
+    'PT': (['PT', '凝血酶原时间'], 's', (9.4, 12.5)),
+    'DDIMER': (['D-D', 'D-二聚体'], 'mg/L', (0, 0.55)),
+}
+
+VALUE_PARSING = {
+    'less_than': {'rule': 'half'},
+    'greater_than': {'rule': 'keep'},
+    'positive_text': {'mapping': {'阳性': 1, '弱阳性': 0.5, '+': 1, '++': 1, '+++': 1}},
+    'negative_text': {'mapping': {'阴性': 0, '-': 0}},
+    'invalid_values': {'mapping': {
+        '溶血': None, '样本不足': None, '标本凝集': None, '未检出': None, '--': None, '/': None,
+    }},
+}
+
+# 结果值的类型分布（其余为数字文本）
+NUMERIC_CELL_RATIO = 0.10
+SPECIAL_VALUE_RATIO = 0.08
+BLANK_VALUE_RATIO = 0.02
+SPECIAL_VALUES = np.array(['阳性', '弱阳性', '+', '++', '阴性', '-', '溶血', '样本不足', '--', '/', '未检出'],
+                          dtype=object)
+
+# 日期的格式分布（None 为 Excel 日期单元格）
+DATE_FORMATS = ['%Y-%m-%d %H:%M:%S', '%Y/%m/%d %H:%M', '%Y-%m-%d', '%Y%m%d', '%Y年%m月%d日', None]
+DATE_FORMAT_WEIGHTS = [0.45, 0.15, 0.15, 0.08, 0.05, 0.12]
+BLANK_DATE_RATIO = 0.01
+BAD_DATE_RATIO = 0.002
+BAD_DATES = np.array(['未知', '2024-13-45', '待定'], dtype=object)
+
+SPECIMENS = np.array(['血清', '全血', '血浆', '尿液', None], dtype=object)
+FLAGS = np.array(['H', 'L', '↑', '↓', None], dtype=object)
+
+
+def dataset_name(size: str, layout: str) -> str:
+    return f'{layout}_{size}'
+
+
+def dataset_dir(size: str, layout: str) -> Path:
+    return DATA_DIR / dataset_name(size, layout)
+
+
+def _metadata(size: str, layout: str) -> Dict:
+    return {
+        'generator_version': GENERATOR_VERSION,
+        'seed': SEED,
+        'size': size,
+        'layout': layout,
+        'rows': SIZES[size],
+        'columns': WIDE_COLUMNS if layout == 'wide' else len(COLUMN_MAPPING),
+    }
+
+
+def build_profile(name: str) -> Dict:
+    """数据集对应的 profile（映射 9 列，选择 TESTS 中的 20 个项目）"""
+    return {
+        'id': f'benchmark_{name}',
+        'description': '基准测试数据集',
+        'signature': {
+            'required_columns': list(COLUMN_MAPPING.values())[:5],
+            'min_match_ratio': 0.75,
+            'skip_top_rows': 0,
+        },
+        'column_mapping': dict(COLUMN_MAPPING),
+        'test_mapping': {
+            code: {'aliases': aliases, 'unit': unit, 'range': list(ref)}
+            for code, (aliases, unit, ref) in TESTS.items()
+        },
+        'value_parsing': VALUE_PARSING,
+        'output_options': {'drop_unknown_tests': True, 'drop_failed_rows': False},
+    }
+
+
+def _test_names(rng: np.random.Generator, rows: int):
+    """项目名称（含别名的大小写、首尾空格变体和未选择的项目），以及各行的参考范围"""
+    variants, lows, highs = [], [], []
+    for aliases, _, (low, high) in TESTS.values():
+        for alias in aliases:
+            for variant in (alias, alias.lower(), f' {alias}', f'{alias} '):
+                variants.append(variant)
+                lows.append(low)
+                highs.append(high)
+    unselected = [f'其他项目{i:03d}' for i in range(UNSELECTED_TESTS)]
+
+    names = np.array(variants + unselected, dtype=object)
+    lows = np.array(lows + [0.0] * len(unselected))
+    highs = np.array(highs + [100.0] * len(unselected))
+
+    is_unselected = rng.random(rows) < UNSELECTED_RATIO
+    codes = np.where(
+        is_unselected,
+        len(variants) + rng.integers(0, len(unselected), rows),
+        rng.integers(0, len(variants), rows),
+    )
+    return names[codes], lows[codes], highs[codes]
+
+
+def _values(rng: np.random.Generator, lows: np.ndarray, highs: np.ndarray) -> np.ndarray:
+    """结果值：数字文本为主，混有数值单元格、<、>、定性结果、无效值和空单元格"""
+    rows = len(lows)
+    span = np.maximum(highs - lows, 0.1)
+    numbers = np.round(lows + rng.normal(0.5, 0.4, rows) * span, 2)
+    numbers = np.maximum(numbers, 0)
+    values = np.char.mod('%g', numbers).astype(object)
+
+    kind = rng.random(rows)
+    numeric_cells = kind < NUMERIC_CELL_RATIO
+    values[numeric_cells] = numbers[numeric_cells]
+    special = (kind >= NUMERIC_CELL_RATIO) & (kind < NUMERIC_CELL_RATIO + SPECIAL_VALUE_RATIO)
+    values[special] = SPECIAL_VALUES[rng.integers(0, len(SPECIAL_VALUES), special.sum())]
+    bound = special & (rng.random(rows) < 0.3)
+    signs = np.where(rng.random(bound.sum()) < 0.5, '<', '>')
+    values[bound] = np.char.add(signs, np.char.mod('%g', numbers[bound]))
+    values[kind >= 1 - BLANK_VALUE_RATIO] = None
+    return values
+
+
+def _dates(rng: np.random.Generator, rows: int) -> np.ndarray:
+    """采样时间：多种文本格式混合 Excel 日期单元格、空单元格和无法解析的文本"""
+    base = datetime(2023, 1, 1)
+    seconds = rng.integers(0, 2 * 365 * 86400, rows)
+    formats = rng.choice(len(DATE_FORMATS), rows, p=DATE_FORMAT_WEIGHTS)
+    kind = rng.random(rows)
+
+    dates = np.empty(rows, dtype=object)
+    for i in range(rows):
+        if kind[i] < BLANK_DATE_RATIO:
+            continue
+        if kind[i] < BLANK_DATE_RATIO + BAD_DATE_RATIO:
+            dates[i] = BAD_DATES[i % len(BAD_DATES)]
+            continue
+        moment = base + timedelta(seconds=int(seconds[i]))
+        fmt = DATE_FORMATS[formats[i]]
+        dates[i] = moment if fmt is None else moment.strftime(fmt)
+    return dates
+
+
+def _extra_columns(rng: np.random.Generator, rows: int, count: int) -> List[np.ndarray]:
+    """宽表中与抽取无关的附加列（文本、数值和空值混合）"""
+    columns = []
+    for j in range(count):
+        if j % 3 == 0:
+            columns.append(rng.integers(0, 100_000, rows).astype(object))
+        else:
+            pool = np.array([f'备注{j}_{k}' for k in range(50)] + [None], dtype=object)
+            columns.append(pool[rng.integers(0, len(pool), rows)])
+    return columns
+
+
+def _write_file(path: Path, rng: np.random.Generator, rows: int, layout: str):
+    from openpyxl import Workbook
+
+    patients = rng.integers(0, max(rows // 40, 1), rows)
+    patient_ids = np.char.add('P', np.char.zfill(patients.astype(str), 8)).astype(object)
+    numeric_ids = rng.random(rows) < 0.1
+    patient_ids[numeric_ids] = patients[numeric_ids] + 10_000_000
+    visit_ids = np.char.add('V', np.char.zfill((patients * 3 + rng.integers(0, 3, rows)).astype(str), 9))
+
+    test_names, lows, highs = _test_names(rng, rows)
+    units = np.array([unit for _, unit, _ in TESTS.values()] + ['U/L'], dtype=object)
+    ref_ranges = np.char.add(np.char.add(np.char.mod('%g', lows), '-'), np.char.mod('%g', highs))
+
+    columns = [
+        patient_ids, visit_ids.astype(object), _dates(rng, rows), test_names, _values(rng, lows, highs),
+        units[rng.integers(0, len(units), rows)], ref_ranges.astype(object),
+        FLAGS[rng.integers(0, len(FLAGS), rows)], SPECIMENS[rng.integers(0, len(SPECIMENS), rows)],
+    ]
+    header = list(COLUMN_MAPPING.values())
+    if layout == 'wide':
+        extra = WIDE_COLUMNS - len(header)
+        header += [f'附加列{j}' for j in range(extra)]
+        columns += _extra_columns(rng, rows, extra)
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('检验结果')
+    sheet.append(header)
+    for row in zip(*(column.tolist() for column in columns)):
+        sheet.append(row)
+    workbook.save(path)
+
+
+def ensure_dataset(size: str, layout: str, force: bool = False, log=print) -> Path:
+    """
+    生成（或复用已有的）数据集
+
+    Returns:
+        数据集目录（data/*.xlsx、profile.yaml、dataset.json）
+    """
+    directory = dataset_dir(size, layout)
+    meta_path = directory / 'dataset.json'
+    metadata = _metadata(size, layout)
+    if not force and meta_path.exists():
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            if json.load(f) == metadata:
+                return directory
+
+    name = dataset_name(size, layout)
+    log(f"生成数据集 {name}: {metadata['rows']:,} 行, {metadata['columns']} 列...")
+    start = time.perf_counter()
+    data_dir = directory / 'data'
+    data_dir.mkdir(parents=True, exist_ok=True)
+    for old in data_dir.glob('*.xlsx'):
+        old.unlink()
+    if meta_path.exists():
+        meta_path.unlink()
+
+    # 数据集由名称和种子唯一确定（不同规模的数据集互不相关）
+    rng = np.random.default_rng([SEED, list(SIZES).index(size), LAYOUTS.index(layout)])
+    remaining, index = metadata['rows'], 0
+    while remaining > 0:
+        rows = min(FILE_ROWS, remaining)
+        _write_file(data_dir / f'part_{index:03d}.xlsx', rng, rows, layout)
+        remaining -= rows
+        index += 1
+
+    with open(directory / 'profile.yaml', 'w', encoding='utf-8') as f:
+        yaml.dump(build_profile(name), f, allow_unicode=True, sort_keys=False)
+    with open(meta_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    log(f"  {index} 个文件，耗时 {time.perf_counter() - start:.1f}s")
+    return directory
+
+
+# 校验脚本（benchmarks/verify）共用的小型样本：在内存中生成，不写入 benchmarks/data
+SAMPLE_PROFILE = {
+    'id': 'verify_sample',
+    'column_mapping': {
+        'patient_id': '病人ID',
+        'visit_id': '就诊ID',
+        'sample_datetime': '检验日期',
+        'test_name': '项目名称',
+        'test_value': '检验结果',
+        'unit': '单位',
+        'ref_range': '参考值',
+        'result_flag': '结果标志',
+        'specimen_type': '标本类型',
+    },
+    'test_mapping': {
+        'CEA': {'aliases': ['CEA', '癌胚抗原'], 'unit': 'ng/mL'},
+        'AFP': {'aliases': ['AFP', '甲胎蛋白'], 'unit': 'ng/mL'},
+        'CA125': {'aliases': ['CA125'], 'unit': 'U/mL'},
+        'WBC': {'aliases': ['WBC', '白细胞'], 'unit': '10^9/L'},
+        'HGB': {'aliases': ['HGB', '血红蛋白'], 'unit': 'g/L'},
+        'PLT': {'aliases': ['PLT', '血小板'], 'unit': '10^9/L'},
+        'ALT': {'aliases': ['ALT'], 'unit': 'U/L'},
+        'AST': {'aliases': ['AST'], 'unit': 'U/L'},
+    },
+}
+
+
+def build_sample_raw(num_rows: int, seed: int = 42) -> pd.DataFrame:
+    """生成与 LIS 导出结构相同的原始数据（固定随机种子）"""
+    rng = np.random.default_rng(seed)
+    names = [alias for config in SAMPLE_PROFILE['test_mapping'].values() for alias in config['aliases']]
+    units = ['ng/mL', 'U/mL', '10^9/L', 'g/L', 'U/L']
+    patients = rng.integers(0, max(num_rows // 40, 1), num_rows)
+    dates = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, num_rows), unit='D')
+    values = np.round(rng.uniform(0, 200, num_rows), 2).astype(str).astype(object)
+    special = rng.random(num_rows)
+    values[special < 0.05] = '<0.5'
+    values[(special >= 0.05) & (special < 0.08)] = '阳性'
+    flags = np.array([None, 'H', 'L'], dtype=object)[rng.choice(3, num_rows, p=[0.8, 0.1, 0.1])]
+
+    return pd.DataFrame({
+        '病人ID': [f'P{value:07d}' for value in patients],
+        '就诊ID': [f'V{value:07d}' for value in patients],
+        '检验日期': dates.strftime('%Y-%m-%d').to_numpy(dtype=object),
+        '项目名称': np.array(names, dtype=object)[rng.integers(0, len(names), num_rows)],
+        '检验结果': values,
+        '单位': np.array(units, dtype=object)[rng.integers(0, len(units), num_rows)],
+        '参考值': np.full(num_rows, '0-5', dtype=object),
+        '结果标志': flags,
+        '标本类型': np.full(num_rows, '血清', dtype=object),
+    })
+
+
+def as_text(chunk: pd.DataFrame) -> pd.DataFrame:
+    """统一缺失值后转为文本（用于比较两种表示的内容）"""
+    return chunk.astype(object).where(chunk.notna(), None).astype(str)
+
+
+def parse_list(value: str, choices) -> List[str]:
+    """解析逗号分隔的选项列表"""
+    items = [item.strip().lower() for item in value.split(',') if item.strip()]
+    unknown = [item for item in items if item not in choices]
+    if unknown:
+        raise argparse.ArgumentTypeError(f"未知的选项 {unknown}，可选: {', '.join(choices)}")
+    return items
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='生成基准测试数据集')
+    parser.add_argument('--sizes', default='10k,1m', type=lambda v: parse_list(v, SIZES),
+                        help=f"数据规模（逗号分隔，可选 {', '.join(SIZES)}）")
+    parser.add_argument('--layouts', default=','.join(LAYOUTS), type=lambda v: parse_list(v, LAYOUTS),
+                        help='表格布局（narrow=只有映射的列, wide=60 列）')
+    parser.add_argument('--force', action='store_true', help='重新生成已有的数据集')
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        for layout in args.layouts:
+            path = ensure_dataset(size, layout, force=args.force)
+            print(f"✓ {dataset_name(size, layout)}: {os.path.relpath(path)}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
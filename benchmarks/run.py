@@ -0,0 +1,253 @@
+"""
+运行端到端基准测试
+
+每个数据集在单独的子进程中运行完整的抽取流程（ExtractionPipeline，与 ExtractorEngine 相同的流程，不需要界面），
+使峰值内存互不影响；唯一值缓存使用临时目录，文件读取缓存默认关闭，每次运行都从头计算。
+结果保存为 JSON（默认 benchmarks/results/bench_<时间>_<提交>.json），
+--compare 时与之前的结果逐项比较，耗时或峰值内存超过阈值的项标为退化（退出码 1）
+
+用法:
+    python -m benchmarks.run [--sizes 10k,1m] [--layouts narrow,wide] [--workers N] [--format parquet]
+                             [--repeat N] [--output 结果.json] [--compare 之前的结果.json] [--threshold 0.1]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from core.constants import ExportConfig
+
+from .datasets import LAYOUTS, SIZES, dataset_name, ensure_dataset, parse_list
+
+RESULTS_DIR = Path(__file__).parent / 'results'
+DEFAULT_THRESHOLD = 0.10
+# 低于这些绝对差值的变化视为噪声，不判为退化
+MIN_SECONDS_DELTA = 0.05
+MIN_RSS_DELTA_MB = 5.0
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """当前进程的历史峰值 RSS（MB；没有 resource 模块的平台返回 None）"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 上单位为 KB，macOS 上为字节
+    return round(peak / (1024 ** 2 if sys.platform == 'darwin' else 1024), 1)
+
+
+def _run_case(dataset: str, options: Dict) -> Dict:
+    """在子进程中运行一次完整的抽取，返回总耗时、吞吐量、峰值内存和各阶段统计"""
+    with tempfile.TemporaryDirectory(prefix='lis_bench_') as tmp_dir:
+        # 唯一值缓存放在临时目录，避免使用之前运行保存的缓存
+        os.environ['LIS_CACHE_DIR'] = os.path.join(tmp_dir, 'cache')
+        from core.pipeline import ExtractionPipeline
+
+        pipeline = ExtractionPipeline(
+            os.path.join(dataset, 'profile.yaml'),
+            workers=options['workers'], output_format=options['format'],
+            use_cache=options['use_cache'], pushdown=options['pushdown'],
+        )
+        errors = []
+        pipeline.error.connect(errors.append)
+        start = time.perf_counter()
+        result = pipeline.run(os.path.join(dataset, 'data'), os.path.join(tmp_dir, 'output'))
+        seconds = time.perf_counter() - start
+        if result is None:
+            raise RuntimeError(f"抽取失败: {'; '.join(errors) or pipeline.exit_code}")
+
+    rows = result['report']['raw_data']['total_rows']
+    return {
+        'rows': rows,
+        'output_rows': result['total_rows'],
+        'seconds': round(seconds, 3),
+        'rows_per_second': round(rows / seconds) if seconds else 0,
+        'peak_rss_mb': _peak_rss_mb(),
+        'steps': result['metrics']['steps'],
+        'stages': result['metrics']['stages'],
+    }
+
+
+def run_case(dataset: Path, options: Dict) -> Dict:
+    """在新的子进程中运行（spawn，与并行抽取的工作进程相同）"""
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+        return executor.submit(_run_case, str(dataset), options).result()
+
+
+def _environment() -> Dict:
+    """运行环境和代码版本"""
+    import numpy
+    import pandas
+    import pyarrow
+
+    root = Path(__file__).resolve().parent.parent
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=root,
+                                capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=root,
+                                    capture_output=True, text=True, check=True).stdout.strip())
+    except (OSError, subprocess.CalledProcessError):
+        commit, dirty = None, False
+    return {
+        'commit': commit,
+        'dirty': dirty,
+        'python': platform.python_version(),
+        'pandas': pandas.__version__,
+        'numpy': numpy.__version__,
+        'pyarrow': pyarrow.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def run_benchmarks(sizes: List[str], layouts: List[str], options: Dict, repeat: int = 1) -> Dict:
+    """运行所有数据集（每个数据集运行 repeat 次，保留总耗时最短的一次）"""
+    report = {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'environment': _environment(),
+        'options': options,
+        'results': {},
+    }
+    for size in sizes:
+        for layout in layouts:
+            name = dataset_name(size, layout)
+            dataset = ensure_dataset(size, layout)
+            runs = []
+            for attempt in range(repeat):
+                print(f"▶ {name}（第 {attempt + 1}/{repeat} 次）...", flush=True)
+                runs.append(run_case(dataset, options))
+            best = min(runs, key=lambda run: run['seconds'])
+            report['results'][name] = best
+            print_result(name, best)
+    return report
+
+
+def print_result(name: str, result: Dict):
+    print(f"  {name}: {result['rows']:,} 行 → {result['output_rows']:,} 行, {result['seconds']:.2f}s, "
+          f"{result['rows_per_second']:,} 行/秒, 峰值内存 {result['peak_rss_mb']} MB")
+    for stage, stats in result['stages'].items():
+        print(f"    {stage:<12} {stats['seconds']:>9.3f}s {stats['rows_per_second']:>12,} 行/秒 "
+              f"峰值 {stats['peak_rss_mb']} MB")
+
+
+def _metrics(result: Dict) -> Dict[str, tuple]:
+    """参与比较的指标: {名称: (值, 单位)}"""
+    metrics = {
+        'seconds': (result['seconds'], 's'),
+        'peak_rss_mb': (result['peak_rss_mb'], 'MB'),
+    }
+    for stage, stats in result.get('steps', {}).items():
+        metrics[f'step.{stage}.seconds'] = (stats['seconds'], 's')
+    for stage, stats in result['stages'].items():
+        metrics[f'{stage}.seconds'] = (stats['seconds'], 's')
+        metrics[f'{stage}.peak_rss_mb'] = (stats['peak_rss_mb'], 'MB')
+    return metrics
+
+
+def compare(previous: Dict, current: Dict, threshold: float) -> List[Dict]:
+    """
+    逐个数据集、逐项比较两次结果
+
+    Returns:
+        退化项列表 [{'dataset', 'metric', 'previous', 'current', 'change'}]
+        （当前值超过之前的 (1 + threshold) 倍，且绝对差值超过噪声下限）
+    """
+    regressions = []
+    for name, result in current['results'].items():
+        if name not in previous.get('results', {}):
+            continue
+        old_metrics = _metrics(previous['results'][name])
+        for metric, (value, unit) in _metrics(result).items():
+            old = old_metrics.get(metric, (None, unit))[0]
+            if value is None or not old:
+                continue
+            min_delta = MIN_SECONDS_DELTA if unit == 's' else MIN_RSS_DELTA_MB
+            if value > old * (1 + threshold) and value - old > min_delta:
+                regressions.append({
+                    'dataset': name, 'metric': metric,
+                    'previous': old, 'current': value, 'change': round(value / old - 1, 3),
+                })
+    return regressions
+
+
+def print_comparison(previous: Dict, current: Dict, regressions: List[Dict], threshold: float):
+    print(f"\n与之前的结果比较（提交 {previous.get('environment', {}).get('commit')}，阈值 {threshold:.0%}）:")
+    for name, result in current['results'].items():
+        old = previous.get('results', {}).get(name)
+        if old is None:
+            print(f"  {name}: 之前的结果中没有此数据集")
+            continue
+        change = result['seconds'] / old['seconds'] - 1 if old['seconds'] else 0
+        print(f"  {name}: {old['seconds']:.2f}s → {result['seconds']:.2f}s ({change:+.0%})")
+    if not regressions:
+        print("✓ 没有超过阈值的性能退化")
+        return
+    print(f"❌ {len(regressions)} 项性能退化:")
+    for item in regressions:
+        print(f"  {item['dataset']} {item['metric']}: {item['previous']} → {item['current']} "
+              f"({item['change']:+.0%})")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description='LIS Extractor 端到端基准测试')
+    parser.add_argument('--sizes', default='10k,1m', type=lambda v: parse_list(v, SIZES),
+                        help=f"数据规模（逗号分隔，可选 {', '.join(SIZES)}）")
+    parser.add_argument('--layouts', default=','.join(LAYOUTS), type=lambda v: parse_list(v, LAYOUTS),
+                        help='表格布局（narrow=只有映射的列, wide=60 列）')
+    parser.add_argument('--workers', type=int, default=1, help='并行处理的进程数')
+    parser.add_argument('--format', choices=ExportConfig.OUTPUT_FORMATS, default='parquet',
+                        help='labs_long 输出格式（默认 parquet，使各处理阶段不被 Excel 写出掩盖）')
+    parser.add_argument('--no-pushdown', action='store_true', help='关闭读取下推')
+    parser.add_argument('--use-cache', action='store_true', help='使用文件读取缓存（默认关闭）')
+    parser.add_argument('--repeat', type=int, default=1, help='每个数据集的运行次数（取最快的一次）')
+    parser.add_argument('--output', default=None, help='结果 JSON 路径（默认保存到 benchmarks/results/）')
+    parser.add_argument('--compare', default=None, metavar='JSON', help='与之前的结果比较')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f'判为退化的相对增幅（默认 {DEFAULT_THRESHOLD}）')
+    return parser
+
+
+def main(argv=None) -> int:
+    args = build_parser().parse_args(argv)
+    previous = None
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            previous = json.load(f)
+
+    options = {
+        'workers': args.workers,
+        'format': args.format,
+        'pushdown': not args.no_pushdown,
+        'use_cache': args.use_cache,
+    }
+    report = run_benchmarks(args.sizes, args.layouts, options, repeat=max(1, args.repeat))
+    if previous is not None:
+        report['regressions'] = compare(previous, report, args.threshold)
+
+    output = args.output
+    if output is None:
+        RESULTS_DIR.mkdir(parents=True, exist_ok=True)
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        output = RESULTS_DIR / f"bench_{stamp}_{report['environment']['commit'] or 'unknown'}.json"
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n✓ 结果已保存: {output}")
+
+    if previous is None:
+        return 0
+    print_comparison(previous, report, report['regressions'], args.threshold)
+    return 1 if report['regressions'] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,16 @@
+"""
+校验脚本
+对比优化前后两种实现的输出是否完全一致，并给出耗时或内存对比（在仓库根目录运行）
+
+用法:
+    python -m benchmarks.verify.value_parser        # ValueParser 向量化解析与逐行解析
+    python -m benchmarks.verify.categoricals        # labs_long 字典列的内存和写出耗时
+    python -m benchmarks.verify.copy_free           # 数据块原地处理的内存
+    python -m benchmarks.verify.pushdown            # 读取下推
+    python -m benchmarks.verify.qc_merge            # 可合并的质量统计
+    python -m benchmarks.verify.multi_sheet         # 多工作表抽取
+    python -m benchmarks.verify.preview_table       # 向导预览表格（需要 PyQt6）
+    python -m benchmarks.verify.test_list           # 向导项目列表（需要 PyQt6）
+    python -m benchmarks.verify.profile_index       # profile 索引和内存缓存
+    python -m benchmarks.verify.profile_detection   # 按表头自动选择 profile
+"""
@@ -0,0 +1,91 @@
+"""
+校验脚本：对比 labs_long 使用 categorical 与普通 object 列时的内存和写出耗时
+用于确认字典编码不改变输出内容，并给出各列的内存报告
+
+用法:
+    python -m benchmarks.verify.categoricals [行数]     # 默认 1,000,000 行（随机生成）
+"""
+import os
+import sys
+import time
+import tempfile
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from core.chunk_processor import ChunkProcessor
+from core.constants import ExportConfig, StreamingConfig
+from core.output_writer import create_output_writer
+from benchmarks.datasets import SAMPLE_PROFILE, as_text, build_sample_raw
+
+
+def process(raw: pd.DataFrame, categorical: bool) -> List[pd.DataFrame]:
+    """按流式抽取的块大小逐块处理，返回各块的 labs_long（与抽取引擎一样不合并）"""
+    processor = ChunkProcessor(SAMPLE_PROFILE, 'verify', persist_cache=False, categorical=categorical)
+    return [processor.process(raw.iloc[start:start + StreamingConfig.CHUNK_ROWS])
+            for start in range(0, len(raw), StreamingConfig.CHUNK_ROWS)]
+
+
+def write_seconds(chunks: List[pd.DataFrame], output_format: str, output_dir: str):
+    """逐块写出，返回 (耗时秒数, 文件大小)"""
+    os.makedirs(output_dir, exist_ok=True)
+    writer = create_output_writer(output_dir, f'labs_long_{output_format}', list(chunks[0].columns),
+                                  {'format': output_format})
+    start = time.perf_counter()
+    for chunk in chunks:
+        writer.write(chunk)
+    files = writer.close()
+    return time.perf_counter() - start, sum(os.path.getsize(path) for path in files)
+
+
+def memory_usage(chunks: List[pd.DataFrame]) -> pd.Series:
+    """各列在所有块中的内存占用之和（MB）"""
+    return sum(chunk.memory_usage(deep=True, index=False) for chunk in chunks) / 1024 ** 2
+
+
+def memory_report(plain: List[pd.DataFrame], encoded: List[pd.DataFrame]) -> pd.DataFrame:
+    """各列的内存占用（MB）"""
+    report = pd.DataFrame({'object': memory_usage(plain), 'categorical': memory_usage(encoded)})
+    report.loc['合计'] = report.sum()
+    report['倍数'] = report['object'] / report['categorical']
+    return report.round(2)
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print("=" * 60)
+    print("labs_long 字典编码内存报告")
+    print("=" * 60)
+    print(f"\n生成原始数据: {num_rows:,} 行")
+    raw = build_sample_raw(num_rows)
+
+    labs_long = {}
+    print(f"\n【处理耗时】")
+    for categorical in (False, True):
+        start = time.perf_counter()
+        labs_long[categorical] = process(raw, categorical)
+        name = 'categorical' if categorical else 'object'
+        print(f"  {name}: {time.perf_counter() - start:.2f}s")
+
+    plain, encoded = labs_long[False], labs_long[True]
+    print(f"\n【内存（MB），字典编码的列: {', '.join(ExportConfig.CATEGORICAL_COLUMNS)}】")
+    print(memory_report(plain, encoded).to_string())
+
+    print(f"\n【写出耗时】")
+    with tempfile.TemporaryDirectory() as output_dir:
+        for output_format in ('parquet', 'feather'):
+            for name, frame in (('object', plain), ('categorical', encoded)):
+                seconds, size = write_seconds(frame, output_format, os.path.join(output_dir, name))
+                print(f"  {output_format} / {name}: {seconds:.2f}s, {size / 1024 ** 2:.1f} MB")
+
+    if all(as_text(a).equals(as_text(b)) for a, b in zip(plain, encoded)):
+        print("\n✓ 两种表示的 labs_long 内容完全一致")
+        return 0
+    print("\n❌ 两种表示的 labs_long 内容不一致")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,75 @@
+"""
+校验脚本：对比处理一个数据块时逐步复制与 copy-on-write 原地处理的峰值内存
+用于确认 ChunkProcessor 不再在每个步骤复制整个数据块，且输出内容不变
+
+用法:
+    python -m benchmarks.verify.copy_free [行数]     # 默认 500,000 行（一个数据块，随机生成）
+"""
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from core.chunk_processor import ChunkProcessor
+from benchmarks.datasets import SAMPLE_PROFILE, as_text, build_sample_raw
+
+
+def process_copying(processor: ChunkProcessor, df_raw: pd.DataFrame) -> pd.DataFrame:
+    """旧的处理方式：每个步骤都复制整个数据框"""
+    df = processor.column_mapper.apply(df_raw).reindex(columns=processor.mapped_fields)
+    df = processor.test_mapper.apply(df)
+    df = processor.test_mapper.filter_selected_tests(df, processor.selected_tests)
+    df = processor.value_parser.apply(df)
+    df['sample_datetime'] = processor.date_parser.parse(df['sample_datetime'])
+    labs_long = df[processor.output_columns[:-2]].copy()
+    labs_long['profile_id'] = processor.profile['id']
+    labs_long['run_id'] = processor.run_id
+    return labs_long
+
+
+def measure(func, *args):
+    """执行函数，返回 (结果, 耗时秒数, 峰值新增内存 MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func(*args)
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, seconds, peak / 1024 ** 2
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+    print("=" * 60)
+    print("数据块处理峰值内存对比")
+    print("=" * 60)
+    print(f"\n生成原始数据: {num_rows:,} 行")
+    df_raw = build_sample_raw(num_rows)
+    raw_mb = df_raw.memory_usage(index=False).sum() / 1024 ** 2
+    print(f"  原始数据块（列数组，不含字符串对象）: {raw_mb:.1f} MB")
+
+    # object 列，只比较复制的差异；先各处理一次预热唯一值缓存
+    engines = {
+        '逐步复制': lambda processor, df: process_copying(processor, df),
+        'copy-on-write 原地处理': lambda processor, df: processor.process(df),
+    }
+    results = {}
+    print(f"\n【峰值新增内存（相对原始数据块的倍数）】")
+    for name, engine in engines.items():
+        processor = ChunkProcessor(SAMPLE_PROFILE, 'verify', persist_cache=False, categorical=False)
+        engine(processor, df_raw)
+        results[name], seconds, peak_mb = measure(engine, processor, df_raw)
+        print(f"  {name}: {peak_mb:.1f} MB ({peak_mb / raw_mb:.2f}x), {seconds:.2f}s")
+
+    expected, actual = results.values()
+    if as_text(expected).equals(as_text(actual)) and df_raw.equals(build_sample_raw(num_rows)):
+        print("\n✓ 两种方式的 labs_long 完全一致，原始数据块未被修改")
+        return 0
+    print("\n❌ 两种方式的结果不一致，或原始数据块被修改")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,132 @@
+"""
+校验脚本：多工作表文件的抽取（signature.sheets）
+对比逐个工作表单独处理的结果，以及单进程与多进程（各工作表同时读取）的耗时
+
+用法:
+    python -m benchmarks.verify.multi_sheet [每个工作表的行数] [工作表数] [进程数]
+    # 默认 20,000 行 × 4 个工作表（Sheet1..Sheet4，另加一个不匹配的「说明」工作表），4 个进程
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import yaml
+
+from core.chunk_processor import ChunkProcessor
+from core.constants import LoaderConfig
+from core.data_loader import DataLoader
+from core.pipeline import ExtractionPipeline
+from benchmarks.datasets import SAMPLE_PROFILE as BASE_PROFILE, as_text, build_sample_raw
+
+PROFILE = {
+    **BASE_PROFILE,
+    'id': 'verify_multi_sheet',
+    'signature': {'sheets': {'pattern': r'^Sheet\d+$'}},
+    'output_options': {'format': 'parquet'},
+}
+
+
+def build_workbook(path: str, rows_per_sheet: int, sheets: int):
+    """生成多工作表 Excel（每个工作表的数据不同，最后一个工作表的行数减半）"""
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    notes = workbook.create_sheet('说明')
+    notes.append(['导出说明'])
+    notes.append(['本文件按月份拆分为多个工作表'])
+    for i in range(sheets):
+        rows = rows_per_sheet if i < sheets - 1 else rows_per_sheet // 2
+        raw = build_sample_raw(rows, seed=i)
+        sheet = workbook.create_sheet(f'Sheet{i + 1}')
+        sheet.append(list(raw.columns))
+        for row in raw.itertuples(index=False):
+            sheet.append(list(row))
+    workbook.save(path)
+
+
+def reference(file_path: str) -> pd.DataFrame:
+    """逐个工作表单独读取、处理后合并（参照结果）"""
+    processor = ChunkProcessor(PROFILE, 'verify', persist_cache=False)
+    loader = DataLoader(use_cache=False)
+    selector = processor.compiled.sheets
+    chunks = [
+        processor.process(loader.load_full_file(file_path, sheet=index), name)
+        for index, name in loader.select_sheets(file_path, selector)
+    ]
+    return pd.concat(chunks, ignore_index=True)
+
+
+def run_pipeline(profile_path: str, input_dir: str, output_dir: str, workers: int):
+    """运行抽取流程，返回 (labs_long, 耗时)"""
+    pipeline = ExtractionPipeline(profile_path, workers=workers, use_cache=False)
+    start = time.perf_counter()
+    result = pipeline.run(input_dir, output_dir)
+    seconds = time.perf_counter() - start
+    if result is None:
+        raise RuntimeError(f"抽取失败（退出码 {pipeline.exit_code}）")
+    return pd.read_parquet(result['labs_long_file']), seconds
+
+
+def main():
+    rows_per_sheet = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    sheets = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    print("=" * 60)
+    print("多工作表抽取对比")
+    print("=" * 60)
+    ok = True
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ.setdefault('LIS_CACHE_DIR', os.path.join(tmp_dir, 'cache'))
+        input_dir = os.path.join(tmp_dir, 'input')
+        os.makedirs(input_dir)
+        file_path = os.path.join(input_dir, 'multi_sheet.xlsx')
+        profile_path = os.path.join(tmp_dir, 'profile.yaml')
+        with open(profile_path, 'w', encoding='utf-8') as f:
+            yaml.safe_dump(PROFILE, f, allow_unicode=True)
+
+        print(f"\n生成 {sheets} 个工作表 × {rows_per_sheet:,} 行（另有一个不匹配的工作表）...")
+        build_workbook(file_path, rows_per_sheet, sheets)
+        selector = ChunkProcessor(PROFILE, 'verify', persist_cache=False).compiled.sheets
+        selected = DataLoader(use_cache=False).select_sheets(file_path, selector)
+        print(f"  signature.sheets ({selector}) 选择: {[name for _, name in selected]}")
+
+        expected = reference(file_path)
+        print(f"  逐个工作表处理: {len(expected):,} 行")
+
+        print("\n【抽取流程】")
+        timings = {}
+        for count in sorted({1, workers}):
+            labs_long, seconds = run_pipeline(profile_path, input_dir,
+                                              os.path.join(tmp_dir, f'out_{count}'), count)
+            timings[count] = seconds
+            same = as_text(expected.drop(columns='run_id')).equals(as_text(labs_long.drop(columns='run_id')))
+            ok = ok and same
+            per_sheet = labs_long[LoaderConfig.SHEET_COLUMN].value_counts(sort=False).to_dict()
+            print(f"  {count} 个进程: {seconds:.2f}s, {len(labs_long):,} 行, "
+                  f"与逐个工作表处理{'一致' if same else '不一致'}; 各工作表行数 {per_sheet}")
+        if workers > 1:
+            print(f"  加速比: {timings[1] / timings[workers]:.1f}x（CPU 核数 {os.cpu_count()}）")
+
+        print("\n【DataLoader.load_sheets】")
+        frames = {}
+        for count in sorted({1, workers}):
+            loader = DataLoader(use_cache=False)
+            start = time.perf_counter()
+            frames[count] = loader.load_sheets(file_path, selector, workers=count)
+            print(f"  {count} 个进程: {time.perf_counter() - start:.2f}s, {len(frames[count]):,} 行")
+        same = as_text(frames[1]).equals(as_text(frames[workers]))
+        ok = ok and same
+        print(f"  单进程与多进程读取结果{'一致' if same else '不一致'}")
+
+    if ok:
+        print("\n✓ 多工作表抽取结果与逐个工作表处理完全一致，来源工作表已记录")
+        return 0
+    print("\n❌ 多工作表抽取结果不一致")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
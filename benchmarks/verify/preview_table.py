@@ -0,0 +1,119 @@
+"""
+校验脚本：对比向导预览表格逐单元格创建 QTableWidgetItem 与 DataFrameModel 的加载、滚动耗时
+并确认表格模型显示的文本与逐单元格填充的文本一致
+
+用法:
+    python -m benchmarks.verify.preview_table [行数] [列数]     # 默认 100,000 行 × 40 列（随机生成）
+    # 无显示环境时使用 QT_QPA_PLATFORM=offscreen
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+
+from gui.components import DataPreviewTable
+
+# 逐单元格填充在行数较多时过慢，旧方式最多测这么多行
+ITEM_TABLE_MAX_ROWS = 10_000
+
+
+def build_frame(rows: int, columns: int) -> pd.DataFrame:
+    """生成混合类型的预览数据（文本、数值、日期、缺失值）"""
+    rng = np.random.default_rng(0)
+    data = {}
+    for j in range(columns):
+        kind = j % 4
+        if kind == 0:
+            data[f'文本{j}'] = rng.choice(['血红蛋白', 'WBC', '阴性', '<0.5', None], rows)
+        elif kind == 1:
+            values = rng.normal(100, 30, rows).round(2)
+            values[rng.random(rows) < 0.05] = np.nan
+            data[f'数值{j}'] = values
+        elif kind == 2:
+            data[f'日期{j}'] = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 10 ** 6, rows), unit='min')
+        else:
+            data[f'整数{j}'] = rng.integers(0, 1000, rows)
+    return pd.DataFrame(data)
+
+
+def load_items(table: QTableWidget, df: pd.DataFrame):
+    """旧的预览方式：每个单元格创建一个 QTableWidgetItem，再按全部内容调整列宽"""
+    table.clear()
+    table.setRowCount(len(df))
+    table.setColumnCount(len(df.columns))
+    table.setHorizontalHeaderLabels([str(col) for col in df.columns])
+    for i in range(len(df)):
+        for j in range(len(df.columns)):
+            table.setItem(i, j, QTableWidgetItem(str(df.iloc[i, j])))
+    table.resizeColumnsToContents()
+
+
+def scroll_through(view, app: QApplication, steps: int = 50) -> float:
+    """从头到尾分步滚动并重绘，返回耗时"""
+    bar = view.verticalScrollBar()
+    start = time.perf_counter()
+    for step in range(steps + 1):
+        bar.setValue(bar.maximum() * step // steps)
+        view.viewport().repaint()
+        app.processEvents()
+    return time.perf_counter() - start
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    columns = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    print("=" * 60)
+    print("预览表格对比")
+    print("=" * 60)
+    df = build_frame(rows, columns)
+    item_rows = min(rows, ITEM_TABLE_MAX_ROWS)
+    print(f"\n数据: {rows:,} 行 × {columns} 列（逐单元格方式测前 {item_rows:,} 行）")
+
+    view = DataPreviewTable()
+    view.resize(1200, 600)
+    view.show()
+    start = time.perf_counter()
+    view.load_dataframe(df, max_rows=None)
+    app.processEvents()
+    model_seconds = time.perf_counter() - start
+    model_scroll = scroll_through(view, app)
+
+    items = QTableWidget()
+    items.resize(1200, 600)
+    items.show()
+    start = time.perf_counter()
+    load_items(items, df.head(item_rows))
+    app.processEvents()
+    item_seconds = time.perf_counter() - start
+    item_scroll = scroll_through(items, app)
+
+    print("\n【加载】")
+    print(f"  QTableWidgetItem ({item_rows:,} 行): {item_seconds:.2f}s")
+    print(f"  DataFrameModel   ({rows:,} 行): {model_seconds:.3f}s")
+    print("\n【从头滚动到尾（51 次重绘）】")
+    print(f"  QTableWidgetItem: {item_scroll:.2f}s")
+    print(f"  DataFrameModel:   {model_scroll:.2f}s")
+
+    # 抽样比较显示文本
+    model = view.model()
+    rng = np.random.default_rng(1)
+    samples = [(int(i), int(j)) for i, j in zip(rng.integers(0, item_rows, 2000), rng.integers(0, columns, 2000))]
+    same = all(model.data(model.index(i, j)) == items.item(i, j).text() for i, j in samples)
+    same = same and model.rowCount() == rows and model.columnCount() == columns
+    same = same and all(model.headerData(j, Qt.Orientation.Horizontal) == items.horizontalHeaderItem(j).text()
+                        for j in range(columns))
+
+    if same:
+        print("\n✓ 表格模型显示的文本与逐单元格填充一致")
+        return 0
+    print("\n❌ 表格模型显示的文本不一致")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,216 @@
+"""
+校验脚本：按表头自动选择 profile（--profile auto）
+对比倒排索引识别与「读取表头后对每个 profile 调用 DataLoader.validate_columns」的结果和耗时，
+并确认自动识别后的抽取结果与直接指定 profile 时完全一致
+
+用法:
+    python -m benchmarks.verify.profile_detection [profile 数] [文件数]     # 默认 500 个 profile，60 个文件（另有 5 个不匹配的文件）
+"""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+from openpyxl import Workbook
+
+from core import cli
+from core.data_loader import DataLoader
+from core.pipeline import ExtractionPipeline
+from core.profile_detector import ProfileDetector
+from core.profile_manager import ProfileManager
+from core.readers import frame_from_rows, read_rows
+from benchmarks.datasets import SAMPLE_PROFILE as BASE_PROFILE, as_text, build_sample_raw
+
+# 各标准字段在不同医院导出中的列名
+FIELD_VARIANTS = {
+    'patient_id': ['病人ID', '患者编号', 'PatientID', '登记号', '病历号'],
+    'sample_datetime': ['检验日期', '采样时间', '报告时间', '采集时间'],
+    'test_name': ['项目名称', '检验项目', '项目', '检测项目'],
+    'test_value': ['检验结果', '结果', '结果值', '定量结果'],
+    'unit': ['单位', '结果单位'],
+    'ref_range': ['参考值', '参考范围', '正常值'],
+}
+RENAMED = {'病人ID': '患者编号', '项目名称': '检验项目', '检验结果': '结果', '检验日期': '采样时间'}
+
+
+def build_signatures(count: int, seed: int = 0) -> list:
+    """每家医院一个签名：各字段随机选一种列名，另有 2 个本院特有的列"""
+    rng = np.random.default_rng(seed)
+    signatures = []
+    for i in range(count):
+        columns = [variants[rng.integers(len(variants))] for variants in FIELD_VARIANTS.values()]
+        columns += [f'院区{i}_科室', f'院区{i}_申请单号']
+        signatures.append(columns)
+    return signatures
+
+
+def write_header_file(path: str, columns: list, rows: int = 20):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(columns)
+    for r in range(rows):
+        sheet.append([f'{column}_{r}' for column in columns])
+    workbook.save(path)
+
+
+def write_raw_file(path: str, raw: pd.DataFrame):
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(list(raw.columns))
+    for row in raw.itertuples(index=False):
+        sheet.append(list(row))
+    workbook.save(path)
+
+
+def naive_detect(file_path: str, profiles: list):
+    """旧方式：用读取引擎读取表头，再对每个 profile 调用 validate_columns"""
+    loader = DataLoader(use_cache=False)
+    frames = {}
+    best = None
+    for position, profile in enumerate(profiles):
+        signature = profile['signature']
+        skip_rows = signature.get('skip_top_rows') or 0
+        if skip_rows not in frames:
+            frame = frame_from_rows(read_rows(file_path, skip_rows + 2), header=skip_rows, nrows=0)
+            frames[skip_rows] = loader._clean_columns(frame)
+        required = signature['required_columns']
+        valid, missing = loader.validate_columns(frames[skip_rows], required, signature['min_match_ratio'])
+        if not valid:
+            continue
+        key = ((len(required) - len(missing)) / len(required), len(required) - len(missing), -position)
+        if best is None or key > best[0]:
+            best = (key, profile['id'])
+    return best[1] if best else None
+
+
+def check_routing(profile_count: int, file_count: int) -> bool:
+    print(f"\n【识别】{profile_count} 个 profile，{file_count} 个文件 + 5 个不匹配的文件")
+    rng = np.random.default_rng(1)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        profiles_dir = os.path.join(tmp_dir, 'profiles')
+        drop_dir = os.path.join(tmp_dir, 'drop')
+        os.makedirs(drop_dir)
+        manager = ProfileManager(profiles_dir)
+        signatures = build_signatures(profile_count)
+        for i, columns in enumerate(signatures):
+            profile = manager.create_profile_from_wizard(
+                f'hospital_{i:04d}', f'医院 {i}', {}, {}, {}, columns)
+            manager.save_profile(profile)
+
+        truth = {}
+        for j in range(file_count):
+            owner = int(rng.integers(profile_count))
+            columns = list(signatures[owner])
+            columns.pop(int(rng.integers(len(columns))))  # 缺一列，仍高于 0.75
+            columns += ['备注', f'扩展{j}']
+            rng.shuffle(columns)
+            path = os.path.join(drop_dir, f'file_{j:03d}.xlsx')
+            write_header_file(path, columns)
+            truth[path] = f'hospital_{owner:04d}'
+        for j in range(5):
+            path = os.path.join(drop_dir, f'other_{j}.xlsx')
+            write_header_file(path, ['列A', '列B', f'无关{j}'])
+            truth[path] = None
+        files = DataLoader().find_excel_files(drop_dir)
+
+        start = time.perf_counter()
+        listed = ProfileManager(profiles_dir).list_profiles()
+        detector = ProfileDetector(listed)
+        build_seconds = time.perf_counter() - start
+        start = time.perf_counter()
+        _, unmatched, matches = detector.route(files)
+        route_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        naive = {path: naive_detect(path, listed) for path in files}
+        naive_seconds = time.perf_counter() - start
+
+    detected = {path: match['profile_id'] if match else None for path, match in matches.items()}
+    print(f"  读取 profile 索引并建立倒排索引: {build_seconds * 1000:.0f} ms")
+    print(f"  倒排索引识别: {route_seconds * 1000 / len(files):.1f} ms/文件")
+    print(f"  逐个 profile 调用 validate_columns: {naive_seconds * 1000 / len(files):.1f} ms/文件")
+    same = detected == naive == truth and len(unmatched) == 5
+    print(f"  识别结果与逐个 profile 比较{'一致' if same else '不一致'}，未匹配 {len(unmatched)} 个文件")
+    return same
+
+
+def check_extraction() -> bool:
+    print("\n【抽取】两种导出格式混在同一目录，--profile auto 与分别指定 profile 的结果对比")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        os.environ.setdefault('LIS_CACHE_DIR', os.path.join(tmp_dir, 'cache'))
+        profiles_dir = os.path.join(tmp_dir, 'profiles')
+        drop_dir = os.path.join(tmp_dir, 'drop')
+        os.makedirs(profiles_dir)
+        os.makedirs(drop_dir)
+
+        profile_a = {**BASE_PROFILE, 'id': 'verify_detect_a',
+                     'signature': {'required_columns': list(BASE_PROFILE['column_mapping'].values()),
+                                   'min_match_ratio': 0.75}}
+        mapping_b = {field: RENAMED.get(column, column) for field, column in BASE_PROFILE['column_mapping'].items()}
+        profile_b = {**BASE_PROFILE, 'id': 'verify_detect_b', 'column_mapping': mapping_b,
+                     'signature': {'required_columns': list(mapping_b.values()), 'min_match_ratio': 0.75}}
+        for profile in (profile_a, profile_b):
+            with open(os.path.join(profiles_dir, f"{profile['id']}.yaml"), 'w', encoding='utf-8') as f:
+                yaml.safe_dump(profile, f, allow_unicode=True)
+
+        files = {'verify_detect_a': [], 'verify_detect_b': []}
+        for seed in range(4):
+            raw = build_sample_raw(3_000, seed=seed)
+            profile_id = 'verify_detect_a' if seed % 2 == 0 else 'verify_detect_b'
+            if profile_id == 'verify_detect_b':
+                raw = raw.rename(columns=RENAMED)
+            path = os.path.join(drop_dir, f'export_{seed}.xlsx')
+            write_raw_file(path, raw)
+            files[profile_id].append(path)
+        write_header_file(os.path.join(drop_dir, 'notes.xlsx'), ['说明'])
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            exit_code = cli.main(['--profile', 'auto', '--input', drop_dir, '--output',
+                                  os.path.join(tmp_dir, 'auto'), '--profiles-dir', profiles_dir,
+                                  '--format', 'parquet', '--json', '--quiet'])
+        summary = json.loads(output.getvalue())
+        print(f"  退出码 {exit_code}，识别耗时 {summary['detect_seconds'] * 1000:.0f} ms，"
+              f"未匹配: {[os.path.basename(path) for path in summary['unmatched_files']]}")
+
+        same = exit_code == 0 and len(summary['runs']) == 2
+        for run in summary['runs']:
+            profile_id = run['profile_id']
+            pipeline = ExtractionPipeline(os.path.join(profiles_dir, f'{profile_id}.yaml'),
+                                          output_format='parquet')
+            routed = [path for path, routed_id in summary['routing'].items() if routed_id == profile_id]
+            same = same and sorted(routed) == sorted(files[profile_id])
+            expected = pipeline.run(routed, os.path.join(tmp_dir, profile_id))
+            auto = pd.read_parquet(run['labs_long_file']).drop(columns='run_id')
+            explicit = pd.read_parquet(expected['labs_long_file']).drop(columns='run_id')
+            equal = as_text(auto).equals(as_text(explicit))
+            same = same and equal
+            print(f"  {profile_id}: {run['total_rows']:,} 行，与直接指定 profile {'一致' if equal else '不一致'}")
+    return same
+
+
+def main():
+    profile_count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    file_count = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+
+    print("=" * 60)
+    print("profile 自动识别")
+    print("=" * 60)
+    ok = check_routing(profile_count, file_count)
+    ok = check_extraction() and ok
+
+    if ok:
+        print("\n✓ 自动识别结果正确，抽取结果与直接指定 profile 完全一致")
+        return 0
+    print("\n❌ 自动识别结果不一致")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+校验脚本：对比 ProfileManager 每次解析全部 YAML 与使用 profile 索引、内存缓存时列出和加载 profile 的耗时
+并确认索引得到的列表、加载的 profile 与直接解析 YAML 完全一致
+
+用法:
+    python -m benchmarks.verify.profile_index [profile 数] [每个 profile 的项目数]     # 默认 300 个 profile × 200 个项目
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+import yaml
+
+from core.profile_manager import ProfileManager
+
+
+def build_profiles(directory: str, count: int, tests: int):
+    """生成 profile 文件（结构与向导生成的相同）"""
+    manager = ProfileManager(directory)
+    for i in range(count):
+        test_mapping = {
+            f'项目{j}': {'aliases': [f'项目{j}', f'TEST{j}', f'test-{j}'], 'unit': 'mmol/L', 'range': None}
+            for j in range(tests)
+        }
+        profile = manager.create_profile_from_wizard(
+            f'hospital_{i:04d}', f'第 {i} 家医院 检验科',
+            {'patient_id': '病人ID', 'test_name': '项目名称', 'test_value': '结果'},
+            test_mapping, {'invalid_values': {'mapping': {'未做': None}}},
+            ['病人ID', '项目名称', '结果', f'科室{i % 7}'],
+        )
+        manager.save_profile(profile)
+
+
+def list_profiles_uncached(directory: str) -> list:
+    """旧的列表方式：每次打开并解析目录中的每个 YAML"""
+    profiles = []
+    for file_path in Path(directory).glob('*.yaml'):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = yaml.safe_load(f)
+        profiles.append({
+            'id': data.get('id', ''),
+            'name': file_path.stem,
+            'description': data.get('description', ''),
+            'file_path': str(file_path),
+            'created_time': datetime.fromtimestamp(file_path.stat().st_ctime)
+        })
+    profiles.sort(key=lambda x: x['created_time'], reverse=True)
+    return profiles
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    tests = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+
+    print("=" * 60)
+    print("profile 索引对比")
+    print("=" * 60)
+    ok = True
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"\n生成 {count} 个 profile × {tests} 个项目...")
+        build_profiles(directory, count, tests)
+
+        print("\n【列出 profile】")
+        expected, seconds = timed(list_profiles_uncached, directory)
+        print(f"  逐个解析 YAML:           {seconds:.3f}s")
+        manager = ProfileManager(directory)
+        listed, seconds = timed(manager.list_profiles)
+        print(f"  首次（建立索引）:         {seconds:.3f}s")
+        listed_again, seconds = timed(ProfileManager(directory).list_profiles)
+        print(f"  再次（新实例，读取索引）: {seconds:.3f}s")
+
+        # 修改一个 profile：只重新解析这一个文件
+        changed_path = os.path.join(directory, 'hospital_0000.yaml')
+        with open(changed_path, 'r', encoding='utf-8') as f:
+            profile = yaml.safe_load(f)
+        profile['description'] = '已修改的描述'
+        with open(changed_path, 'w', encoding='utf-8') as f:
+            yaml.dump(profile, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+        after_change, seconds = timed(manager.list_profiles)
+        print(f"  修改一个文件后:           {seconds:.3f}s")
+
+        def without_signature(profiles):
+            return [{key: value for key, value in item.items() if key != 'signature'} for item in profiles]
+
+        ok = without_signature(listed) == expected and without_signature(listed_again) == expected
+        ok = ok and without_signature(after_change) == list_profiles_uncached(directory)
+
+        print("\n【加载 profile（选择配置时）】")
+        profile_id = 'hospital_0001'
+        with open(os.path.join(directory, f'{profile_id}.yaml'), 'r', encoding='utf-8') as f:
+            start = time.perf_counter()
+            expected_profile = yaml.safe_load(f)
+            print(f"  yaml.safe_load: {(time.perf_counter() - start) * 1000:.1f}ms")
+        loader = ProfileManager(directory)
+        loaded, seconds = timed(loader.load_profile, profile_id)
+        print(f"  首次（libyaml）: {seconds * 1000:.1f}ms")
+        loaded_again, seconds = timed(loader.load_profile, profile_id)
+        print(f"  内存缓存:        {seconds * 1000:.1f}ms")
+        _, seconds = timed(loader.load_compiled, profile_id)
+        compiled, cached_seconds = timed(loader.load_compiled, profile_id)
+        print(f"  编译 / 缓存的执行计划: {seconds * 1000:.1f}ms / {cached_seconds * 1000:.3f}ms")
+        ok = ok and loaded == expected_profile == loaded_again and compiled.profile_id == profile_id
+        # 抽取流程按文件路径加载，与按 ID 加载共用同一个缓存项
+        ok = ok and loader.load_compiled_file(os.path.join(directory, f'{profile_id}.yaml')) is compiled
+
+    if ok:
+        print("\n✓ 索引得到的列表和加载的 profile 与直接解析 YAML 完全一致")
+        return 0
+    print("\n❌ 结果不一致")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
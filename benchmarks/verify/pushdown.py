@@ -0,0 +1,123 @@
+"""
+校验脚本：对比读取下推（只读取映射的列、读取时跳过未选择项目的行）前后的耗时和原始数据块内存
+用于确认下推不改变 labs_long 和数据中出现的检验项目
+
+用法:
+    python -m benchmarks.verify.pushdown [行数] [Excel 文件]
+    # 默认生成 20,000 行、60 列、800 个检验项目的宽表（profile 映射 9 列、选择 20 个项目）
+    # 指定文件时表头需与生成的宽表相同
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from core.chunk_processor import ChunkProcessor
+from core.data_loader import DataLoader
+from benchmarks.datasets import SAMPLE_PROFILE as BASE_PROFILE, as_text
+
+TOTAL_COLUMNS = 60
+TOTAL_TESTS = 800
+SELECTED_TESTS = 20
+
+TESTS = [f'TEST{i:03d}' for i in range(TOTAL_TESTS)]
+PROFILE = {
+    'id': 'verify_pushdown',
+    'column_mapping': BASE_PROFILE['column_mapping'],
+    'test_mapping': {
+        name: {'aliases': [name], 'unit': 'U/L'}
+        for name in TESTS[::TOTAL_TESTS // SELECTED_TESTS]
+    },
+}
+
+
+def build_wide_file(path: str, num_rows: int, seed: int = 42):
+    """生成宽表 Excel（映射的 9 列 + 其余无关列，项目均匀分布）"""
+    from openpyxl import Workbook
+
+    rng = np.random.default_rng(seed)
+    mapped = list(PROFILE['column_mapping'].values())
+    extra = [f'附加列{i}' for i in range(TOTAL_COLUMNS - len(mapped))]
+    tests = rng.integers(0, TOTAL_TESTS, num_rows)
+    patients = rng.integers(0, max(num_rows // 40, 1), num_rows)
+    days = rng.integers(0, 365, num_rows)
+    values = np.round(rng.uniform(0, 100, num_rows), 2)
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append(mapped + extra)
+    start = pd.Timestamp('2024-01-01')
+    for i in range(num_rows):
+        row = [
+            f'P{patients[i]:07d}', f'V{patients[i]:07d}',
+            (start + pd.Timedelta(days=int(days[i]))).strftime('%Y-%m-%d'),
+            TESTS[tests[i]], str(values[i]), 'U/L', '0-40',
+            'H' if values[i] > 90 else None, '血清',
+        ]
+        row += [f'x{(i + j) % 97}' if j % 3 else (i * j) % 1000 for j in range(len(extra))]
+        sheet.append(row)
+    workbook.save(path)
+
+
+def extract(file_path: str, pushdown: bool) -> dict:
+    """读取并处理整个文件，返回 labs_long、数据中出现的项目和读取统计"""
+    processor = ChunkProcessor(PROFILE, 'verify', persist_cache=False)
+    loader = DataLoader(use_cache=False)
+    plan = processor.read_plan() if pushdown else {'columns': None, 'row_filter': None}
+
+    start = time.perf_counter()
+    chunks = []
+    raw_rows = raw_mb = 0
+    for df in loader.iter_file_chunks(file_path, columns=plan['columns'], row_filter=plan['row_filter']):
+        raw_rows += len(df)
+        raw_mb += df.memory_usage(deep=True, index=False).sum() / 1024 ** 2
+        chunks.append(processor.process(df))
+    return {
+        'labs_long': pd.concat(chunks, ignore_index=True),
+        'tests': processor.tests_in_data,
+        'seconds': time.perf_counter() - start,
+        'raw_rows': raw_rows,
+        'raw_mb': raw_mb,
+        'skipped': processor.record_skipped(plan['row_filter']),
+    }
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    file_path = sys.argv[2] if len(sys.argv) > 2 else None
+
+    print("=" * 60)
+    print("读取下推对比")
+    print("=" * 60)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        if file_path is None:
+            file_path = os.path.join(tmp_dir, 'wide.xlsx')
+            print(f"\n生成宽表: {num_rows:,} 行, {TOTAL_COLUMNS} 列, {TOTAL_TESTS} 个检验项目")
+            start = time.perf_counter()
+            build_wide_file(file_path, num_rows)
+            print(f"  耗时 {time.perf_counter() - start:.1f}s")
+        print(f"  profile: 映射 {len(PROFILE['column_mapping'])} 列, 选择 {SELECTED_TESTS} 个项目")
+
+        results = {}
+        print(f"\n【读取 + 处理】（原始数据块内存为各块 DataFrame 的内存之和，决定峰值内存）")
+        for pushdown in (False, True):
+            result = results[pushdown] = extract(file_path, pushdown)
+            name = '下推' if pushdown else '全部读取'
+            print(f"  {name}: {result['seconds']:.2f}s, 解析 {result['raw_rows']:,} 行, "
+                  f"原始数据块 {result['raw_mb']:.1f} MB, 读取时跳过 {result['skipped']:,} 行")
+
+    expected, actual = results[False], results[True]
+    same_rows = as_text(expected['labs_long']).equals(as_text(actual['labs_long']))
+    if same_rows and expected['tests'] == actual['tests']:
+        print(f"\n✓ labs_long 完全一致（{len(actual['labs_long']):,} 行），"
+              f"数据中出现的项目一致（{len(actual['tests'])} 个）")
+        return 0
+    print("\n❌ 下推前后的 labs_long 或数据中出现的项目不一致")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,150 @@
+"""
+校验脚本：逐块累计、按任意分组合并的质量统计与整表计算结果一致，并给出质量统计占处理耗时的比例
+
+整表计算直接使用 pandas（isnull().sum()、duplicated()、value_counts()）；
+逐块统计按随机的「文件」和「工作进程」分组，经 pickle 传递后以不同的顺序合并
+
+用法:
+    python -m benchmarks.verify.qc_merge [行数]     # 默认 500,000 行（随机生成，含 5% 重复行）
+"""
+import pickle
+import random
+import sys
+import time
+from typing import Dict, List
+
+import pandas as pd
+
+from core.chunk_processor import ChunkProcessor
+from core.constants import StreamingConfig
+from core.qc_reporter import QCAccumulator, QCReporter, value_counts
+from benchmarks.datasets import SAMPLE_PROFILE, build_sample_raw
+
+CHUNK_ROWS = 50_000
+GROUPINGS = 5
+
+
+def build_raw_with_duplicates(num_rows: int) -> pd.DataFrame:
+    """随机数据，再随机复制 5% 的行并打乱顺序"""
+    raw = build_sample_raw(num_rows)
+    duplicates = raw.sample(frac=0.05, random_state=1)
+    raw = pd.concat([raw, duplicates]).sample(frac=1, random_state=2).reset_index(drop=True)
+    return raw.astype('string')
+
+
+def reference_report(raw: pd.DataFrame, processed: pd.DataFrame) -> Dict:
+    """整表计算（原来的 QCReporter.analyze 的方式）"""
+    return {
+        'raw_data': {
+            'total_rows': len(raw),
+            'total_columns': len(raw.columns),
+            'columns': raw.columns.tolist(),
+            'missing_values': raw.isnull().sum().to_dict(),
+            'duplicate_rows': int(raw.duplicated().sum()),
+        },
+        'processed_data': {
+            'total_rows': len(processed),
+            'total_tests': processed['test_code'].nunique(),
+            'test_distribution': value_counts(processed['test_code']),
+            'value_flags': value_counts(processed['value_flag']),
+            'missing_values': processed.isnull().sum().to_dict(),
+        },
+    }
+
+
+def accumulate(raw: pd.DataFrame, processor: ChunkProcessor):
+    """逐块处理并累计，返回 (每块的累加器, labs_long 块, 处理耗时, 统计耗时)"""
+    accumulators, chunks = [], []
+    process_seconds = qc_seconds = 0.0
+    for start in range(0, len(raw), CHUNK_ROWS):
+        chunk = raw.iloc[start:start + CHUNK_ROWS]
+        begin = time.perf_counter()
+        labs_long = processor.process(chunk)
+        middle = time.perf_counter()
+        qc = QCAccumulator()
+        qc.add_raw(chunk)
+        qc.add_processed(labs_long)
+        end = time.perf_counter()
+
+        process_seconds += middle - begin
+        qc_seconds += end - middle
+        accumulators.append(qc)
+        chunks.append(labs_long)
+    return accumulators, chunks, process_seconds, qc_seconds
+
+
+def merge_randomly(accumulators: List[QCAccumulator], seed: int) -> QCAccumulator:
+    """随机分成若干文件，文件再随机分给工作进程（pickle 传回），最后按随机顺序合并"""
+    rng = random.Random(seed)
+    files = []
+    index = 0
+    while index < len(accumulators):
+        size = rng.randint(1, 4)
+        file_qc = QCAccumulator()
+        for qc in accumulators[index:index + size]:
+            file_qc.merge(qc)
+        files.append(pickle.loads(pickle.dumps(file_qc)))
+        index += size
+
+    rng.shuffle(files)
+    workers = [QCAccumulator() for _ in range(rng.randint(1, 4))]
+    for file_qc in files:
+        rng.choice(workers).merge(file_qc)
+
+    merged = QCAccumulator()
+    for worker_qc in workers:
+        merged.merge(pickle.loads(pickle.dumps(worker_qc)))
+    return merged
+
+
+def comparable(report: Dict) -> Dict:
+    """只比较统计值（计数统一为 int，分布按项目排序）"""
+    report = {key: dict(report[key]) for key in ('raw_data', 'processed_data')}
+    for section in report.values():
+        section['missing_values'] = {col: int(n) for col, n in section['missing_values'].items()}
+    for key in ('test_distribution', 'value_flags'):
+        report['processed_data'][key] = sorted(report['processed_data'][key].items())
+    report['raw_data']['duplicate_rows'] = int(report['raw_data']['duplicate_rows'])
+    return report
+
+
+def main():
+    num_rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+
+    print("=" * 60)
+    print("可合并质量统计校验")
+    print("=" * 60)
+    raw = build_raw_with_duplicates(num_rows)
+    print(f"\n原始数据: {len(raw):,} 行（块大小 {CHUNK_ROWS:,}，哈希去重阈值 "
+          f"{StreamingConfig.QC_HASH_COMPACT_ROWS:,} 行）")
+
+    processor = ChunkProcessor(SAMPLE_PROFILE, 'verify', persist_cache=False)
+    accumulators, chunks, process_seconds, qc_seconds = accumulate(raw, processor)
+    print(f"\n【耗时】")
+    print(f"  逐块处理: {process_seconds:.2f}s")
+    print(f"  逐块统计: {qc_seconds:.2f}s（处理耗时的 {qc_seconds / process_seconds:.0%}）")
+
+    processed = pd.concat(chunks, ignore_index=True)
+    start = time.perf_counter()
+    expected = comparable(reference_report(raw, processed))
+    print(f"  整表计算: {time.perf_counter() - start:.2f}s（需要保留全部原始数据）")
+
+    print(f"\n【{GROUPINGS} 种随机分组与合并顺序】")
+    ok = True
+    for seed in range(GROUPINGS):
+        merged = merge_randomly(accumulators, seed)
+        actual = comparable(QCReporter().analyze_accumulated(merged, SAMPLE_PROFILE['id']))
+        same = actual == expected
+        ok &= same
+        print(f"  分组 {seed}: {'✓ 一致' if same else '❌ 不一致'}"
+              f"（重复行 {actual['raw_data']['duplicate_rows']:,}）")
+
+    if ok:
+        print(f"\n✓ 所有分组的统计与整表计算完全一致（重复行 {expected['raw_data']['duplicate_rows']:,}）")
+        return 0
+    print("\n❌ 逐块统计与整表计算不一致")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
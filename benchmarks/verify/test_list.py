@@ -0,0 +1,144 @@
+"""
+校验脚本：对比第 3 步项目列表逐行创建 QTableWidgetItem、逐行隐藏与 CheckableTableWidget（表格模型 + 搜索索引）
+的加载、逐字搜索和统计选中项的耗时，并确认两种方式的搜索结果和选中项一致
+
+用法:
+    python -m benchmarks.verify.test_list [项目数]     # 默认 50,000 个项目（随机生成）
+    # 无显示环境时使用 QT_QPA_PLATFORM=offscreen
+"""
+import sys
+import time
+
+import numpy as np
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication, QTableWidget, QTableWidgetItem
+
+from gui.components import CheckableTableWidget
+
+# 逐行创建、隐藏在项目较多时过慢，旧方式最多测这么多项
+ITEM_TABLE_MAX_ROWS = 10_000
+QUERY = 'hb-1'
+
+
+def build_items(count: int) -> list:
+    """生成项目名称和出现次数（中英文混合，名称不重复）"""
+    rng = np.random.default_rng(0)
+    prefixes = ['血红蛋白', '白细胞计数', 'HBsAg', 'ALT', '肌酐', 'HbA1c', '总胆固醇', 'WBC']
+    names = [f'{prefixes[i % len(prefixes)]}-{i}' for i in range(count)]
+    counts = rng.integers(1, 100_000, count)
+    return list(zip(names, counts.tolist()))
+
+
+class ItemTable(QTableWidget):
+    """旧的项目列表：每个单元格一个 QTableWidgetItem，搜索时逐行隐藏，统计时逐行检查"""
+
+    def load_items(self, items: list):
+        self.blockSignals(True)
+        self.clear()
+        self.setRowCount(len(items))
+        self.setColumnCount(3)
+        self.setHorizontalHeaderLabels(["选择", '项目名称', '出现次数'])
+        for i, item in enumerate(items):
+            check_item = QTableWidgetItem()
+            check_item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
+            check_item.setCheckState(Qt.CheckState.Checked)
+            self.setItem(i, 0, check_item)
+            for j, value in enumerate(item):
+                self.setItem(i, j + 1, QTableWidgetItem(str(value)))
+        self.resizeColumnsToContents()
+        self.blockSignals(False)
+
+    def filter(self, text: str) -> list:
+        text = text.lower()
+        for i in range(self.rowCount()):
+            self.setRowHidden(i, text not in self.item(i, 1).text().lower())
+        return [i for i in range(self.rowCount()) if not self.isRowHidden(i)]
+
+    def get_checked_items(self) -> list:
+        return [self.item(i, 1).text() for i in range(self.rowCount())
+                if self.item(i, 0).checkState() == Qt.CheckState.Checked]
+
+
+def type_query(search, app: QApplication) -> float:
+    """逐字输入 QUERY（每个字符筛选一次），返回每个字符的平均耗时"""
+    start = time.perf_counter()
+    for end in range(1, len(QUERY) + 1):
+        search(QUERY[:end])
+        app.processEvents()
+    return (time.perf_counter() - start) / len(QUERY)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    print("=" * 60)
+    print("项目列表对比")
+    print("=" * 60)
+    items = build_items(count)
+    item_rows = min(count, ITEM_TABLE_MAX_ROWS)
+    print(f"\n项目数: {count:,}（逐行方式测前 {item_rows:,} 项），逐字输入「{QUERY}」")
+
+    view = CheckableTableWidget()
+    view.resize(800, 600)
+    view.show()
+    start = time.perf_counter()
+    view.load_items(items, ['项目名称', '出现次数'])
+    app.processEvents()
+    model_load = time.perf_counter() - start
+    model_type = type_query(view.set_filter, app)
+    view.set_filter('')
+    model = view.item_model
+    # 取消勾选所有名称以 0 结尾的项目（通过模型的 setData，与点击复选框相同）
+    for row in range(model.rowCount()):
+        if model.cell_text(row, 1).endswith('0'):
+            model.setData(model.index(row, 0), Qt.CheckState.Unchecked.value, Qt.ItemDataRole.CheckStateRole)
+    start = time.perf_counter()
+    model_checked = view.get_checked_items()
+    model_count = (time.perf_counter() - start, view.checked_count())
+
+    old = ItemTable()
+    old.resize(800, 600)
+    old.show()
+    start = time.perf_counter()
+    old.load_items(items[:item_rows])
+    app.processEvents()
+    item_load = time.perf_counter() - start
+    item_type = type_query(old.filter, app)
+    old.filter('')
+    for i in range(old.rowCount()):
+        if old.item(i, 1).text().endswith('0'):
+            old.item(i, 0).setCheckState(Qt.CheckState.Unchecked)
+    start = time.perf_counter()
+    item_checked = old.get_checked_items()
+    item_count = time.perf_counter() - start
+
+    print("\n【加载】")
+    print(f"  QTableWidgetItem ({item_rows:,} 项): {item_load:.2f}s")
+    print(f"  表格模型         ({count:,} 项): {model_load:.3f}s")
+    print("\n【搜索（每输入一个字符）】")
+    print(f"  逐行隐藏 ({item_rows:,} 项): {item_type * 1000:.1f}ms")
+    print(f"  搜索索引 ({count:,} 项): {model_type * 1000:.1f}ms")
+    print("\n【读取选中项】")
+    print(f"  逐行检查 ({item_rows:,} 项): {item_count * 1000:.1f}ms")
+    print(f"  选中集合 ({count:,} 项): {model_count[0] * 1000:.1f}ms（已选 {model_count[1]:,} 项）")
+
+    # 在相同的项目（前 item_rows 项，表格模型中保持原顺序）上比较选中项和搜索结果
+    listed = {name for name, _ in items[:item_rows]}
+    same = [name for name in model_checked if name in listed] == item_checked
+    same = same and model_count[1] == len(model_checked)
+    for query in ('hb', 'HBSAG', '血红', '-12', 'x'):
+        model.set_filter(query)
+        found = [model.cell_text(row, 1) for row in range(model.rowCount())]
+        same = same and [name for name in found if name in listed] == \
+            [old.item(i, 1).text() for i in old.filter(query)]
+
+    if same:
+        print("\n✓ 表格模型的搜索结果和选中项与逐行方式一致")
+        return 0
+    print("\n❌ 搜索结果或选中项不一致")
+    return 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
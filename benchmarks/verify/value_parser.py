@@ -0,0 +1,131 @@
+"""
+校验脚本：对比 ValueParser 向量化解析与逐行解析的结果
+用于确认向量化引擎在各种脏数据上与 parse_value 的输出完全一致
+"""
+import sys
+import time
+import random
+
+import numpy as np
+import pandas as pd
+
+from core.value_parser import ValueParser
+
+
+# 覆盖所有规则分支及其边界情况的固定样本
+EDGE_CASES = [
+    None, float('nan'), '', '   ', 12, 12.5, 0, -3, 1e12, True,
+    '12.3', ' 12.3 ', '1,234.5', '-0.5', '+7', '.5', '5.', '1_000', '١٢',
+    'inf', '-Infinity', 'nan', '1e999', '1e5', '2E-3', '1.5e-3 mmol',
+    '<0.5', '< 0.5', '≤5', '<', '<abc', '<1:nan', '>1000', '≥10', '>1e999', '>',
+    '10^3', '2 ^ 10', '10^400', '10^', '^3', '10^31', '10^22', '10^23', '3^40', '1.1^300', '7.5^100', '2^1024',
+    '1:128', '1:', 'a:b', '1:2:3', '1: 64',
+    '1.5-2.0', '1 - 2', '-1-2', '1-2-3', '1.5--2',
+    '阳性', '阳性(+)', '弱阳性', '+', '++', '+++', '阴性', '阴性 ', '-', '--', '/', '#',
+    'NA', 'na', 'N/A', 'n/a', '溶血', '标本溶血', '样本不足', '标本凝集', '未检出',
+    '12.3↑', '↓4.5', '约5', '~5', '±0.2', '5±1', 'abc', '见报告', '12abc34',
+    '1,2', '5 ,', ',', '1e5e5', '--5', '.', '+-3',
+    # str.strip() 和 \s 会去掉 \x1c-\x1f，float() 不接受
+    '1\x1c', '1\x1c,', '\x1f2.5', '3\x1d\x1e', '5\x0b', '6\x0c\n', '\x1c<0.5', '1:\x1c64',
+]
+
+
+def build_samples(num_rows: int = 200_000, seed: int = 42) -> pd.Series:
+    """生成混合格式的检验结果列（固定随机种子）"""
+    rng = random.Random(seed)
+    generators = [
+        lambda: f"{rng.uniform(0, 500):.2f}",
+        lambda: f"<{rng.uniform(0, 5):.2f}",
+        lambda: f">{rng.uniform(100, 5000):.1f}",
+        lambda: f"{rng.uniform(1, 9):.1f}e{rng.randint(-5, 5)}",
+        lambda: f"10^{rng.randint(0, 6)}",
+        lambda: f"{rng.choice(['10', '2', '3', '1.5', '7.25'])}^{rng.randint(0, 320)}",
+        lambda: f"1:{2 ** rng.randint(1, 10)}",
+        lambda: f"{rng.uniform(0, 5):.1f}-{rng.uniform(5, 10):.1f}",
+        lambda: rng.choice(EDGE_CASES),
+    ]
+    weights = [60, 8, 6, 3, 2, 2, 3, 3, 15]
+    return pd.Series([rng.choices(generators, weights)[0]() for _ in range(num_rows)])
+
+
+def parse_memoized(parser: ValueParser, series: pd.Series):
+    """向量化解析 + 唯一值缓存（与 ValueParser.apply 默认路径一致）"""
+    result = parser.apply(pd.DataFrame({'test_value': series}))
+    return result['value_numeric'], result['value_flag']
+
+
+def compare_engines(series: pd.Series, candidate) -> pd.DataFrame:
+    """
+    分别使用逐行解析和候选引擎解析同一列，返回结果不一致的行
+    """
+    scalar_values, scalar_flags = ValueParser()._parse_series_scalar(series)
+    vector_values, vector_flags = candidate(ValueParser(), series)
+
+    scalar_numeric = pd.to_numeric(scalar_values, errors='coerce').to_numpy(dtype=float)
+    vector_numeric = vector_values.to_numpy(dtype=float)
+
+    same_value = (scalar_numeric == vector_numeric) | (np.isnan(scalar_numeric) & np.isnan(vector_numeric))
+    same_flag = scalar_flags.to_numpy(dtype=object) == vector_flags.to_numpy(dtype=object)
+
+    mismatch = ~(same_value & same_flag)
+    return pd.DataFrame({
+        'raw_value': series[mismatch],
+        'scalar_numeric': scalar_values[mismatch],
+        'scalar_flag': scalar_flags[mismatch],
+        'vector_numeric': vector_values[mismatch],
+        'vector_flag': vector_flags[mismatch],
+    })
+
+
+def timed(func, *args):
+    """执行函数并返回 (结果, 耗时秒数)"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    print("=" * 60)
+    print("ValueParser 向量化解析一致性校验")
+    print("=" * 60)
+
+    if len(sys.argv) >= 3:
+        file_path, column = sys.argv[1], sys.argv[2]
+        print(f"\n读取文件: {file_path} (列: {column})")
+        series = pd.read_excel(file_path, usecols=[column])[column]
+    else:
+        print("\n使用内置样本（边界样本 + 随机生成数据）")
+        series = pd.concat([pd.Series(EDGE_CASES), build_samples()], ignore_index=True)
+
+    print(f"  行数: {len(series):,}")
+
+    engines = {
+        '向量化解析': lambda parser, data: parser.parse_series(data),
+        '向量化解析 + 唯一值缓存': parse_memoized,
+    }
+
+    _, scalar_time = timed(ValueParser()._parse_series_scalar, series)
+    print(f"\n【耗时】")
+    print(f"  逐行解析: {scalar_time:.3f}s")
+
+    all_mismatches = {}
+    for name, engine in engines.items():
+        _, engine_time = timed(engine, ValueParser(), series)
+        speedup = scalar_time / engine_time if engine_time > 0 else float('inf')
+        print(f"  {name}: {engine_time:.3f}s ({speedup:.1f}x)")
+        all_mismatches[name] = compare_engines(series, engine)
+
+    failed = False
+    for name, mismatches in all_mismatches.items():
+        if mismatches.empty:
+            print(f"\n✓ {name}: 与逐行解析结果完全一致")
+            continue
+        failed = True
+        print(f"\n❌ {name}: 发现 {len(mismatches)} 行结果不一致（前 20 行）:")
+        print(mismatches.head(20).to_string())
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -5,10 +5,13 @@ from .utils import (
     normalize_column_name,
     parse_datetime,
     extract_numeric,
+    extract_numeric_vectorized,
+    safe_float_vectorized,
     detect_special_value_patterns,
     detect_value_formats,
     generate_run_id,
     safe_float,
+    safe_load_yaml,
     validate_required_fields
 )
 from .logger import (
@@ -25,36 +28,98 @@ from .constants import (
     ValidatorConfig,
     ParserConfig,
     UIConfig,
-    ExportConfig
+    ExportConfig,
+    CacheConfig,
+    FileCacheConfig,
+    ManifestConfig,
+    StreamingConfig,
+    ParallelConfig,
+    ScanConfig,
+    MetricsConfig,
+    CompiledProfileConfig,
+    ProfileIndexConfig,
+    ExitCode
 )
 from .data_loader import DataLoader
+from .date_parser import DateParser
+from .file_cache import FileCache
+from .manifest import RunManifest, IncrementalOutput
+from .metrics import StageTimer
+from .readers import ReaderStats, SheetSelector, iter_frames, read_frame
+from .scanner import DataScanner, ScanReport
+from .search_index import SearchIndex
 from .column_mapper import ColumnMapper
 from .test_mapper import TestMapper
 from .value_parser import ValueParser
-from .qc_reporter import QCReporter
-from .extractor_engine import ExtractorEngine, ExtractorThread
+from .compiled_profile import CompiledProfile
+from .qc_reporter import QCReporter, QCAccumulator
+from .output_writer import (
+    OutputWriter, ExcelStreamWriter, ParquetStreamWriter, FeatherStreamWriter,
+    CSVStreamWriter, create_output_writer
+)
+from .chunk_processor import ChunkProcessor
+from .pipeline import ExtractionPipeline, PipelineError
+from .signals import Signal
 from .profile_manager import ProfileManager
+from .profile_detector import ProfileDetector
+
+
+def __getattr__(name):
+    """依赖 PyQt 的类按需导入，使命令行等无界面环境不必加载 Qt"""
+    if name in ('ExtractorEngine', 'ExtractorThread'):
+        from . import extractor_engine
+        return getattr(extractor_engine, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 __all__ = [
     # Classes
     'DataLoader',
+    'DateParser',
+    'FileCache',
+    'RunManifest',
+    'IncrementalOutput',
+    'StageTimer',
+    'ReaderStats',
+    'SheetSelector',
+    'iter_frames',
+    'read_frame',
+    'DataScanner',
+    'ScanReport',
+    'SearchIndex',
     'ColumnMapper',
     'TestMapper',
     'ValueParser',
+    'CompiledProfile',
     'QCReporter',
+    'QCAccumulator',
+    'OutputWriter',
+    'ExcelStreamWriter',
+    'ParquetStreamWriter',
+    'FeatherStreamWriter',
+    'CSVStreamWriter',
+    'create_output_writer',
+    'ChunkProcessor',
     'ExtractorEngine',
     'ExtractorThread',
+    'ExtractionPipeline',
+    'PipelineError',
+    'Signal',
     'ProfileManager',
+    'ProfileDetector',
     # Utils functions
     'detect_header_row',
     'load_excel_auto_header',
     'normalize_column_name',
     'parse_datetime',
     'extract_numeric',
+    'extract_numeric_vectorized',
+    'safe_float_vectorized',
     'detect_special_value_patterns',
     'detect_value_formats',
     'generate_run_id',
     'safe_float',
+    'safe_load_yaml',
     'validate_required_fields',
     # Logger
     'get_logger',
@@ -69,6 +134,16 @@ __all__ = [
     'ValidatorConfig',
     'ParserConfig',
     'UIConfig',
-    'ExportConfig'
+    'ExportConfig',
+    'CacheConfig',
+    'FileCacheConfig',
+    'ManifestConfig',
+    'StreamingConfig',
+    'ParallelConfig',
+    'ScanConfig',
+    'MetricsConfig',
+    'CompiledProfileConfig',
+    'ProfileIndexConfig',
+    'ExitCode'
 ]
 
@@ -0,0 +1,259 @@
+"""
+数据块处理模块
+对单个数据块执行 字段映射 → 项目标准化 → 过滤 → 数值解析 → 日期解析，
+并累计跨块的统计信息，使抽取流程可以逐块进行
+"""
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+from .column_mapper import ColumnMapper
+from .compiled_profile import CompiledProfile
+from .constants import ExportConfig, LoaderConfig
+from .date_parser import DateParser
+from .metrics import StageTimer
+from .readers import RowFilter
+from .test_mapper import TestMapper
+from .value_parser import ValueParser
+
+
+class ChunkProcessor:
+    """
+    数据块处理器
+
+    处理组件只创建一次，所有块共享（包括唯一值缓存）；
+    日期解析结果、数据中出现的检验项目等统计量在各块之间累计，
+    各处理步骤的耗时记录在 metrics（StageTimer）中。
+    ExportConfig.CATEGORICAL_COLUMNS 中的列以 pandas categorical 贯穿整个处理过程，
+    每个块只保存一份不同的值和整数编码。
+    各处理步骤在启用 copy-on-write 的同一个数据框上原地添加列，不做防御性复制：
+    映射后的列与原始块共享数据，只有按检验项目过滤时复制保留的行。
+    """
+
+    # labs_long 输出列（按此顺序）和处理过程中生成的列
+    OUTPUT_COLUMNS = CompiledProfile.OUTPUT_COLUMNS
+    DERIVED_COLUMNS = CompiledProfile.DERIVED_COLUMNS
+
+    def __init__(self, profile: Dict, run_id: str, persist_cache: bool = True,
+                 categorical: bool = True, compiled: Optional[CompiledProfile] = None):
+        """
+        Args:
+            profile: profile 配置
+            run_id: 运行 ID（写入输出的 run_id 列）
+            persist_cache: 唯一值缓存是否持久化
+            categorical: 重复值多的列是否使用 categorical（False 时为普通 object 列）
+            compiled: profile 的编译结果（须由同一 profile 编译；None 时在此编译）
+        """
+        self.profile = profile
+        self.run_id = run_id
+        self.categorical = categorical
+        self.compiled = compiled = compiled or CompiledProfile(profile)
+
+        self.column_mapper = ColumnMapper(compiled.column_mapping)
+        self.test_mapper = TestMapper(compiled.test_mapping, persist_cache=persist_cache,
+                                      categorical=categorical, compiled=compiled)
+        self.selected_tests = set(compiled.selected_tests)
+        self.value_parser = ValueParser(compiled.value_parsing, persist_cache=persist_cache,
+                                        categorical=categorical, compiled=compiled.value_rules)
+        self.date_parser = DateParser()
+
+        self.mapped_fields = compiled.mapped_fields
+        self.output_columns = compiled.output_columns
+
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清空跨块累计的统计"""
+        self.tests_in_data = set()
+        self.rows_kept = 0
+        self.dates_original = 0
+        self.dates_parsed = 0
+        self.date_samples = []
+        self.date_parser.reset_stats()
+        self.metrics = StageTimer()
+        self._file_start = None
+
+    def begin_file(self):
+        """
+        开始处理一个文件：记下此前的累计统计。
+        文件读取失败时 end_file(False) 回退到这里（失败的文件不写入输出，也不计入统计；
+        metrics 中的耗时仍然保留）
+        """
+        self._file_start = {
+            'tests_in_data': set(self.tests_in_data),
+            'rows_kept': self.rows_kept,
+            'dates_original': self.dates_original,
+            'dates_parsed': self.dates_parsed,
+            'date_samples': list(self.date_samples),
+            'date_parser': self.date_parser.snapshot_stats(),
+        }
+
+    def end_file(self, ok: bool):
+        """文件处理结束：读取失败时丢弃该文件累计的统计"""
+        start, self._file_start = self._file_start, None
+        if ok or start is None:
+            return
+        self.tests_in_data = start['tests_in_data']
+        self.rows_kept = start['rows_kept']
+        self.dates_original = start['dates_original']
+        self.dates_parsed = start['dates_parsed']
+        self.date_samples = start['date_samples']
+        self.date_parser.restore_stats(start['date_parser'])
+
+    def export_stats(self) -> Dict:
+        """导出累计统计（并行抽取时由子进程传回主进程）"""
+        return {
+            'tests_in_data': self.tests_in_data,
+            'rows_kept': self.rows_kept,
+            'dates_original': self.dates_original,
+            'dates_parsed': self.dates_parsed,
+            'date_samples': self.date_samples,
+            'date_parser': self.date_parser,
+            'metrics': self.metrics,
+        }
+
+    def merge_stats(self, stats: Dict):
+        """合并其他处理器导出的统计（按文件顺序合并，日期样本保持原顺序）"""
+        self.tests_in_data |= stats['tests_in_data']
+        self.rows_kept += stats['rows_kept']
+        self.dates_original += stats['dates_original']
+        self.dates_parsed += stats['dates_parsed']
+        self.date_samples = (self.date_samples + stats['date_samples'])[:10]
+        self.date_parser.merge(stats['date_parser'])
+        self.metrics.merge(stats['metrics'])
+
+    @property
+    def caches(self) -> Dict:
+        """各处理组件的唯一值缓存 {namespace: cache}"""
+        caches = [self.test_mapper.cache, self.value_parser.cache]
+        return {cache.namespace: cache for cache in caches}
+
+    def read_plan(self) -> Dict:
+        """
+        读取下推：读取文件时只需要的原始列，以及丢弃未选择项目的行筛选器
+
+        Returns:
+            {'columns': 原始列名列表（未配置字段映射时为 None）,
+             'row_filter': RowFilter（未映射 test_name 时为 None）}
+            每个文件使用新的 RowFilter，读完后交给 record_skipped() 累计统计
+        """
+        columns = self.compiled.read_columns
+        row_filter = None
+        if columns is not None and self.compiled.test_column is not None:
+            row_filter = RowFilter(self.compiled.test_column, self._is_selected_test,
+                                   key=self.test_mapper.cache.rule_hash)
+        return {'columns': list(columns) if columns is not None else None, 'row_filter': row_filter}
+
+    def _is_selected_test(self, raw_name) -> bool:
+        return self.test_mapper.standardize_test_name(raw_name) in self.selected_tests
+
+    def record_skipped(self, row_filter: Optional[RowFilter]) -> int:
+        """
+        累计读取时被跳过的行中出现的检验项目（使 new_tests() 与不下推时一致）
+
+        Returns:
+            跳过的行数
+        """
+        if row_filter is None:
+            return 0
+        self.tests_in_data.update(row_filter.skipped_values)
+        return row_filter.rows_skipped
+
+    @property
+    def has_datetime(self) -> bool:
+        return 'sample_datetime' in self.mapped_fields
+
+    def process(self, df_raw: pd.DataFrame, sheet_name: Optional[str] = None) -> pd.DataFrame:
+        """
+        处理一个数据块
+
+        Args:
+            df_raw: 原始数据块
+            sheet_name: 数据块的来源工作表（profile 配置了 signature.sheets 时写入来源工作表列）
+
+        Returns:
+            该块对应的 labs_long 行（df_raw 不会被修改）
+        """
+        with pd.option_context('mode.copy_on_write', True):
+            return self._process(df_raw, sheet_name)
+
+    def _process(self, df_raw: pd.DataFrame, sheet_name: Optional[str]) -> pd.DataFrame:
+        metrics = self.metrics
+
+        # 字段映射（缺少的字段补为空列，保证各块列一致）
+        with metrics.stage('column_map', len(df_raw)):
+            df = self.column_mapper.apply(df_raw, copy=False).reindex(columns=self.mapped_fields)
+            if self.categorical:
+                self._encode_categoricals(df)
+
+        # 检验项目标准化与过滤
+        with metrics.stage('test_map', len(df)) as stage:
+            if 'test_name' in df.columns:
+                self.tests_in_data.update(df['test_name'].dropna().unique())
+            df = self.test_mapper.apply(df, copy=False)
+            df = self.test_mapper.filter_selected_tests(df, self.selected_tests, copy=False)
+            self.rows_kept += len(df)
+            stage.rows_out = len(df)
+
+        # 数值解析
+        with metrics.stage('value_parse', len(df)):
+            df = self.value_parser.apply(df, copy=False)
+
+        # 日期解析
+        if 'sample_datetime' in df.columns:
+            with metrics.stage('datetime', len(df)):
+                self._parse_dates(df)
+
+        labs_long = df[self.compiled.data_columns]
+        if self.compiled.sheets is not None:
+            labs_long[LoaderConfig.SHEET_COLUMN] = self._constant_column(sheet_name, len(labs_long))
+        labs_long['profile_id'] = self._constant_column(self.profile['id'], len(labs_long))
+        labs_long['run_id'] = self._constant_column(self.run_id, len(labs_long))
+        return labs_long
+
+    def _encode_categoricals(self, df: pd.DataFrame):
+        """
+        将映射后的重复值列转为 categorical（原地修改）
+
+        混合类型的 object 列（如同一列中既有 1 又有 '1'）保持不变：
+        categorical 会把 1、1.0、True 合并为同一个值，改变输出内容
+        """
+        for column in ExportConfig.CATEGORICAL_COLUMNS:
+            if column not in df.columns or isinstance(df[column].dtype, pd.CategoricalDtype):
+                continue
+            series = df[column]
+            if series.dtype == object and infer_dtype(series, skipna=True) not in ('string', 'empty'):
+                continue
+            df[column] = series.astype('category')
+
+    def _constant_column(self, value, rows: int):
+        """整列相同的值（categorical 时只保存一份）"""
+        if not self.categorical:
+            return value
+        return pd.Categorical.from_codes(np.zeros(rows, dtype=np.int8), [value])
+
+    def _parse_dates(self, df: pd.DataFrame):
+        """解析日期列（原地修改），并累计诊断信息"""
+        original_non_null = df['sample_datetime'].notna().sum()
+        self.dates_original += original_non_null
+
+        # 只保存前10个原始值样本用于诊断（而非整列复制）
+        if original_non_null > 0 and len(self.date_samples) < 10:
+            needed = 10 - len(self.date_samples)
+            self.date_samples.extend(df['sample_datetime'].dropna().head(needed).tolist())
+
+        # 按学习到的格式顺序解析不同的值，再广播回整列（无法解析的设为 NaT）
+        df['sample_datetime'] = self.date_parser.parse(df['sample_datetime'])
+
+        self.dates_parsed += df['sample_datetime'].notna().sum()
+
+    def new_tests(self) -> set:
+        """数据中出现但未在 profile 中选择的检验项目"""
+        return self.tests_in_data - self.selected_tests
+
+    def save_caches(self):
+        """持久化唯一值缓存"""
+        self.test_mapper.save_cache()
+        self.value_parser.save_cache()
@@ -0,0 +1,302 @@
+"""
+命令行入口（无需 PyQt 和图形界面）
+
+用法:
+    python -m core.cli --profile profiles/lis_profiles/xxx.yaml --input 数据目录 --output 输出目录
+    python -m core.cli --profile xxx --input data --output outputs --workers 8 --json
+    python -m core.cli --profile xxx --input data --output outputs --format parquet
+    python -m core.cli --profile xxx --input data --output outputs --incremental
+    python -m core.cli --profile xxx --input data --output outputs --profiler cprofile
+    python -m core.cli --profile auto --input 混合目录 --output outputs   # 按表头为每个文件自动选择 profile
+    python -m core.cli cache info          # 查看文件读取缓存
+    python -m core.cli cache purge         # 清空文件读取缓存（--older-than 天数 只清除旧条目）
+
+退出码见 core.constants.ExitCode；--json 时在标准输出打印结果摘要，日志输出到标准错误
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .constants import ExitCode, ExportConfig, MetricsConfig, StreamingConfig
+from .data_loader import DataLoader
+from .file_cache import FileCache
+from .pipeline import ExtractionPipeline
+from .profile_detector import ProfileDetector
+from .profile_manager import ProfileManager
+from .readers import BACKENDS
+
+DEFAULT_PROFILES_DIR = 'profiles/lis_profiles'
+AUTO_PROFILE = 'auto'  # --profile auto：按每个文件的表头自动选择 profile
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """构建命令行参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog='lis-extract',
+        description='LIS 检验数据批量抽取（使用向导保存的 profile）'
+    )
+    parser.add_argument('--profile', required=True,
+                        help=f'profile 文件路径，或 profiles 目录中的 profile ID；'
+                             f'{AUTO_PROFILE} 表示按每个文件的表头在 profiles 目录中自动选择')
+    parser.add_argument('--input', required=True, help='输入 Excel 文件或文件夹')
+    parser.add_argument('--output', required=True, help='输出目录')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='并行处理的进程数（默认读取 profile 的 output_options.workers，否则为 1）')
+    parser.add_argument('--format', choices=ExportConfig.OUTPUT_FORMATS, default=None,
+                        help='输出格式（默认读取 profile 的 output_options.format，否则为 excel）')
+    parser.add_argument('--reader', choices=list(BACKENDS), default=None,
+                        help='优先使用的 Excel 读取引擎（默认按文件类型自动选择，不可用时自动回退）')
+    parser.add_argument('--incremental', action='store_true', default=None,
+                        help='增量抽取：只处理新增或修改的文件，每个源文件输出一个分区'
+                             '（默认读取 profile 的 output_options.incremental）')
+    parser.add_argument('--no-pushdown', action='store_true',
+                        help='读取全部列和行（默认只读取映射的列，并在读取时跳过未选择项目的行；'
+                             '也可在 profile 的 output_options.pushdown 中关闭）')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='不使用文件读取缓存（也可设置环境变量 LIS_FILE_CACHE=0）')
+    parser.add_argument('--chunk-rows', type=int, default=StreamingConfig.CHUNK_ROWS,
+                        help=f'每个数据块的最大行数（默认 {StreamingConfig.CHUNK_ROWS}，0 表示每个文件一块）')
+    parser.add_argument('--profiler', choices=MetricsConfig.PROFILERS, default=None,
+                        help='对本次运行做性能剖析，结果保存在输出目录（run_profile_<run_id>.*）')
+    parser.add_argument('--profiles-dir', default=DEFAULT_PROFILES_DIR,
+                        help=f'按 ID 查找 profile 的目录（默认 {DEFAULT_PROFILES_DIR}）')
+    parser.add_argument('--json', action='store_true', help='在标准输出打印 JSON 结果摘要')
+    parser.add_argument('--quiet', action='store_true', help='不输出处理日志')
+    return parser
+
+
+def build_cache_parser() -> argparse.ArgumentParser:
+    """构建 cache 子命令的参数解析器"""
+    parser = argparse.ArgumentParser(
+        prog='lis-extract cache',
+        description='查看或清除文件读取缓存（缓存目录可用环境变量 LIS_CACHE_DIR 指定）'
+    )
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    info = commands.add_parser('info', help='显示缓存目录、条目数和大小')
+    info.add_argument('--json', action='store_true', help='以 JSON 格式输出')
+
+    purge = commands.add_parser('purge', help='清除缓存')
+    purge.add_argument('--older-than', type=float, default=None, metavar='DAYS',
+                       help='只清除超过指定天数未使用的条目')
+    purge.add_argument('--json', action='store_true', help='以 JSON 格式输出')
+    return parser
+
+
+def cache_main(argv: List[str]) -> int:
+    """cache 子命令，返回退出码"""
+    parser = build_cache_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else ExitCode.USAGE_ERROR
+
+    try:
+        cache = FileCache()
+    except OSError as e:
+        print(f"✗ 无法打开缓存目录: {e}", file=sys.stderr)
+        return ExitCode.FAILURE
+
+    if args.command == 'info':
+        info = cache.info()
+        if args.json:
+            print(json.dumps(info, ensure_ascii=False))
+        else:
+            print(f"缓存目录: {info['path']}")
+            print(f"条目: {info['entries']}，"
+                  f"大小: {_format_bytes(info['bytes'])} / {_format_bytes(info['max_bytes'])}")
+            for kind, stats in sorted(info['kinds'].items()):
+                print(f"  {kind}: {stats['entries']} 个条目, {_format_bytes(stats['bytes'])}")
+        return ExitCode.SUCCESS
+
+    removed, freed = cache.purge(args.older_than)
+    if args.json:
+        print(json.dumps({'removed': removed, 'bytes': freed}))
+    else:
+        print(f"已清除 {removed} 个条目，释放 {_format_bytes(freed)}")
+    return ExitCode.SUCCESS
+
+
+def _format_bytes(size: int) -> str:
+    return f"{size / (1024 * 1024):.1f} MB"
+
+
+def resolve_profile(profile: str, profiles_dir: str) -> Optional[str]:
+    """profile 参数可以是文件路径，也可以是 profiles 目录中的 ID"""
+    if os.path.isfile(profile):
+        return profile
+
+    candidate = Path(profiles_dir) / f"{profile}.yaml"
+    if candidate.is_file():
+        return str(candidate)
+
+    return None
+
+
+def build_summary(pipeline: ExtractionPipeline, result: Optional[Dict],
+                  errors: List[str], elapsed: float) -> Dict:
+    """生成机器可读的结果摘要"""
+    summary = {
+        'success': result is not None,
+        'exit_code': pipeline.exit_code,
+        'profile_id': (pipeline.profile or {}).get('id'),
+        'run_id': pipeline.run_id,
+        'elapsed_seconds': round(elapsed, 3),
+        'errors': errors,
+    }
+
+    if result is not None:
+        report = result.get('report', {})
+        summary.update({
+            'output_dir': result['output_dir'],
+            'labs_long_file': result['labs_long_file'],
+            'labs_long_files': result['labs_long_files'],
+            'qc_report_file': result['qc_report_file'],
+            'total_rows': result['total_rows'],
+            'total_tests': result['total_tests'],
+            'raw_rows': report.get('raw_data', {}).get('total_rows'),
+            'reader_stats': result.get('reader_stats', {}),
+            'incremental': result.get('incremental'),
+            'quality_metrics': report.get('quality_metrics', {}),
+            'metrics': result.get('metrics'),
+            'metrics_file': result.get('metrics_file'),
+            'profile_file': result.get('profile_file'),
+        })
+
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """命令行主函数，返回退出码"""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == 'cache':
+        return cache_main(argv[1:])
+
+    parser = build_parser()
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        # --help 返回 0，参数错误返回 2
+        return e.code if isinstance(e.code, int) else ExitCode.USAGE_ERROR
+
+    if args.workers is not None and args.workers < 1:
+        parser.print_usage(sys.stderr)
+        print("lis-extract: error: --workers 必须大于 0", file=sys.stderr)
+        return ExitCode.USAGE_ERROR
+
+    def emit_json(summary: Dict):
+        if args.json:
+            print(json.dumps(summary, ensure_ascii=False, default=str))
+
+    profile_path = resolve_profile(args.profile, args.profiles_dir)
+    if profile_path is None and args.profile == AUTO_PROFILE:
+        return auto_main(args, emit_json)
+    if profile_path is None:
+        message = f"找不到 profile: {args.profile}"
+        print(f"✗ {message}", file=sys.stderr)
+        emit_json({'success': False, 'exit_code': ExitCode.PROFILE_ERROR, 'errors': [message]})
+        return ExitCode.PROFILE_ERROR
+
+    manager = ProfileManager(args.profiles_dir) if os.path.isdir(args.profiles_dir) else None
+    pipeline = build_pipeline(args, profile_path, manager)
+    summary = run_pipeline(args, pipeline, args.input)
+    emit_json(summary)
+    return pipeline.exit_code
+
+
+def build_pipeline(args: argparse.Namespace, profile_path: str,
+                   profile_manager: Optional[ProfileManager] = None) -> ExtractionPipeline:
+    """按命令行参数创建抽取流程（profile_manager 用于加载编译后的 profile）"""
+    return ExtractionPipeline(
+        profile_path, chunk_rows=args.chunk_rows or None, workers=args.workers,
+        output_format=args.format, reader=args.reader,
+        use_cache=False if args.no_cache else None, incremental=args.incremental,
+        pushdown=False if args.no_pushdown else None, profiler=args.profiler,
+        profile_manager=profile_manager
+    )
+
+
+def run_pipeline(args: argparse.Namespace, pipeline: ExtractionPipeline, inputs) -> Dict:
+    """运行抽取（日志输出到标准错误），返回结果摘要"""
+    errors = []
+    pipeline.error.connect(errors.append)
+    pipeline.error.connect(lambda message: print(f"✗ {message}", file=sys.stderr))
+    if not args.quiet:
+        pipeline.log.connect(lambda message: print(message, file=sys.stderr))
+
+    start = time.perf_counter()
+    try:
+        result = pipeline.run(inputs, args.output)
+    except KeyboardInterrupt:
+        pipeline.cancel()
+        result = None
+        pipeline.exit_code = ExitCode.CANCELLED
+
+    return build_summary(pipeline, result, errors, time.perf_counter() - start)
+
+
+def auto_main(args: argparse.Namespace, emit_json: Callable[[Dict], None]) -> int:
+    """
+    --profile auto：只读取每个文件的表头，按 signature.required_columns 选择 profile，
+    每个 profile 对分到它的文件运行一次抽取（输出到同一目录）；没有匹配的文件跳过并给出警告
+    """
+    def log(message: str):
+        if not args.quiet:
+            print(message, file=sys.stderr)
+
+    start = time.perf_counter()
+    manager = ProfileManager(args.profiles_dir)
+    detector = ProfileDetector(manager.list_profiles(), reader=args.reader)
+    if not detector.profiles:
+        message = f"{args.profiles_dir} 中没有可用于自动识别的 profile（需要 signature.required_columns）"
+        print(f"✗ {message}", file=sys.stderr)
+        emit_json({'success': False, 'exit_code': ExitCode.PROFILE_ERROR, 'errors': [message]})
+        return ExitCode.PROFILE_ERROR
+
+    files = DataLoader(reader=args.reader, use_cache=False).find_excel_files(args.input)
+    detect_start = time.perf_counter()
+    groups, unmatched, matches = detector.route(files)
+    detect_seconds = time.perf_counter() - detect_start
+    log(f"🔎 自动识别 {len(files)} 个文件（{len(detector.profiles)} 个 profile），"
+        f"耗时 {detect_seconds * 1000:.0f} ms")
+    for file_path, match in matches.items():
+        name = os.path.basename(file_path)
+        if match is None:
+            log(f"  ⚠️ {name}: 没有匹配的 profile，跳过")
+        else:
+            log(f"  {name} → {match['profile_id']}（匹配 {match['matched']}/{match['required']} 个必需列）")
+
+    summary = {
+        'auto_detect': True,
+        'detect_seconds': round(detect_seconds, 3),
+        'routing': {file_path: match['profile_id'] if match else None for file_path, match in matches.items()},
+        'unmatched_files': unmatched,
+        'runs': [],
+    }
+    if not groups:
+        message = "没有与任何 profile 匹配的文件" if files else "未找到任何 Excel 文件"
+        print(f"✗ {message}", file=sys.stderr)
+        emit_json({'success': False, 'exit_code': ExitCode.NO_INPUT, 'errors': [message], **summary})
+        return ExitCode.NO_INPUT
+
+    exit_code = ExitCode.SUCCESS
+    for profile_id, profile_files in groups.items():
+        log(f"\n▶ {profile_id}: {len(profile_files)} 个文件")
+        pipeline = build_pipeline(args, detector.profile_path(profile_id), manager)
+        summary['runs'].append(run_pipeline(args, pipeline, profile_files))
+        if exit_code == ExitCode.SUCCESS:
+            exit_code = pipeline.exit_code
+        if pipeline.exit_code == ExitCode.CANCELLED:
+            break
+
+    emit_json({'success': exit_code == ExitCode.SUCCESS, 'exit_code': exit_code,
+               'elapsed_seconds': round(time.perf_counter() - start, 3), **summary})
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -45,6 +45,8 @@ class ColumnMapper:
                         self.reverse_mapping[col] = k
                 else:
                     self.reverse_mapping[v] = k
+        # 完整的 {原始列名: 标准字段名}（apply 时只取实际存在的列）
+        self.rename_dict = self._build_rename_dict()
     
     def validate(self) -> tuple:
         """
@@ -71,28 +73,45 @@ class ColumnMapper:
         safe_col_name = re.sub(r'[^\w\u4e00-\u9fff]', '_', str(col_name))
         return f"ijwi_{safe_col_name}"
 
-    def apply(self, df: pd.DataFrame) -> pd.DataFrame:
+    def apply(self, df: pd.DataFrame, copy: bool = True) -> pd.DataFrame:
         """
         应用映射到 DataFrame
         将原始列名重命名为标准字段名
+
+        Args:
+            copy: False 时不复制数据（启用 copy-on-write 时结果与 df 共享列，修改时才复制）
         """
         # 只保留映射的列
         columns_to_keep = [col for col in df.columns if col in self.reverse_mapping]
 
-        df_mapped = df[columns_to_keep].copy()
+        df_mapped = df[columns_to_keep]
+        if copy:
+            df_mapped = df_mapped.copy()
 
         # 重命名
+        rename_dict = {col: name for col, name in self.rename_dict.items() if col in df_mapped.columns}
+        df_mapped = df_mapped.rename(columns=rename_dict)
+
+        return df_mapped
+
+    def _build_rename_dict(self, columns=None) -> Dict[str, str]:
+        """
+        构建 {原始列名: 标准字段名} 重命名字典
+
+        Args:
+            columns: 实际存在的列（None 表示映射中的所有列）
+        """
         rename_dict = {}
 
         for std_field, orig_col in self.mapping.items():
-            if std_field == 'ignore':
+            if std_field == 'ignore' or not orig_col:
                 continue
 
             # 统一处理：将单列转换为列表
             cols = orig_col if isinstance(orig_col, list) else [orig_col]
 
             for i, col in enumerate(cols):
-                if col not in df.columns:
+                if columns is not None and col not in columns:
                     continue
 
                 if std_field == 'I just want it':
@@ -103,9 +122,15 @@ class ColumnMapper:
                 else:
                     rename_dict[col] = std_field
 
-        df_mapped = df_mapped.rename(columns=rename_dict)
+        return rename_dict
 
-        return df_mapped
+    def output_fields(self) -> List[str]:
+        """
+        apply() 可能生成的全部标准字段名
+
+        逐块处理时用于统一各块的列（某个文件缺少的列补为空列）
+        """
+        return list(dict.fromkeys(self.rename_dict.values()))
     
     def get_example_values(self, df: pd.DataFrame, n: int = 3) -> Dict[str, List]:
         """
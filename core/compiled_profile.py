@@ -0,0 +1,263 @@
+"""
+profile 编译模块
+把 profile 的 YAML 字典一次性编译为执行计划（列投影、别名索引、解析规则、输出列），
+各处理步骤直接使用编译结果，不再在逐值、逐块的循环中解释原始配置；
+编译结果缓存在当前用户的缓存目录中（以配置文件内容哈希命名），配置文件未修改时直接加载
+"""
+import hashlib
+import numbers
+import os
+import pickle
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from .column_mapper import ColumnMapper
+from .constants import CompiledProfileConfig, LoaderConfig, ParserConfig
+from .logger import get_logger
+from .readers import SheetSelector
+from .utils import safe_load_yaml
+from .value_cache import get_cache_dir, hash_rules
+
+logger = get_logger(__name__)
+
+
+# Python re 和 RE2 中都需要转义的字符（只转义这些，使同一个正则也能交给 Arrow 的 RE2 执行）
+_REGEX_SPECIAL = set('\\.^$|?*+()[]{}')
+
+
+def _escape_literal(text: str) -> str:
+    return ''.join(f'\\{char}' if char in _REGEX_SPECIAL else char for char in text)
+
+
+class SubstringMatcher:
+    """
+    多个子串规则的一次性匹配（优先级为规则顺序，先配置者优先，与逐个检查 key in value 的结果相同）
+
+    所有键合并为一个交替正则：未命中任何键的值只需一次 search；
+    命中时用零宽前瞻在每个位置取优先级最高的键，再取各位置中优先级最高者，
+    耗时不随规则数量线性增长
+    """
+
+    def __init__(self, rules: Sequence[Tuple[str, Any, str]]):
+        """
+        Args:
+            rules: [(小写键, 替换值, 标记), ...]，按优先级排列
+        """
+        self.rules = tuple(rules)
+        alternatives = [_escape_literal(key) for key, _, _ in self.rules]
+        # 任一键的交替正则（也用于 TextColumn.search 整列筛选）
+        self.pattern: Optional[str] = '|'.join(alternatives) if alternatives else None
+        self._any = re.compile(self.pattern) if alternatives else None
+        self._each = re.compile(
+            '(?=(?:' + '|'.join(f'({alternative})' for alternative in alternatives) + '))'
+        ) if alternatives else None
+
+    def __bool__(self) -> bool:
+        return bool(self.rules)
+
+    def match(self, text: str) -> Optional[Tuple[Any, str]]:
+        """
+        Args:
+            text: 已转为小写的值
+
+        Returns:
+            优先级最高的命中规则的 (替换值, 标记)；未命中时返回 None
+        """
+        if self._any is None or self._any.search(text) is None:
+            return None
+        best = len(self.rules)
+        for match in self._each.finditer(text):
+            best = min(best, match.lastindex)
+            if best == 1:
+                break
+        _, value, flag = self.rules[best - 1]
+        return value, flag
+
+
+class ValueRules:
+    """
+    编译后的数值解析规则
+
+    文本映射的键预先转为小写并保持配置顺序（先命中者优先）；无效值和阳性文本（子串匹配）
+    合并为一个 SubstringMatcher，阴性文本（整值相等）另建哈希表；小于号 / 大于号规则归一为 ParserConfig 中的规则代码
+    """
+
+    # 特殊格式（与规则无关，所有 profile 共用）
+    SCIENTIFIC = re.compile(r'\d+\.?\d*[eE][-+]?\d+')
+    TITER = re.compile(r'\d+:\d+')
+    RANGE = re.compile(r'^\d+\.?\d*\s*-\s*\d+\.?\d*$')
+
+    def __init__(self, rules: Dict):
+        """
+        Args:
+            rules: profile 的 value_parsing 配置（结构见 ValueParser）
+        """
+        self.invalid = self._compile_mapping(rules, 'invalid_values')
+        self.positive = self._compile_mapping(rules, 'positive_text')
+        self.negative = self._compile_mapping(rules, 'negative_text')
+        self.negative_lookup: Dict[str, Any] = {}
+        for key, value in self.negative:
+            self.negative_lookup.setdefault(key, value)
+        self.text_matcher = SubstringMatcher(
+            [(key, value, 'invalid') for key, value in self.invalid]
+            + [(key, value, 'text_positive') for key, value in self.positive]
+        )
+
+        less_than = rules.get('less_than', {}).get('rule', 'half')
+        self.less_than = less_than if less_than in ParserConfig.LESS_THAN_RULES else 'na'
+
+        greater_rules = rules.get('greater_than', {})
+        greater_than = greater_rules.get('rule', 'keep')
+        self.greater_than = greater_than if greater_than in ParserConfig.GREATER_THAN_RULES else 'na'
+        self.has_cap_value = 'cap_value' in greater_rules
+        self.cap_value = greater_rules.get('cap_value')
+
+        self.vectorized = self._supports_vectorized()
+        self.rule_hash = hash_rules(rules)
+
+    @staticmethod
+    def _compile_mapping(rules: Dict, rule_name: str) -> Tuple[Tuple[str, Any], ...]:
+        mapping = rules.get(rule_name, {}).get('mapping', {})
+        return tuple((str(key).lower(), value) for key, value in mapping.items())
+
+    def _supports_vectorized(self) -> bool:
+        """替换值均为数值或 None 时才能使用 float64 列进行向量化解析"""
+        def is_numeric(value):
+            return value is None or (isinstance(value, numbers.Real) and not isinstance(value, bool))
+
+        for mapping in (self.invalid, self.positive, self.negative):
+            if not all(is_numeric(value) for _, value in mapping):
+                return False
+        if self.greater_than == 'cap' and not is_numeric(self.cap_value):
+            return False
+        return True
+
+
+class CompiledProfile:
+    """
+    profile 的执行计划（构建一次，所有数据块、工作进程共享，可序列化）
+
+    包含：要读取的工作表、列投影（原始列 → 标准字段）、小写别名哈希表和标准单位、
+    选择的项目、编译后的数值解析规则、labs_long 输出列
+    """
+
+    # labs_long 输出列（按此顺序）
+    OUTPUT_COLUMNS = [
+        'patient_id', 'visit_id', 'sample_datetime',
+        'test_name', 'test_code', 'test_value', 'value_numeric', 'value_flag',
+        'unit', 'unit_std', 'ref_range', 'result_flag', 'specimen_type'
+    ]
+
+    # 处理过程中生成的列
+    DERIVED_COLUMNS = ['test_code', 'unit_std', 'value_numeric', 'value_flag']
+
+    def __init__(self, profile: Dict):
+        """
+        Raises:
+            KeyError: profile 缺少 id
+            ValueError: signature.sheets 配置格式错误
+        """
+        # value_parser 导入本模块的 ValueRules，在此处导入以避免循环导入
+        from .value_parser import ValueParser
+
+        self.profile = profile
+        self.profile_id = profile['id']
+
+        # 工作表（None 表示只读取第一个工作表，输出中不加来源工作表列）
+        self.sheets: Optional[SheetSelector] = SheetSelector.parse(
+            (profile.get('signature') or {}).get('sheets')
+        )
+
+        # 列投影
+        self.column_mapping = profile.get('column_mapping', {})
+        mapper = ColumnMapper(self.column_mapping)
+        self.reverse_mapping = dict(mapper.reverse_mapping)
+        self.rename = mapper.rename_dict
+        self.mapped_fields = mapper.output_fields()
+        self.read_columns: Optional[List[str]] = list(self.reverse_mapping) or None
+        test_column = self.column_mapping.get('test_name')
+        self.test_column: Optional[str] = test_column if isinstance(test_column, str) and test_column else None
+
+        # 检验项目
+        self.test_mapping = profile.get('test_mapping', {})
+        self.selected_tests = frozenset(self.test_mapping)
+        self.alias_index: Dict[str, str] = {}
+        self.standard_units: Dict[str, Any] = {}
+        for standard_name, config in self.test_mapping.items():
+            for alias in config.get('aliases', []):
+                self.alias_index[alias.strip().lower()] = standard_name
+            self.standard_units[standard_name] = config.get('unit')
+        self.test_rule_hash = hash_rules(self.test_mapping)
+
+        # 数值解析（未配置时使用默认规则）
+        self.value_parsing = profile.get('value_parsing') or ValueParser._default_rules()
+        self.value_rules = ValueRules(self.value_parsing)
+
+        # 输出列（data_columns 取自处理后的数据块，其余为逐块添加的常量列）
+        self.data_columns = self._build_data_columns()
+        sheet_columns = [LoaderConfig.SHEET_COLUMN] if self.sheets is not None else []
+        self.output_columns = self.data_columns + sheet_columns + ['profile_id', 'run_id']
+
+    def _build_data_columns(self) -> List[str]:
+        """确定 labs_long 中来自数据的列（所有块使用同一组列）"""
+        available = set(self.mapped_fields) | set(self.DERIVED_COLUMNS)
+        columns = [col for col in self.OUTPUT_COLUMNS if col in available]
+
+        # 动态添加 I just want it 列
+        ijwi_cols = [col for col in self.mapped_fields if col.startswith('ijwi_')]
+        columns.extend(sorted(ijwi_cols))
+
+        return columns
+
+    @classmethod
+    def load(cls, profile_path: str, use_cache: bool = True) -> 'CompiledProfile':
+        """
+        读取 profile 文件并编译
+
+        编译结果缓存在当前用户的缓存目录（get_cache_dir() / CompiledProfileConfig.SUBDIR）中，
+        文件名由文件内容哈希和 CompiledProfileConfig.FORMAT_VERSION 生成，配置文件修改后自动重新编译。
+        profile 目录可能是共享目录，缓存不放在 profile 旁边：只反序列化本用户写入、且文件名与当前内容对应的缓存；
+        缓存无法读写时直接编译
+
+        Raises:
+            OSError: 无法读取 profile 文件
+            yaml.YAMLError: profile 文件格式错误
+        """
+        with open(profile_path, 'rb') as f:
+            content = f.read()
+
+        cache_path = None
+        if use_cache:
+            try:
+                cache_path = cls.cache_path(content)
+                with open(cache_path, 'rb') as f:
+                    return pickle.load(f)
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.debug(f"编译缓存无法读取，重新编译: {cache_path} ({e})")
+
+        compiled = cls(safe_load_yaml(content.decode('utf-8')))
+        if cache_path is not None:
+            try:
+                tmp_path = cache_path.with_name(f'{cache_path.name}.{os.getpid()}.tmp')
+                with open(tmp_path, 'wb') as f:
+                    pickle.dump(compiled, f, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, cache_path)
+            except OSError as e:
+                logger.debug(f"编译缓存无法写入: {cache_path} ({e})")
+        return compiled
+
+    @staticmethod
+    def cache_path(content: bytes) -> Path:
+        """
+        编译缓存文件路径（按 profile 文件内容哈希和编译格式版本命名）
+
+        Raises:
+            OSError: 无法创建缓存目录
+        """
+        digest = hashlib.sha1(content).hexdigest()
+        directory = get_cache_dir() / CompiledProfileConfig.SUBDIR
+        directory.mkdir(exist_ok=True)
+        return directory / f'{digest}.v{CompiledProfileConfig.FORMAT_VERSION}{CompiledProfileConfig.CACHE_SUFFIX}'
@@ -13,12 +13,24 @@ class LoaderConfig:
     MEMORY_OPTIMIZATION_ROW_THRESHOLD = 100_000  # 超过此行数进行内存优化
     DEFAULT_PREVIEW_ROWS = 100  # 默认预览行数
     MAX_DISPLAY_ROWS = 500  # 表格最大显示行数
+    HEADER_SEARCH_ROWS = 10  # 自动检测 header 时检查的行数
 
     # 预览滑块范围
     SLIDER_MIN_ROWS = 500
     SLIDER_MAX_ROWS = 10_000
     SLIDER_STEP = 500
 
+    # 各文件类型的读取引擎（按优先顺序，未安装或无法打开文件时使用下一个）
+    READER_BACKENDS = {
+        '.xlsx': ('calamine', 'openpyxl'),
+        '.xlsm': ('calamine', 'openpyxl'),
+        '.xls': ('calamine', 'xlrd', 'openpyxl'),
+    }
+
+    # profile 中 signature.sheets 读取全部工作表的写法（未配置时只读取第一个工作表）
+    ALL_SHEETS = 'all'
+    SHEET_COLUMN = 'source_sheet'  # 配置了 signature.sheets 时 labs_long 中记录来源工作表的列
+
 
 class ValidatorConfig:
     """验证配置常量"""
@@ -30,6 +42,27 @@ class ParserConfig:
     """解析器配置常量"""
     MAX_SAMPLES = 100  # 格式检测最大样本数
     EXTREME_VALUE_THRESHOLD = 1e10  # 极端值阈值
+    # 支持的日期文本格式（parse_datetime 按此顺序尝试；DateParser 按数据中出现的频率调整顺序）
+    DATETIME_FORMATS = (
+        '%Y-%m-%d',
+        '%Y/%m/%d',
+        '%Y-%m-%d %H:%M:%S',
+        '%Y/%m/%d %H:%M:%S',
+        '%Y.%m.%d',
+        '%Y%m%d',
+        '%Y年%m月%d日',
+        '%Y-%m-%d %H:%M',
+        '%Y/%m/%d %H:%M',
+    )
+    DATE_LEARN_SAMPLES = 200  # 学习日期格式顺序时使用的不同值个数
+    DATE_FAILED_SAMPLES = 10  # 保留的无法解析的日期样本数
+    # 视为 Excel 日期序列号的数值范围（约 1954-10 至 2119-01，避免把普通小整数当作日期）
+    EXCEL_SERIAL_MIN = 20_000
+    EXCEL_SERIAL_MAX = 80_000
+    EXCEL_EPOCH = '1899-12-30'  # Excel 1900 日期系统的序列号起点
+    # 小于号 / 大于号的处理规则（其他值按 'na' 处理）
+    LESS_THAN_RULES = ('half', 'lower_bound', 'na')
+    GREATER_THAN_RULES = ('keep', 'cap', 'na')
 
 
 class UIConfig:
@@ -37,6 +70,10 @@ class UIConfig:
     THREAD_WAIT_TIMEOUT_MS = 5000  # 线程等待超时（毫秒）
     THREAD_CLEANUP_TIMEOUT_MS = 3000  # 线程清理超时
     PROGRESS_UPDATE_INTERVAL = 5  # 进度更新间隔（百分比）
+    PREVIEW_WIDTH_SAMPLE_ROWS = 100  # 预览表格按前 N 行的文本宽度确定列宽
+    PREVIEW_COLUMN_PADDING = 16  # 列宽在文本宽度之外的留白（像素）
+    PREVIEW_MAX_COLUMN_WIDTH = 300  # 自动列宽的上限（像素）
+    SEARCH_DEBOUNCE_MS = 150  # 搜索框停止输入多久后再筛选（毫秒）
 
 
 class ExportConfig:
@@ -44,3 +81,97 @@ class ExportConfig:
     TIMESTAMP_FORMAT = '%Y%m%d_%H%M%S'
     LABS_LONG_PREFIX = 'labs_long_'
     QC_REPORT_PREFIX = 'qc_report_'
+    RUN_METRICS_PREFIX = 'run_metrics_'  # 各步骤耗时和内存（run_metrics_<run_id>.json）
+    RUN_PROFILE_PREFIX = 'run_profile_'  # 性能剖析结果（run_profile_<run_id>.prof / .html）
+    OUTPUT_FORMATS = ('excel', 'parquet', 'feather', 'csv')
+    DEFAULT_FORMAT = 'excel'
+    EXCEL_SPLIT = 'sheet'  # 超过单表行数上限时: sheet=新工作表, file=新文件
+    PARQUET_COMPRESSION = 'zstd'
+    PARQUET_ROW_GROUP_SIZE = 100_000
+    FEATHER_COMPRESSION = 'lz4'
+    CSV_ENCODING = 'utf-8-sig'
+    # labs_long 中高度重复的列：处理时为 pandas categorical，Parquet / Feather 中为字典编码
+    CATEGORICAL_COLUMNS = (
+        'patient_id', 'visit_id', 'test_name', 'test_code', 'unit', 'unit_std',
+        'value_flag', 'result_flag', 'specimen_type', 'source_sheet', 'profile_id', 'run_id',
+    )
+
+
+class ManifestConfig:
+    """增量抽取配置常量"""
+    DIRNAME = '.lis_manifest'  # 输出目录下保存清单和各文件质量统计的子目录
+    FORMAT_VERSION = 5  # 清单结构或处理逻辑变化时递增，使旧清单失效（全部重新处理）
+    # 不影响输出内容的选项（pushdown 会改变原始数据的质量统计，切换时重新处理）
+    IGNORED_OUTPUT_OPTIONS = ('workers', 'incremental', 'output_dir')
+
+
+class CompiledProfileConfig:
+    """profile 编译缓存配置常量"""
+    SUBDIR = 'compiled'  # 缓存目录下的子目录（不放在可能共享的 profile 目录中）
+    CACHE_SUFFIX = '.compiled'  # 缓存文件为 <profile 内容哈希>.v<FORMAT_VERSION>.compiled
+    FORMAT_VERSION = 3  # 编译结果结构或处理逻辑变化时递增，使旧的编译缓存失效
+
+
+class ProfileIndexConfig:
+    """profile 索引配置常量"""
+    FILENAME = '.profile_index.json'  # 保存在 profile 目录中的索引文件
+    FORMAT_VERSION = 1  # 索引结构变化时递增，使旧索引失效（全部重新解析）
+    MEMORY_CACHE_SIZE = 32  # 内存中保留的已解析 / 已编译 profile 数量（LRU 淘汰）
+
+
+class CacheConfig:
+    """缓存配置常量"""
+    MEMO_MAX_ENTRIES = 200_000  # 唯一值缓存的最大条目数（LRU 淘汰）
+    MEMO_FORMAT_VERSION = 1  # 解析逻辑变化时递增，使旧的持久化缓存失效
+
+
+class FileCacheConfig:
+    """文件读取缓存配置常量"""
+    SUBDIR = 'files'  # 缓存目录下的子目录
+    MAX_BYTES = 2 * 1024 ** 3  # 缓存总大小上限（超出后按最近使用时间淘汰）
+    FORMAT_VERSION = 1  # 读取逻辑变化时递增，使旧的缓存失效
+    COMPRESSION = 'lz4'  # Arrow 文件压缩算法
+    HASH_BLOCK_BYTES = 1024 * 1024  # 计算内容哈希时每次读取的字节数
+    MAX_FINGERPRINTS = 10_000  # 记录的文件指纹数量上限
+
+
+class StreamingConfig:
+    """流式处理配置常量"""
+    CHUNK_ROWS = 100_000  # 每个数据块的最大行数（决定峰值内存）
+    EXCEL_MAX_ROWS = 1_048_576  # Excel 单个工作表的最大行数（含表头）
+    QC_HASH_COMPACT_ROWS = 1_000_000  # 重复行哈希累计超过此数量时去重压缩
+
+
+class ScanConfig:
+    """完整数据扫描配置常量"""
+    FIELDS = ('test_name', 'test_value', 'unit', 'sample_datetime')  # 扫描的标准字段
+    VALUE_SAMPLES_PER_FORMAT = 20  # 每种结果格式保留的不同值样本数
+    DATE_SAMPLES_PER_FORMAT = 3  # 每种日期格式保留的样本数
+    UNITS_PER_TEST = 20  # 每个检验项目最多记录的单位数
+
+
+class ParallelConfig:
+    """并行抽取配置常量"""
+    DEFAULT_WORKERS = 1  # 默认工作进程数（1 表示在当前进程中逐个文件处理）
+    POLL_INTERVAL_SECONDS = 0.2  # 等待子进程结果时检查取消的间隔
+    ARROW_COMPRESSION = 'zstd'  # 子进程回传结果的 Arrow IPC 压缩方式
+
+
+class MetricsConfig:
+    """阶段计时配置常量"""
+    RSS_SAMPLE_SECONDS = 0.05  # 后台采样 RSS 的间隔（计入各阶段的峰值内存）
+    # 抽取流程的阶段（摘要按此顺序，其他阶段排在后面）
+    STAGES = ('load', 'column_map', 'test_map', 'value_parse', 'datetime', 'qc', 'merge', 'export')
+    PROFILERS = ('cprofile', 'pyinstrument')  # 可选的性能剖析工具（pyinstrument 需另外安装）
+    PROFILE_TOP_FUNCTIONS = 40  # cProfile 文本摘要中按累计耗时列出的函数数
+
+
+class ExitCode:
+    """命令行退出码"""
+    SUCCESS = 0
+    FAILURE = 1  # 处理过程中出现未预期的错误
+    USAGE_ERROR = 2  # 命令行参数错误
+    PROFILE_ERROR = 3  # 配置文件不存在或无法解析
+    NO_INPUT = 4  # 未找到输入文件或所有文件读取失败
+    OUTPUT_ERROR = 5  # 无法创建输出目录或写入输出文件
+    CANCELLED = 130  # 用户取消（与 Ctrl+C 的惯例一致）
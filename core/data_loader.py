@@ -2,34 +2,52 @@
 数据加载模块
 支持单文件、多文件、文件夹加载
 """
+import multiprocessing
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Union, Tuple
+from typing import Dict, Iterator, List, Optional, Union, Tuple
 import pandas as pd
-from PyQt6.QtCore import QObject, pyqtSignal
 
 from .utils import load_excel_auto_header
-from .constants import LoaderConfig
+from .constants import LoaderConfig, StreamingConfig
+from .file_cache import open_file_cache
+from .readers import ReaderStats, RowFilter, SheetSelector, iter_frames, read_frame, sheet_names
+from .signals import Signal
 
 
-class DataLoader(QObject):
+class DataLoader:
     """
     数据加载器
-    支持进度信号
+    支持进度信号（不依赖 Qt，可在命令行中使用）
     """
-    progress = pyqtSignal(int, str)  # (percentage, message)
-    error = pyqtSignal(str)
+    progress = Signal(int, str)  # (percentage, message)
+    error = Signal(str)
     
-    def __init__(self):
-        super().__init__()
+    def __init__(self, reader: Optional[str] = None, use_cache: Optional[bool] = None):
+        """
+        Args:
+            reader: 优先使用的读取引擎（calamine / openpyxl / xlrd），None 时按文件类型自动选择
+            use_cache: 是否使用文件读取缓存，None 时按环境变量 LIS_FILE_CACHE 决定（默认启用）
+        """
         self.files = []
+        self.reader = reader
+        self.reader_stats = ReaderStats()
+        self.file_cache = open_file_cache(use_cache)
     
-    def find_excel_files(self, path: Union[str, Path]) -> List[str]:
+    def find_excel_files(self, path: Union[str, Path, List[str]]) -> List[str]:
         """
         查找 Excel 文件
         如果是文件，直接返回
         如果是文件夹，递归查找所有 Excel
+        如果是路径列表，依次查找每个路径
         """
+        if isinstance(path, (list, tuple)):
+            excel_files = [file for item in path for file in self.find_excel_files(item)]
+            self.files = excel_files
+            return excel_files
+
         path = Path(path)
         excel_files = []
         
@@ -72,13 +90,16 @@ class DataLoader(QObject):
             self.error.emit(f"加载文件失败: {str(e)}")
             raise
     
-    def load_full_file(self, file_path: str, skip_rows: int = 0) -> pd.DataFrame:
+    def load_full_file(self, file_path: str, skip_rows: int = 0,
+                       columns: Optional[List[str]] = None,
+                       row_filter: Optional[RowFilter] = None, sheet: int = 0) -> pd.DataFrame:
         """
-        加载完整文件
+        加载完整文件（一个工作表，默认第一个；多个工作表见 load_sheets）
 
         优化措施:
         - 使用 string 类型减少内存使用
         - 检测大文件并发出警告
+        - 只读取需要的列、在读取时丢弃不需要的行（columns / row_filter，见 iter_file_chunks）
         """
         try:
             filename = os.path.basename(file_path)
@@ -93,12 +114,8 @@ class DataLoader(QObject):
 
             # 使用优化的 dtype 来减少内存使用
             # string 类型比 object 类型更节省内存
-            df = pd.read_excel(
-                file_path,
-                header=skip_rows,
-                dtype_backend='numpy_nullable',  # 使用新的 nullable dtypes
-                engine='openpyxl'
-            )
+            # 整个文件作为一个块（读完生成器，读取缓存才会写入）
+            df = list(self._read_frames(file_path, skip_rows, None, columns, row_filter, sheet))[0]
 
             self.progress.emit(70, f"处理列名: {filename}")
             # 清理列名
@@ -119,6 +136,187 @@ class DataLoader(QObject):
             self.error.emit(f"读取文件失败 {file_path}: {str(e)}")
             raise
     
+    def iter_file_chunks(self, file_path: str, skip_rows: int = 0,
+                         chunk_rows: Optional[int] = StreamingConfig.CHUNK_ROWS,
+                         columns: Optional[List[str]] = None,
+                         row_filter: Optional[RowFilter] = None,
+                         sheet: int = 0) -> Iterator[pd.DataFrame]:
+        """
+        分块读取完整文件（一个工作表，默认第一个）
+
+        逐行读取，每积累 chunk_rows 行生成一个 DataFrame，
+        单元格转换和类型推断规则与 load_full_file 相同，内存占用只与块大小有关。
+        chunk_rows 为 None 时整个文件作为一个块。
+
+        Args:
+            columns: 只读取这些列（与去除首尾空格后的列名比较），None 表示全部列
+            row_filter: 读取时按列值丢弃行（跳过的行数等统计累计在 row_filter 中）
+            sheet: 工作表序号（从 0 开始，见 select_sheets）
+
+        注意：类型推断按块进行，同一列在不同块中的 dtype 可能不同
+        """
+        if not chunk_rows:
+            yield self.load_full_file(file_path, skip_rows, columns, row_filter, sheet)
+            return
+
+        filename = os.path.basename(file_path)
+        self.progress.emit(0, f"正在打开: {filename}")
+
+        total = 0
+        try:
+            for df in self._read_frames(file_path, skip_rows, chunk_rows, columns, row_filter, sheet):
+                total += len(df)
+                self.progress.emit(50, f"已读取 {total:,} 行: {filename}")
+                yield self._clean_columns(df)
+        except Exception as e:
+            self.error.emit(f"读取文件失败 {file_path}: {str(e)}")
+            raise
+
+        self.progress.emit(100, f"读取完成: {total} 行")
+
+    def _read_frames(self, file_path: str, skip_rows: int, chunk_rows: Optional[int],
+                     columns: Optional[List[str]] = None,
+                     row_filter: Optional[RowFilter] = None,
+                     sheet: int = 0) -> Iterator[pd.DataFrame]:
+        """
+        按块读取原始数据（列名未清理）
+
+        文件未修改时直接从读取缓存加载（同时恢复 row_filter 的统计）；
+        否则解析 Excel，并在全部读完后写入缓存
+        """
+        usecols = None
+        params = {'skip_rows': skip_rows, 'chunk_rows': chunk_rows}
+        if columns is not None:
+            wanted = set(columns)
+            usecols = lambda name: str(name).strip() in wanted
+            params['columns'] = sorted(wanted)
+        if row_filter is not None:
+            params['row_filter'] = [row_filter.column, row_filter.key]
+        if sheet:
+            # 第一个工作表不加入缓存键，与之前保存的缓存兼容
+            params['sheet'] = sheet
+
+        cache = self.file_cache
+        key = None
+        if cache is not None:
+            # 各读取引擎的结果相同，引擎不参与缓存键
+            key = cache.key(file_path, 'frames', **params)
+            cached = cache.get_frames(key)
+            if cached is not None:
+                frames, extra = cached
+                if row_filter is not None:
+                    row_filter.restore(extra['row_filter'])
+                yield from self._timed_frames(frames)
+                return
+
+        writer = cache.frame_writer(key, file_path) if cache is not None else None
+        completed = False
+        try:
+            # 使用 nullable dtypes（string 类型比 object 类型更节省内存）
+            for df in iter_frames(file_path, header=skip_rows, chunk_rows=chunk_rows,
+                                  usecols=usecols, dtype_backend='numpy_nullable',
+                                  reader=self.reader, stats=self.reader_stats,
+                                  row_filter=row_filter, sheet=sheet):
+                if writer is not None:
+                    writer.write(df)
+                yield df
+            completed = True
+        finally:
+            if writer is not None:
+                if completed:
+                    writer.commit({'row_filter': row_filter.state()} if row_filter is not None else None)
+                else:
+                    writer.abort()
+
+    def sheet_names(self, file_path: str) -> List[str]:
+        """工作表名称列表（结果保存在读取缓存中，文件未修改时不再打开文件）"""
+        cache = self.file_cache
+        key = None
+        if cache is not None:
+            key = cache.key(file_path, 'sheet_names')
+            cached = cache.get_result(key, 'sheet_names')
+            if cached is not None:
+                return cached
+
+        names = sheet_names(file_path, self.reader)
+        if cache is not None:
+            cache.put_result(key, 'sheet_names', file_path, names)
+        return names
+
+    def select_sheets(self, file_path: str,
+                      selector: Optional[SheetSelector]) -> List[Tuple[int, Optional[str]]]:
+        """
+        按 profile 的 signature.sheets 选择要读取的工作表
+
+        Returns:
+            [(序号, 名称), ...]；selector 为 None 时为 [(0, None)]（只读取第一个工作表，不打开文件）
+        """
+        if selector is None:
+            return [(0, None)]
+        return selector.select(self.sheet_names(file_path))
+
+    def load_sheets(self, file_path: str, selector: Optional[SheetSelector], skip_rows: int = 0,
+                    columns: Optional[List[str]] = None, workers: int = 1) -> pd.DataFrame:
+        """
+        加载选择的所有工作表并合并，每行的来源工作表记录在 LoaderConfig.SHEET_COLUMN 列
+
+        workers > 1 时各工作表在子进程中同时读取，耗时约等于最大的工作表；
+        所有工作表使用相同的表头位置（skip_rows），列名不同时按列名对齐
+
+        Args:
+            selector: 工作表选择（None 时只读取第一个工作表）
+            columns: 只读取这些列（见 iter_file_chunks）
+            workers: 同时读取的进程数
+        """
+        sheets = self.select_sheets(file_path, selector)
+        workers = min(workers, len(sheets))
+        if workers > 1:
+            # 与并行抽取相同，使用 spawn 启动子进程
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+                futures = [
+                    executor.submit(_load_sheet, file_path, index, skip_rows, columns,
+                                    self.reader, self.file_cache is not None)
+                    for index, _ in sheets
+                ]
+                results = [future.result() for future in futures]
+            frames = []
+            for df, stats in results:
+                self.reader_stats.merge(stats)
+                frames.append(df)
+        else:
+            frames = [self.load_full_file(file_path, skip_rows, columns, sheet=index)
+                      for index, _ in sheets]
+
+        for df, (index, name) in zip(frames, sheets):
+            df[LoaderConfig.SHEET_COLUMN] = name if name is not None else index
+        if not frames:
+            return pd.DataFrame(columns=[LoaderConfig.SHEET_COLUMN])
+        return pd.concat(frames, ignore_index=True)
+
+    def _timed_frames(self, frames: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """生成缓存中的数据块，并以 'cache' 引擎记录读取速度"""
+        rows = cells = 0
+        seconds = 0.0
+        try:
+            while True:
+                start = time.perf_counter()
+                df = next(frames, None)
+                seconds += time.perf_counter() - start
+                if df is None:
+                    break
+                rows += len(df)
+                cells += df.size
+                yield df
+        finally:
+            self.reader_stats.record('cache', rows=rows, cells=cells, seconds=seconds, files=1)
+
+    @staticmethod
+    def _clean_columns(df: pd.DataFrame) -> pd.DataFrame:
+        """清理列名"""
+        df.columns = [str(col).strip() for col in df.columns]
+        return df
+
     def load_multiple_files(self, file_paths: List[str], skip_rows: int = 0) -> List[Tuple[str, pd.DataFrame]]:
         """
         加载多个文件
@@ -190,26 +388,20 @@ class DataLoader(QObject):
                     f"扫描 {idx+1}/{len(files)}: {os.path.basename(file_path)}"
                 )
 
-                # 只读取指定的列，大幅减少内存使用
-                # 使用usecols参数只加载需要的列
-                df = pd.read_excel(
-                    file_path,
-                    header=skip_rows,
-                    usecols=lambda x: str(x).strip() == column_name
-                )
+                counts = self._column_counts(file_path, column_name, skip_rows)
 
-                if df.empty:
+                if counts is None:
                     # 如果没找到列，尝试读取第一行获取列名
-                    df_headers = pd.read_excel(file_path, header=skip_rows, nrows=0)
+                    df_headers = read_frame(file_path, header=skip_rows, nrows=0, reader=self.reader)
                     available_cols = [str(c).strip() for c in df_headers.columns]
                     self.error.emit(f"在 {os.path.basename(file_path)} 中未找到列 '{column_name}'。"
                                    f"可用列: {available_cols[:5]}...")
                     continue
 
                 # 获取唯一值
-                col_values = df.iloc[:, 0].dropna().astype(str).str.strip()
-                unique_values.update(col_values.unique())
-                total_rows += len(df)
+                value_counts, rows = counts
+                unique_values.update(value_counts)
+                total_rows += rows
 
             except Exception as e:
                 self.error.emit(f"扫描文件失败 {os.path.basename(file_path)}: {str(e)}")
@@ -247,19 +439,13 @@ class DataLoader(QObject):
                     f"扫描项目 {idx+1}/{len(files)}: {os.path.basename(file_path)}"
                 )
 
-                # 只读取test_name列
-                df = pd.read_excel(
-                    file_path,
-                    header=skip_rows,
-                    usecols=lambda x: str(x).strip() == test_name_column
-                )
+                counts = self._column_counts(file_path, test_name_column, skip_rows)
 
-                if df.empty:
+                if counts is None:
                     continue
 
                 # 统计每个项目的出现次数
-                col = df.iloc[:, 0].dropna().astype(str).str.strip()
-                value_counts = col.value_counts()
+                value_counts, _ = counts
 
                 for test_name, count in value_counts.items():
                     test_counts[test_name] = test_counts.get(test_name, 0) + count
@@ -272,3 +458,44 @@ class DataLoader(QObject):
 
         return test_counts
 
+    def _column_counts(self, file_path: str, column_name: str,
+                       skip_rows: int) -> Optional[Tuple[Dict[str, int], int]]:
+        """
+        统计单个文件中某一列各个值（去除首尾空格）的出现次数
+
+        结果保存在读取缓存中，文件未修改时不再读取
+
+        Returns:
+            ({value: count}, 总行数)；文件中没有该列时返回 None
+        """
+        cache = self.file_cache
+        key = None
+        if cache is not None:
+            key = cache.key(file_path, 'column_counts', column=column_name, skip_rows=skip_rows)
+            cached = cache.get_result(key, 'column_counts')
+            if cached is not None:
+                return cached
+
+        # 只读取指定的列，大幅减少内存使用
+        df = read_frame(
+            file_path,
+            header=skip_rows,
+            usecols=lambda x: str(x).strip() == column_name,
+            reader=self.reader,
+            stats=self.reader_stats
+        )
+        if df.empty:
+            return None
+
+        col = df.iloc[:, 0].dropna().astype(str).str.strip()
+        counts = ({value: int(count) for value, count in col.value_counts().items()}, len(df))
+        if cache is not None:
+            cache.put_result(key, 'column_counts', file_path, counts)
+        return counts
+
+
+def _load_sheet(file_path: str, sheet: int, skip_rows: int, columns: Optional[List[str]],
+                reader: Optional[str], use_cache: bool) -> Tuple[pd.DataFrame, ReaderStats]:
+    """在子进程中读取一个工作表（load_sheets 使用）"""
+    loader = DataLoader(reader=reader, use_cache=use_cache)
+    return loader.load_full_file(file_path, skip_rows, columns, sheet=sheet), loader.reader_stats
@@ -0,0 +1,228 @@
+"""
+日期解析模块
+sample_datetime 列中同一天的值大量重复：先 factorize 得到不同的值，
+从样本中学习数据实际使用的格式顺序（ParserConfig.DATETIME_FORMATS 与 Excel 序列号），
+再按该顺序逐个格式用显式 format= 向量化解析尚未解析的值，最后按编码广播回整列。
+每行只在 factorize 和广播时各访问一次，各格式的行数和解析失败数在同一过程中统计
+"""
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype, is_datetime64_any_dtype
+
+from .constants import ParserConfig
+
+
+class DateParser:
+    """
+    可合并的日期解析器
+
+    格式顺序在各数据块之间共享：第一块按样本学习，之后按累计命中的行数调整；
+    结果与逐个值调用 utils.parse_datetime 一致（另外支持 Excel 日期序列号）
+    """
+
+    NATIVE = 'datetime'  # 读取时已经是日期类型（Excel 日期单元格）
+    EXCEL_SERIAL = 'excel_serial'  # Excel 日期序列号（如 45296、45296.5）
+    MIXED = 'mixed'  # 以上格式都不匹配，逐个值推断
+
+    LABELS = {
+        NATIVE: 'Excel 日期',
+        EXCEL_SERIAL: 'Excel 序列号',
+        MIXED: '其他格式（逐个推断）',
+    }
+
+    def __init__(self, formats=ParserConfig.DATETIME_FORMATS):
+        """
+        Args:
+            formats: 候选的日期文本格式（strptime 格式）
+        """
+        self.formats = list(formats)
+        self._sample_counts: Optional[Counter] = None
+        self.reset_stats()
+
+    def reset_stats(self):
+        """清空统计（保留已学习的格式顺序）"""
+        self.format_counts = Counter()  # {格式: 行数}
+        self.failed = 0
+        self.failed_samples: List[str] = []
+
+    def snapshot_stats(self) -> Dict:
+        """当前统计的副本（用 restore_stats() 回退；不包括已学习的格式顺序）"""
+        return {
+            'format_counts': Counter(self.format_counts),
+            'failed': self.failed,
+            'failed_samples': list(self.failed_samples),
+        }
+
+    def restore_stats(self, snapshot: Dict):
+        """回退到 snapshot_stats() 时的统计"""
+        self.format_counts = Counter(snapshot['format_counts'])
+        self.failed = snapshot['failed']
+        self.failed_samples = list(snapshot['failed_samples'])
+
+    @property
+    def learned(self) -> bool:
+        return self._sample_counts is not None
+
+    def parse(self, series: pd.Series) -> pd.Series:
+        """
+        解析一列日期
+
+        Returns:
+            datetime64[ns] 列（无法解析的为 NaT），索引与 series 一致
+        """
+        if is_datetime64_any_dtype(series):
+            parsed = pd.to_datetime(series)
+            self.format_counts[self.NATIVE] += int(parsed.notna().sum())
+            return parsed
+
+        codes, uniques = pd.factorize(series)
+        parsed, labels = self._parse_uniques(np.asarray(uniques, dtype=object))
+
+        # 每个不同值出现的行数
+        counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+        ok = pd.notna(labels)
+        for label in pd.unique(labels[ok]):
+            self.format_counts[label] += int(counts[labels == label].sum())
+        self.failed += int(counts[~ok].sum())
+        for value in uniques[~ok]:
+            if len(self.failed_samples) >= ParserConfig.DATE_FAILED_SAMPLES:
+                break
+            self.failed_samples.append(str(value))
+
+        # 末尾多留一个 NaT，编码 -1（缺失值）恰好索引到它
+        values = np.append(parsed, np.datetime64('NaT', 'ns'))
+        return pd.Series(values[codes], index=series.index, name=series.name)
+
+    def _parse_uniques(self, values: np.ndarray):
+        """解析不同的值，返回 (datetime64[ns] 数组, 每个值匹配的格式；None 表示失败)"""
+        parsed = np.full(len(values), np.datetime64('NaT', 'ns'))
+        labels = np.full(len(values), None, dtype=object)
+        if not len(values):
+            return parsed, labels
+
+        kind = infer_dtype(values, skipna=True)
+        if kind in ('datetime', 'datetime64', 'date'):
+            native = np.ones(len(values), dtype=bool)
+        elif kind in ('string', 'integer', 'floating', 'mixed-integer-float', 'decimal'):
+            native = np.zeros(len(values), dtype=bool)
+        else:
+            native = np.fromiter((isinstance(value, (datetime, date, np.datetime64)) for value in values),
+                                 dtype=bool, count=len(values))
+
+        if native.any():
+            parsed[native] = pd.to_datetime(values[native], errors='coerce').to_numpy('datetime64[ns]')
+            labels[native] = self.NATIVE
+
+        positions = np.flatnonzero(~native)
+        if len(positions):
+            text = self._to_text(values[positions], kind)
+            self._cascade(text, positions, parsed, labels)
+        labels[np.isnat(parsed)] = None
+        return parsed, labels
+
+    @staticmethod
+    def _to_text(values: np.ndarray, kind: str) -> np.ndarray:
+        """转为去除首尾空格的文本（整数值的浮点数不带小数部分，如 20240105.0 → '20240105'）"""
+        if kind == 'string':
+            return pd.Series(values, dtype=object).str.strip().to_numpy(dtype=object)
+
+        def to_text(value) -> str:
+            if isinstance(value, (float, np.floating)) and value.is_integer() and abs(value) < 1e15:
+                return str(int(value))
+            return str(value).strip()
+
+        return np.array([to_text(value) for value in values], dtype=object)
+
+    def _cascade(self, text: np.ndarray, positions: np.ndarray,
+                 parsed: np.ndarray, labels: np.ndarray):
+        """按格式顺序逐个解析，每种格式只处理前面的格式没有解析的值"""
+        remaining = np.arange(len(text))
+        for fmt in self.format_order(text) + [self.MIXED]:
+            if not len(remaining):
+                break
+            subset = text[remaining]
+            if fmt == self.EXCEL_SERIAL:
+                result = self._parse_serial(subset)
+            elif fmt == self.MIXED:
+                # 与 parse_datetime 最后的回退相同：逐个值推断
+                result = self._parse_mixed(subset)
+            else:
+                result = pd.to_datetime(pd.Series(subset), format=fmt, errors='coerce')
+
+            result = result.to_numpy('datetime64[ns]')
+            hit = ~np.isnat(result)
+            parsed[positions[remaining[hit]]] = result[hit]
+            labels[positions[remaining[hit]]] = fmt
+            remaining = remaining[~hit]
+
+    @staticmethod
+    def _parse_mixed(text: np.ndarray) -> pd.Series:
+        try:
+            return pd.to_datetime(pd.Series(text), format='mixed', errors='coerce')
+        except (ValueError, TypeError, OverflowError):
+            return pd.Series(pd.NaT, index=range(len(text)), dtype='datetime64[ns]')
+
+    @staticmethod
+    def _parse_serial(text: np.ndarray) -> pd.Series:
+        """Excel 日期序列号（只接受 EXCEL_SERIAL_MIN ~ EXCEL_SERIAL_MAX 之间的数值）"""
+        numbers = pd.to_numeric(pd.Series(text), errors='coerce')
+        numbers = numbers.where(numbers.between(ParserConfig.EXCEL_SERIAL_MIN, ParserConfig.EXCEL_SERIAL_MAX))
+        return pd.to_datetime(numbers, unit='D', origin=ParserConfig.EXCEL_EPOCH).dt.round('s')
+
+    def format_order(self, text: np.ndarray) -> List[str]:
+        """
+        尝试格式的顺序
+
+        第一次调用时用前 DATE_LEARN_SAMPLES 个值学习各格式的出现频率，
+        之后按（样本计数 + 累计行数）从高到低排列，没有出现过的格式保持原顺序排在后面
+        """
+        if self._sample_counts is None:
+            self._sample_counts = Counter()
+            for value in text[:ParserConfig.DATE_LEARN_SAMPLES]:
+                fmt = self._match_format(value)
+                if fmt is not None:
+                    self._sample_counts[fmt] += 1
+
+        candidates = self.formats + [self.EXCEL_SERIAL]
+        rank = self._sample_counts + self.format_counts
+        return sorted(candidates, key=lambda fmt: -rank[fmt])
+
+    def _match_format(self, value: str) -> Optional[str]:
+        for fmt in self.formats:
+            try:
+                datetime.strptime(value, fmt)
+                return fmt
+            except ValueError:
+                continue
+        try:
+            number = float(value)
+        except ValueError:
+            return None
+        if ParserConfig.EXCEL_SERIAL_MIN <= number <= ParserConfig.EXCEL_SERIAL_MAX:
+            return self.EXCEL_SERIAL
+        return None
+
+    def merge(self, other: 'DateParser'):
+        """合并另一个解析器的统计（并行抽取时合并子进程的结果）"""
+        self.format_counts.update(other.format_counts)
+        self.failed += other.failed
+        needed = ParserConfig.DATE_FAILED_SAMPLES - len(self.failed_samples)
+        if needed > 0:
+            self.failed_samples.extend(other.failed_samples[:needed])
+
+    @classmethod
+    def describe(cls, fmt: str) -> str:
+        """格式的显示名称"""
+        return cls.LABELS.get(fmt, fmt)
+
+    def stats(self) -> Dict:
+        """各格式的行数和解析失败数"""
+        return {
+            'formats': {fmt: count for fmt, count in self.format_counts.most_common()},
+            'failed': self.failed,
+            'failed_samples': list(self.failed_samples),
+        }
@@ -0,0 +1,406 @@
+"""
+文件读取缓存模块
+按文件指纹（路径 + 大小 + 修改时间 + 内容哈希）在磁盘上缓存解析后的原始数据块和扫描结果，
+未修改的文件再次读取时直接加载 Arrow 文件，不再解析 Excel
+
+缓存目录结构（位于 get_cache_dir() / FileCacheConfig.SUBDIR）:
+    fingerprints.json      路径 → (大小, 修改时间, 内容哈希)，大小和修改时间未变时不再重新计算哈希
+    <key>/meta.json        条目信息；其修改时间即最近使用时间（LRU 淘汰依据）
+    <key>/part-00000.arrow 数据块（Arrow IPC；无法用 Arrow 表示时为 .pkl）
+    <key>/result.pkl       扫描结果
+"""
+import os
+import json
+import time
+import pickle
+import shutil
+import hashlib
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .constants import FileCacheConfig
+from .logger import get_logger
+from .value_cache import get_cache_dir
+
+logger = get_logger(__name__)
+
+
+def file_cache_enabled() -> bool:
+    """是否启用文件缓存（环境变量 LIS_FILE_CACHE=0 时关闭）"""
+    return os.getenv('LIS_FILE_CACHE', '1').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def hash_file(path: str) -> str:
+    """文件内容哈希"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        while block := f.read(FileCacheConfig.HASH_BLOCK_BYTES):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def open_file_cache(enabled: Optional[bool] = None) -> Optional['FileCache']:
+    """
+    打开默认的文件缓存
+
+    Args:
+        enabled: 是否启用；None 时按环境变量 LIS_FILE_CACHE 决定
+
+    Returns:
+        FileCache；未启用或缓存目录不可用时返回 None
+    """
+    if enabled is None:
+        enabled = file_cache_enabled()
+    if not enabled:
+        return None
+    try:
+        return FileCache()
+    except OSError as e:
+        logger.warning(f"文件缓存目录不可用，将直接读取文件: {e}")
+        return None
+
+
+class FileCache:
+    """
+    文件读取缓存
+
+    条目键由文件内容哈希、缓存类型和读取参数共同决定，参数不同（如 skip_rows、块大小）互不影响；
+    缓存总大小超过上限时按最近使用时间淘汰。多进程同时读写时写入采用临时目录 + 重命名，
+    任何缓存错误都只记录警告并回退到直接读取文件。
+    """
+
+    META_FILE = 'meta.json'
+    FINGERPRINT_FILE = 'fingerprints.json'
+
+    def __init__(self, root: Optional[Path] = None, max_bytes: int = FileCacheConfig.MAX_BYTES):
+        """
+        Args:
+            root: 缓存目录（None 时为 get_cache_dir() / FileCacheConfig.SUBDIR）
+            max_bytes: 缓存总大小上限（字节）
+        """
+        self.root = Path(root) if root else get_cache_dir() / FileCacheConfig.SUBDIR
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self._fingerprints = None
+        self.hits = 0
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # 指纹与键
+    # ------------------------------------------------------------------
+    def fingerprint(self, file_path: str) -> Dict:
+        """
+        文件指纹
+
+        大小和修改时间与记录一致时直接复用记录的内容哈希，否则重新计算
+        """
+        path = os.path.abspath(file_path)
+        stat = os.stat(path)
+        fingerprints = self._load_fingerprints()
+
+        record = fingerprints.get(path)
+        if record and record[0] == stat.st_size and record[1] == stat.st_mtime_ns:
+            content_hash = record[2]
+        else:
+            content_hash = hash_file(path)
+            fingerprints.pop(path, None)
+            fingerprints[path] = [stat.st_size, stat.st_mtime_ns, content_hash]
+            self._save_fingerprints()
+
+        return {'path': path, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+                'content_hash': content_hash}
+
+    def key(self, file_path: str, kind: str, **params) -> str:
+        """
+        缓存条目的键
+
+        Args:
+            file_path: 源文件
+            kind: 缓存类型（如 'frames'、'column_counts'、'scan'）
+            params: 影响结果的读取参数
+        """
+        fingerprint = self.fingerprint(file_path)
+        payload = json.dumps(
+            [FileCacheConfig.FORMAT_VERSION, fingerprint['content_hash'], fingerprint['size'],
+             kind, params],
+            sort_keys=True, ensure_ascii=False, default=str
+        )
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _load_fingerprints(self) -> Dict[str, list]:
+        if self._fingerprints is None:
+            self._fingerprints = {}
+            try:
+                with open(self.root / self.FINGERPRINT_FILE, 'r', encoding='utf-8') as f:
+                    self._fingerprints = json.load(f)
+            except FileNotFoundError:
+                pass
+            except (OSError, ValueError) as e:
+                logger.warning(f"读取文件指纹失败，将重新计算: {e}")
+        return self._fingerprints
+
+    def _save_fingerprints(self):
+        fingerprints = self._fingerprints
+        # 只保留最近记录的路径（字典按插入顺序，最早的在前）
+        while len(fingerprints) > FileCacheConfig.MAX_FINGERPRINTS:
+            del fingerprints[next(iter(fingerprints))]
+        try:
+            target = self.root / self.FINGERPRINT_FILE
+            tmp_file = target.with_name(f"{target.name}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(fingerprints, f, ensure_ascii=False)
+            os.replace(tmp_file, target)
+        except OSError as e:
+            logger.warning(f"保存文件指纹失败: {e}")
+
+    # ------------------------------------------------------------------
+    # 数据块
+    # ------------------------------------------------------------------
+    def get_frames(self, key: str) -> Optional[Tuple[Iterator[pd.DataFrame], Dict]]:
+        """
+        读取缓存的数据块
+
+        Returns:
+            (按原顺序生成数据块的迭代器, 写入时附带的信息)；未命中时返回 None
+        """
+        meta = self._open_entry(key, 'frames')
+        if meta is None:
+            return None
+        return self._iter_parts(self.root / key, meta['parts']), meta.get('extra', {})
+
+    @staticmethod
+    def _iter_parts(entry_dir: Path, parts: List[str]) -> Iterator[pd.DataFrame]:
+        import pyarrow.feather as feather
+
+        for part in parts:
+            path = entry_dir / part
+            if part.endswith('.arrow'):
+                yield feather.read_table(path).to_pandas()
+            else:
+                yield pd.read_pickle(path)
+
+    def frame_writer(self, key: str, source: str) -> 'FrameCacheWriter':
+        """创建数据块写入器（逐块写入，全部写完后 commit）"""
+        return FrameCacheWriter(self, key, source)
+
+    # ------------------------------------------------------------------
+    # 扫描结果
+    # ------------------------------------------------------------------
+    def get_result(self, key: str, kind: str) -> Optional[Any]:
+        """读取缓存的扫描结果；未命中时返回 None"""
+        meta = self._open_entry(key, kind)
+        if meta is None:
+            return None
+        try:
+            with open(self.root / key / 'result.pkl', 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"读取缓存结果失败，将重新扫描: {e}")
+            return None
+
+    def put_result(self, key: str, kind: str, source: str, result: Any):
+        """保存扫描结果"""
+        tmp_dir = self._new_tmp_dir()
+        try:
+            with open(tmp_dir / 'result.pkl', 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            self._commit(tmp_dir, key, {'kind': kind, 'source': source})
+        except Exception as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            logger.warning(f"保存缓存结果失败: {e}")
+
+    # ------------------------------------------------------------------
+    # 条目管理
+    # ------------------------------------------------------------------
+    def _open_entry(self, key: str, kind: str) -> Optional[Dict]:
+        """读取条目信息并刷新最近使用时间"""
+        meta_file = self.root / key / self.META_FILE
+        try:
+            with open(meta_file, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+            os.utime(meta_file)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"缓存条目损坏，将重新读取: {e}")
+            self.misses += 1
+            return None
+
+        if meta.get('kind') != kind:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return meta
+
+    def _new_tmp_dir(self) -> Path:
+        tmp_dir = self.root / f".tmp-{uuid.uuid4().hex}"
+        tmp_dir.mkdir()
+        return tmp_dir
+
+    def _commit(self, tmp_dir: Path, key: str, meta: Dict):
+        """写入条目信息后将临时目录重命名为正式条目，然后按上限淘汰"""
+        meta = {**meta, 'created': time.time(), 'bytes': _dir_size(tmp_dir)}
+        with open(tmp_dir / self.META_FILE, 'w', encoding='utf-8') as f:
+            json.dump(meta, f, ensure_ascii=False)
+
+        target = self.root / key
+        try:
+            os.rename(tmp_dir, target)
+        except OSError:
+            # 其他进程已写入同一条目
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return
+        self.evict()
+
+    def entries(self) -> List[Dict]:
+        """所有缓存条目（按最近使用时间从旧到新）"""
+        entries = []
+        for entry_dir in self.root.iterdir():
+            meta_file = entry_dir / self.META_FILE
+            if entry_dir.name.startswith('.') or not meta_file.is_file():
+                continue
+            try:
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    meta = json.load(f)
+                last_used = meta_file.stat().st_mtime
+            except (OSError, ValueError):
+                continue
+            entries.append({**meta, 'key': entry_dir.name, 'last_used': last_used})
+        entries.sort(key=lambda entry: entry['last_used'])
+        return entries
+
+    def evict(self):
+        """总大小超过上限时淘汰最久未使用的条目"""
+        entries = self.entries()
+        total = sum(entry.get('bytes', 0) for entry in entries)
+        for entry in entries:
+            if total <= self.max_bytes:
+                break
+            self._remove(entry['key'])
+            total -= entry.get('bytes', 0)
+
+    def purge(self, older_than_days: Optional[float] = None) -> Tuple[int, int]:
+        """
+        清除缓存
+
+        Args:
+            older_than_days: 只清除超过指定天数未使用的条目；None 时全部清除
+
+        Returns:
+            (清除的条目数, 释放的字节数)
+        """
+        cutoff = time.time() - older_than_days * 86400 if older_than_days is not None else None
+        removed = freed = 0
+        for entry in self.entries():
+            if cutoff is not None and entry['last_used'] >= cutoff:
+                continue
+            self._remove(entry['key'])
+            removed += 1
+            freed += entry.get('bytes', 0)
+
+        if cutoff is None:
+            # 同时清理指纹记录和中断写入留下的临时目录
+            for path in self.root.iterdir():
+                if path.name.startswith('.tmp-'):
+                    shutil.rmtree(path, ignore_errors=True)
+            (self.root / self.FINGERPRINT_FILE).unlink(missing_ok=True)
+            self._fingerprints = None
+        return removed, freed
+
+    def _remove(self, key: str):
+        shutil.rmtree(self.root / key, ignore_errors=True)
+
+    def info(self) -> Dict:
+        """缓存目录、条目数和大小（按类型汇总）"""
+        entries = self.entries()
+        kinds = {}
+        for entry in entries:
+            kind = kinds.setdefault(entry.get('kind', '?'), {'entries': 0, 'bytes': 0})
+            kind['entries'] += 1
+            kind['bytes'] += entry.get('bytes', 0)
+        return {
+            'path': str(self.root),
+            'entries': len(entries),
+            'bytes': sum(entry.get('bytes', 0) for entry in entries),
+            'max_bytes': self.max_bytes,
+            'kinds': kinds,
+        }
+
+    def stats(self) -> Dict:
+        """本实例的命中统计"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+
+class FrameCacheWriter:
+    """
+    逐块写入缓存条目
+
+    每个数据块单独保存，读取时块的划分和 dtype 与首次读取完全一致；
+    commit() 之前条目不可见，abort() 丢弃已写入的内容
+    """
+
+    def __init__(self, cache: FileCache, key: str, source: str):
+        self.cache = cache
+        self.key = key
+        self.source = source
+        self.parts: List[str] = []
+        self.rows = 0
+        self.failed = False
+        self._tmp_dir = cache._new_tmp_dir()
+
+    def write(self, df: pd.DataFrame):
+        import pyarrow as pa
+        import pyarrow.feather as feather
+
+        if self.failed:
+            return
+        name = f"part-{len(self.parts):05d}"
+        try:
+            try:
+                table = pa.Table.from_pandas(df)
+                feather.write_feather(table, self._tmp_dir / f"{name}.arrow",
+                                      compression=FileCacheConfig.COMPRESSION)
+                name += '.arrow'
+            except (pa.ArrowException, TypeError, ValueError):
+                # 混合类型的 object 列等无法用 Arrow 表示，改用 pickle
+                df.to_pickle(self._tmp_dir / f"{name}.pkl")
+                name += '.pkl'
+        except Exception as e:
+            self.failed = True
+            logger.warning(f"写入读取缓存失败: {e}")
+            return
+        self.parts.append(name)
+        self.rows += len(df)
+
+    def commit(self, extra: Optional[Dict] = None):
+        """
+        Args:
+            extra: 随条目保存的附加信息（可 JSON 序列化，如读取时筛选行的统计）
+        """
+        if self.failed:
+            self.abort()
+            return
+        try:
+            self.cache._commit(self._tmp_dir, self.key, {
+                'kind': 'frames', 'source': self.source,
+                'parts': self.parts, 'rows': self.rows, 'extra': extra or {},
+            })
+        except OSError as e:
+            self.abort()
+            logger.warning(f"保存读取缓存失败: {e}")
+
+    def abort(self):
+        shutil.rmtree(self._tmp_dir, ignore_errors=True)
+
+
+def _dir_size(path: Path) -> int:
+    return sum(entry.stat().st_size for entry in os.scandir(path) if entry.is_file())
@@ -0,0 +1,267 @@
+"""
+增量抽取模块
+每个 profile 在输出目录中保存一份运行清单，记录每个源文件的指纹、行数、输出分区和质量统计；
+再次运行时跳过未变化的文件，只处理新增或修改的文件并替换它们对应的 labs_long 分区
+
+输出目录结构:
+    labs_long_<profile_id>/<源文件名>_<路径哈希>_<时间戳>.<扩展名>   每个源文件一个分区
+    .lis_manifest/<profile_id>/manifest.json                          运行清单
+    .lis_manifest/<profile_id>/qc/<路径哈希>.pkl                       各文件的质量统计（QCAccumulator）
+"""
+import os
+import json
+import pickle
+import hashlib
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .constants import ExportConfig, ManifestConfig
+from .file_cache import hash_file
+from .logger import get_logger
+from .output_writer import OutputWriter, create_output_writer
+from .qc_reporter import QCAccumulator
+
+logger = get_logger(__name__)
+
+
+def config_hash(profile: Dict, output_options: Dict) -> str:
+    """影响输出内容的配置哈希（profile 或输出格式变化时需要全部重新处理）"""
+    options = {key: value for key, value in output_options.items()
+               if key not in ManifestConfig.IGNORED_OUTPUT_OPTIONS}
+    profile = {key: value for key, value in profile.items()
+               if key not in ('output_options', 'description')}
+    payload = json.dumps(
+        [ManifestConfig.FORMAT_VERSION, profile, options],
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def _path_hash(path: str) -> str:
+    return hashlib.sha1(path.encode('utf-8')).hexdigest()[:8]
+
+
+class RunManifest:
+    """
+    增量抽取的运行清单
+
+    以源文件的绝对路径为键，记录 {size, mtime_ns, content_hash, raw_rows, rows, files, qc_file, run_id}；
+    大小和修改时间未变时不计算内容哈希，修改时间变化但内容相同的文件也视为未变化
+    """
+
+    def __init__(self, output_dir: str, profile_id: str, config_hash: str):
+        """
+        Args:
+            output_dir: 输出目录
+            profile_id: profile ID（每个 profile 单独一份清单）
+            config_hash: 当前配置哈希，与清单记录的不一致时全部重新处理
+        """
+        self.output_dir = output_dir
+        self.profile_id = profile_id
+        self.config_hash = config_hash
+        self.root = Path(output_dir) / ManifestConfig.DIRNAME / profile_id
+        self.path = self.root / 'manifest.json'
+        self.partition_dir = Path(output_dir) / f'{ExportConfig.LABS_LONG_PREFIX}{profile_id}'
+        self.entries: Dict[str, Dict] = {}
+        self.config_changed = False
+
+    def load(self):
+        """
+        读取清单
+
+        配置已变化（或清单版本不同）时删除旧的分区和质量统计，清单从空开始
+        """
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取运行清单失败，将重新处理全部文件: {e}")
+            return
+
+        entries = data.get('entries', {})
+        if data.get('config_hash') == self.config_hash:
+            self.entries = entries
+            return
+
+        self.config_changed = True
+        for entry in entries.values():
+            self._remove_outputs(entry)
+        self.save()
+
+    def save(self):
+        """原子写入清单"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.path.with_suffix('.tmp')
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump({
+                'profile_id': self.profile_id,
+                'config_hash': self.config_hash,
+                'updated': datetime.now().isoformat(timespec='seconds'),
+                'entries': self.entries,
+            }, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.path)
+
+    def plan(self, files: List[str]) -> Tuple[List[str], List[str], List[str]]:
+        """
+        比较清单和当前文件
+
+        Returns:
+            (需要处理的文件, 未变化的文件, 清单中有但已不存在的源文件)
+        """
+        pending, unchanged = [], []
+        current = set()
+        touched = False
+        for file_path in files:
+            path = os.path.abspath(file_path)
+            current.add(path)
+            entry = self.entries.get(path)
+            if entry is None or not self._outputs_exist(entry):
+                pending.append(file_path)
+                continue
+
+            stat = os.stat(path)
+            if entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+                unchanged.append(file_path)
+            elif entry['size'] == stat.st_size and entry['content_hash'] == hash_file(path):
+                # 只有修改时间变化（如重新复制），内容相同
+                entry['mtime_ns'] = stat.st_mtime_ns
+                touched = True
+                unchanged.append(file_path)
+            else:
+                pending.append(file_path)
+
+        if touched:
+            self.save()
+        missing = [path for path in self.entries if path not in current]
+        return pending, unchanged, missing
+
+    def _outputs_exist(self, entry: Dict) -> bool:
+        paths = [self.partition_dir / name for name in entry.get('files', [])]
+        paths.append(self.root / entry['qc_file'])
+        return all(path.exists() for path in paths)
+
+    def record(self, file_path: str, fingerprint: Dict, raw_rows: int, rows: int,
+               files: List[str], qc: QCAccumulator, run_id: str):
+        """
+        记录一个处理完成的文件，删除它被替换的旧分区并立即保存清单
+        """
+        path = os.path.abspath(file_path)
+        qc_file = f"qc/{_path_hash(path)}.pkl"
+        qc_path = self.root / qc_file
+        qc_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(qc_path, 'wb') as f:
+            pickle.dump(qc, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+        names = [os.path.relpath(name, self.partition_dir) for name in files]
+        old = self.entries.get(path)
+        if old is not None:
+            self._remove_outputs(old, keep=set(names) | {qc_file})
+
+        self.entries[path] = {
+            **fingerprint,
+            'raw_rows': raw_rows,
+            'rows': rows,
+            'files': names,
+            'qc_file': qc_file,
+            'run_id': run_id,
+        }
+        self.save()
+
+    def _remove_outputs(self, entry: Dict, keep: frozenset = frozenset()):
+        for name in entry.get('files', []):
+            if name not in keep:
+                (self.partition_dir / name).unlink(missing_ok=True)
+        qc_file = entry.get('qc_file')
+        if qc_file and qc_file not in keep:
+            (self.root / qc_file).unlink(missing_ok=True)
+
+    def ordered_entries(self, files: List[str]) -> List[Dict]:
+        """清单条目：先按当前文件顺序，再接上已不存在的源文件"""
+        order = [os.path.abspath(path) for path in files]
+        current = set(order)
+        order += [path for path in self.entries if path not in current]
+        return [self.entries[path] for path in order if path in self.entries]
+
+    def output_files(self, files: List[str]) -> List[str]:
+        """所有分区文件的路径"""
+        return [str(self.partition_dir / name)
+                for entry in self.ordered_entries(files) for name in entry['files']]
+
+    def total_rows(self) -> int:
+        return sum(entry['rows'] for entry in self.entries.values())
+
+    def merged_qc(self, files: List[str]) -> QCAccumulator:
+        """合并所有文件的质量统计（结果与一次性处理全部文件相同）"""
+        merged = QCAccumulator()
+        for entry in self.ordered_entries(files):
+            with open(self.root / entry['qc_file'], 'rb') as f:
+                merged.merge(pickle.load(f))
+        return merged
+
+
+def file_fingerprint(file_path: str) -> Dict:
+    """清单中记录的文件指纹"""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns,
+            'content_hash': hash_file(file_path)}
+
+
+class IncrementalOutput:
+    """
+    按源文件分区写入 labs_long
+
+    每个源文件在第一次写入时创建自己的输出文件；文件处理成功后关闭并记录到清单
+    （替换旧分区），失败或取消时丢弃本次写入的内容，清单中的旧分区保持不变
+    """
+
+    def __init__(self, manifest: RunManifest, columns: List[str],
+                 output_options: Dict, timestamp: str, run_id: str):
+        self.manifest = manifest
+        self.columns = columns
+        self.output_options = output_options
+        self.timestamp = timestamp
+        self.run_id = run_id
+        self._writers: Dict[str, OutputWriter] = {}
+        self._fingerprints: Dict[str, Dict] = {}
+
+    def begin_file(self, file_path: str):
+        """开始处理文件前记录指纹（处理过程中文件被修改时，下次运行会重新处理）"""
+        self._fingerprints[file_path] = file_fingerprint(file_path)
+
+    def writer_for(self, file_path: str) -> OutputWriter:
+        writer = self._writers.get(file_path)
+        if writer is None:
+            path = os.path.abspath(file_path)
+            stem = Path(file_path).stem
+            self.manifest.partition_dir.mkdir(parents=True, exist_ok=True)
+            writer = create_output_writer(
+                str(self.manifest.partition_dir), f"{stem}_{_path_hash(path)}_{self.timestamp}",
+                self.columns, self.output_options
+            )
+            self._writers[file_path] = writer
+        return writer
+
+    def finish_file(self, file_path: str, ok: bool, qc: QCAccumulator):
+        """文件处理结束：成功时关闭分区并记录到清单，失败时丢弃"""
+        writer = self._writers.pop(file_path, None)
+        fingerprint = self._fingerprints.pop(file_path, None)
+        if not ok or fingerprint is None:
+            if writer is not None:
+                writer.discard()
+            return
+
+        files, rows = [], 0
+        if writer is not None:
+            rows = writer.rows_written
+            files = writer.close()
+        self.manifest.record(file_path, fingerprint, qc.raw_rows, rows, files, qc, self.run_id)
+
+    def discard(self):
+        """丢弃尚未完成的分区"""
+        for writer in self._writers.values():
+            writer.discard()
+        self._writers.clear()
+        self._fingerprints.clear()
@@ -0,0 +1,264 @@
+"""
+阶段计时模块
+按处理阶段累计耗时、CPU 时间、行数和峰值内存（RSS），用于抽取流程的性能统计和基准测试；
+RunProfiler 对单次运行做函数级的性能剖析
+"""
+import io
+import os
+import threading
+import time
+from contextlib import contextmanager
+from importlib.util import find_spec
+from typing import Dict, List, Optional, Sequence
+
+from .constants import MetricsConfig
+
+_HAS_PSUTIL = find_spec('psutil') is not None
+_HAS_PYINSTRUMENT = find_spec('pyinstrument') is not None
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss() -> Optional[int]:
+    """
+    当前进程的常驻内存（字节）
+
+    优先使用 psutil（如已安装），否则读取 /proc/self/statm；都不可用时返回 None
+    """
+    if _HAS_PSUTIL:
+        import psutil
+        return psutil.Process().memory_info().rss
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+class StageRecord:
+    """一次进入阶段的记录（阶段内可以补充输入、输出的行数；rows_out 为 None 时等于 rows）"""
+    __slots__ = ('name', 'rows', 'rows_out', 'start', 'start_cpu', 'start_rss')
+
+    def __init__(self, name: str, rows: int = 0):
+        self.name = name
+        self.rows = rows
+        self.rows_out: Optional[int] = None
+        self.start = self.start_cpu = 0.0
+        self.start_rss: Optional[int] = None
+
+
+class StageTimer:
+    """
+    按阶段累计耗时、CPU 时间、输入输出行数、RSS 变化和峰值 RSS（可合并，多进程时由主进程汇总）
+
+    同一阶段可以多次进入（如每个数据块一次），结果累加；
+    峰值 RSS 取进入、退出阶段时的读数，调用 start_sampling() 后还包括后台线程定时采样的读数
+    """
+
+    def __init__(self, order: Sequence[str] = MetricsConfig.STAGES):
+        """
+        Args:
+            order: 摘要中排在前面的阶段顺序（其余按首次进入的顺序）
+        """
+        self.order = tuple(order)
+        self.stages: Dict[str, Dict] = {}
+        self._active: List[str] = []
+        self._lock = threading.Lock()
+        self._sampler: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def __getstate__(self):
+        # 只传递累计结果（采样线程和锁不能序列化）
+        return {'order': self.order, 'stages': self.stages}
+
+    def __setstate__(self, state):
+        self.__init__(state['order'])
+        self.stages = state['stages']
+
+    def _stats(self, name: str) -> Dict:
+        return self.stages.setdefault(name, {
+            'calls': 0, 'rows': 0, 'rows_out': 0, 'seconds': 0.0, 'cpu_seconds': 0.0,
+            'rss_delta': 0, 'peak_rss': None,
+        })
+
+    def _update_peak(self, names, rss: Optional[int]):
+        if rss is None:
+            return
+        for name in names:
+            stats = self._stats(name)
+            if stats['peak_rss'] is None or rss > stats['peak_rss']:
+                stats['peak_rss'] = rss
+
+    @contextmanager
+    def stage(self, name: str, rows: int = 0):
+        """
+        计时一个阶段
+
+        Args:
+            name: 阶段名称
+            rows: 该阶段输入的行数（也可以在阶段内设置返回对象的 rows、rows_out）
+        """
+        record = self.start(name, rows)
+        try:
+            yield record
+        finally:
+            self.stop(record)
+
+    def start(self, name: str, rows: int = 0) -> StageRecord:
+        """开始一个阶段（不便使用 with 时与 stop() 配对调用）"""
+        record = StageRecord(name, rows)
+        record.start_rss = current_rss()
+        with self._lock:
+            self._active.append(name)
+            self._update_peak([name], record.start_rss)
+        record.start, record.start_cpu = time.perf_counter(), time.process_time()
+        return record
+
+    def stop(self, record: StageRecord):
+        """结束 start() 开始的阶段并累计"""
+        seconds = time.perf_counter() - record.start
+        cpu_seconds = time.process_time() - record.start_cpu
+        rss = current_rss()
+        with self._lock:
+            self._active.remove(record.name)
+            self._update_peak([record.name], rss)
+            stats = self._stats(record.name)
+            stats['calls'] += 1
+            stats['rows'] += record.rows
+            stats['rows_out'] += record.rows if record.rows_out is None else record.rows_out
+            stats['seconds'] += seconds
+            stats['cpu_seconds'] += cpu_seconds
+            if rss is not None and record.start_rss is not None:
+                stats['rss_delta'] += rss - record.start_rss
+
+    def record(self, name: str, calls: int = 0, rows: int = 0, rows_out: int = 0,
+               seconds: float = 0.0, cpu_seconds: float = 0.0, rss_delta: int = 0,
+               peak_rss: Optional[int] = None):
+        """直接累计一个阶段的统计（合并时使用）"""
+        with self._lock:
+            stats = self._stats(name)
+            stats['calls'] += calls
+            stats['rows'] += rows
+            stats['rows_out'] += rows_out
+            stats['seconds'] += seconds
+            stats['cpu_seconds'] += cpu_seconds
+            stats['rss_delta'] += rss_delta
+            self._update_peak([name], peak_rss)
+
+    def merge(self, other: 'StageTimer'):
+        """合并另一个计时器（耗时按阶段累加，峰值 RSS 取各进程的最大值）"""
+        for name, stats in other.stages.items():
+            self.record(name, **stats)
+
+    def start_sampling(self, interval: float = MetricsConfig.RSS_SAMPLE_SECONDS):
+        """启动后台线程，按间隔采样 RSS 并计入当前进行中的阶段的峰值"""
+        if self._sampler is not None or current_rss() is None:
+            return
+        self._stop.clear()
+
+        def sample():
+            while not self._stop.wait(interval):
+                rss = current_rss()
+                with self._lock:
+                    self._update_peak(set(self._active), rss)
+
+        self._sampler = threading.Thread(target=sample, name='rss-sampler', daemon=True)
+        self._sampler.start()
+
+    def stop_sampling(self):
+        """停止后台采样"""
+        if self._sampler is None:
+            return
+        self._stop.set()
+        self._sampler.join()
+        self._sampler = None
+
+    def summary(self) -> Dict[str, Dict]:
+        """
+        每个阶段的累计量、吞吐量（输入行/秒）、RSS 变化和峰值 RSS（MB）
+
+        构造时 order 中的阶段按其顺序排在前面，其余按首次进入的顺序
+        """
+        order = {name: i for i, name in enumerate(self.order)}
+        result = {}
+        for name in sorted(self.stages, key=lambda name: order.get(name, len(order))):
+            stats = self.stages[name]
+            seconds = stats['seconds']
+            peak_rss = stats['peak_rss']
+            result[name] = {
+                'calls': stats['calls'],
+                'rows': stats['rows'],
+                'rows_out': stats['rows_out'],
+                'seconds': round(seconds, 3),
+                'cpu_seconds': round(stats['cpu_seconds'], 3),
+                'rows_per_second': round(stats['rows'] / seconds) if seconds else 0,
+                'rss_delta_mb': round(stats['rss_delta'] / 1024 ** 2, 1),
+                'peak_rss_mb': round(peak_rss / 1024 ** 2, 1) if peak_rss is not None else None,
+            }
+        return result
+
+
+class RunProfiler:
+    """
+    单次运行的性能剖析（cProfile 或 pyinstrument，只剖析调用 start() 的线程）
+
+    cProfile 保存 .prof（可用 snakeviz 等工具查看）和按累计耗时排序的 .txt 摘要；
+    pyinstrument 保存 .html
+    """
+
+    def __init__(self, kind: str):
+        """
+        Args:
+            kind: MetricsConfig.PROFILERS 之一
+
+        Raises:
+            ValueError: 未知的剖析工具或 pyinstrument 未安装
+        """
+        if kind not in MetricsConfig.PROFILERS:
+            raise ValueError(f"未知的性能剖析工具: {kind}（可选: {', '.join(MetricsConfig.PROFILERS)}）")
+        if kind == 'pyinstrument' and not _HAS_PYINSTRUMENT:
+            raise ValueError("未安装 pyinstrument（pip install pyinstrument），可改用 cprofile")
+        self.kind = kind
+        self._profiler = None
+
+    @property
+    def running(self) -> bool:
+        return self._profiler is not None
+
+    def start(self):
+        if self.kind == 'cprofile':
+            import cProfile
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        else:
+            from pyinstrument import Profiler
+            self._profiler = Profiler()
+            self._profiler.start()
+
+    def stop(self, path_prefix: str) -> str:
+        """
+        停止剖析并保存结果
+
+        Args:
+            path_prefix: 输出文件路径（不含扩展名）
+
+        Returns:
+            主要结果文件的路径（.prof 或 .html）
+        """
+        profiler, self._profiler = self._profiler, None
+        if self.kind == 'cprofile':
+            import pstats
+            profiler.disable()
+            path = f'{path_prefix}.prof'
+            profiler.dump_stats(path)
+            text = io.StringIO()
+            stats = pstats.Stats(profiler, stream=text)
+            stats.sort_stats('cumulative').print_stats(MetricsConfig.PROFILE_TOP_FUNCTIONS)
+            with open(f'{path_prefix}.txt', 'w', encoding='utf-8') as f:
+                f.write(text.getvalue())
+            return path
+
+        profiler.stop()
+        path = f'{path_prefix}.html'
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(profiler.output_html())
+        return path
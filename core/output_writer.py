@@ -0,0 +1,563 @@
+"""
+输出写入模块
+逐块追加写入结果文件，避免在内存中保留完整的结果表
+支持 Excel、Parquet、Feather (Arrow IPC) 和 CSV 格式
+"""
+import codecs
+import os
+import pickle
+import sys
+import tempfile
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+from .constants import ExportConfig, StreamingConfig
+
+
+class OutputWriter:
+    """
+    输出写入器基类
+
+    子类实现 _write_frame 和 close；
+    write() 按列统一每个块，close() 返回生成的全部文件
+    """
+
+    extension = ''
+
+    def __init__(self, output_dir: str, basename: str, columns: List[str]):
+        """
+        Args:
+            output_dir: 输出目录
+            basename: 文件名（不含扩展名），如 labs_long_20240101_120000
+            columns: 输出列（每个块按此顺序写入，缺失的列留空）
+        """
+        self.output_dir = output_dir
+        self.basename = basename
+        self.columns = list(columns)
+        self.rows_written = 0
+        self.files: List[str] = []
+
+    @property
+    def output_path(self) -> str:
+        """第一个输出文件的路径"""
+        return self.files[0] if self.files else self._file_path(1)
+
+    def _file_path(self, part: int) -> str:
+        """第 part 个输出文件的路径（从第 2 个开始加 _partN 后缀）"""
+        suffix = '' if part == 1 else f'_part{part}'
+        return os.path.join(self.output_dir, f'{self.basename}{suffix}{self.extension}')
+
+    def write(self, df: pd.DataFrame):
+        """追加写入一个数据块"""
+        if df.empty:
+            return
+        if list(df.columns) != self.columns:
+            df = df.reindex(columns=self.columns)
+        self._write_frame(df)
+        self.rows_written += len(df)
+
+    def _write_frame(self, df: pd.DataFrame):
+        raise NotImplementedError
+
+    def close(self) -> List[str]:
+        """完成写入，返回生成的文件列表"""
+        raise NotImplementedError
+
+    def discard(self):
+        """放弃写入（取消或失败时调用），删除本次已生成的文件"""
+        for path in self.files:
+            if os.path.exists(path):
+                os.remove(path)
+        self.files = []
+
+
+class ExcelStreamWriter(OutputWriter):
+    """
+    Excel 流式写入器
+
+    使用 openpyxl 的 write-only 模式，已写入的行暂存在临时文件中，
+    内存占用与总行数无关；close() 时生成最终文件。
+    超过单个工作表的行数上限时自动切换到新的工作表（split='sheet'）或新的文件（split='file'）。
+    """
+
+    extension = '.xlsx'
+
+    def __init__(self, output_dir: str, basename: str, columns: List[str],
+                 split: str = ExportConfig.EXCEL_SPLIT,
+                 max_rows: int = StreamingConfig.EXCEL_MAX_ROWS):
+        """
+        Args:
+            split: 超过行数上限时的拆分方式（'sheet' 或 'file'）
+            max_rows: 每个工作表的最大行数（含表头）
+        """
+        super().__init__(output_dir, basename, columns)
+        if split not in ('sheet', 'file'):
+            raise ValueError(f"不支持的 Excel 拆分方式: {split}")
+        self.split = split
+        self.max_rows = max_rows
+        self._workbook = None
+        self._sheet = None
+        self._sheet_rows = 0
+        self._pending_files = []
+        self._new_workbook()
+
+    def _new_workbook(self):
+        from openpyxl import Workbook
+
+        self._workbook = Workbook(write_only=True)
+        self._pending_files.append(self._file_path(len(self._pending_files) + 1))
+        self._new_sheet()
+
+    def _new_sheet(self):
+        sheet_name = f'Sheet{len(self._workbook.worksheets) + 1}'
+        self._sheet = self._workbook.create_sheet(sheet_name)
+        self._sheet.append(self._header_cells())
+        self._sheet_rows = 1
+
+    def _header_cells(self) -> list:
+        """表头单元格（样式与 DataFrame.to_excel 一致）"""
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, Side
+
+        thin = Side(style='thin')
+        cells = []
+        for column in self.columns:
+            cell = WriteOnlyCell(self._sheet, value=column)
+            cell.font = Font(bold=True)
+            cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+            cell.alignment = Alignment(horizontal='center', vertical='top')
+            cells.append(cell)
+        return cells
+
+    def _write_frame(self, df: pd.DataFrame):
+        column_values = [self._cell_values(df[col]) for col in self.columns]
+        rows = zip(*column_values)
+
+        remaining = len(df)
+        while remaining:
+            capacity = self.max_rows - self._sheet_rows
+            if capacity <= 0:
+                self._roll_over()
+                continue
+
+            count = min(capacity, remaining)
+            for _ in range(count):
+                self._sheet.append(next(rows))
+            self._sheet_rows += count
+            remaining -= count
+
+    def _roll_over(self):
+        """当前工作表已满，切换到新的工作表或文件"""
+        if self.split == 'sheet':
+            self._new_sheet()
+            return
+        self._workbook.save(self._pending_files[-1])
+        self.files.append(self._pending_files[-1])
+        self._new_workbook()
+
+    @staticmethod
+    def _cell_values(series: pd.Series):
+        """将一列转为可写入单元格的 Python 值（缺失值为 None）"""
+        values = series.astype(object).to_numpy()
+        values[series.isna().to_numpy()] = None
+        return values
+
+    def close(self) -> List[str]:
+        """生成最终文件"""
+        self._workbook.save(self._pending_files[-1])
+        self.files.append(self._pending_files[-1])
+        return self.files
+
+    def discard(self):
+        self._workbook.close()
+        super().discard()
+
+
+class ArrowStreamWriter(OutputWriter):
+    """
+    Arrow 列式写入器基类（Parquet / Feather）
+
+    列式格式要求所有块的类型一致：value_numeric 为 float64、sample_datetime 为时间戳，
+    ExportConfig.CATEGORICAL_COLUMNS 为字符串字典，其余列统一写为字符串
+    （原始列在不同文件、不同块中的类型可能不同）
+    """
+
+    # 是否所有块共用一份不断追加的字典（Arrow IPC 文件只允许追加字典，不允许替换）
+    shared_dictionaries = False
+
+    def __init__(self, output_dir: str, basename: str, columns: List[str]):
+        super().__init__(output_dir, basename, columns)
+        self.schema = self._build_schema()
+        self._writer = None
+        self._dictionaries = {}  # {列名: ({值: 编码}, 字典数组)}
+
+    def _build_schema(self):
+        import pyarrow as pa
+
+        fields = []
+        for column in self.columns:
+            if column == 'value_numeric':
+                fields.append(pa.field(column, pa.float64()))
+            elif column == 'sample_datetime':
+                fields.append(pa.field(column, pa.timestamp('ns')))
+            elif column in ExportConfig.CATEGORICAL_COLUMNS:
+                fields.append(pa.field(column, pa.dictionary(pa.int32(), pa.string())))
+            else:
+                fields.append(pa.field(column, pa.string()))
+        return pa.schema(fields)
+
+    def _to_table(self, df: pd.DataFrame):
+        """按固定 schema 将块转为 Arrow 表"""
+        import pyarrow as pa
+
+        arrays = []
+        for field in self.schema:
+            series = df[field.name]
+            if pa.types.is_dictionary(field.type):
+                arrays.append(self._dictionary_array(field.name, series))
+            elif pa.types.is_string(field.type):
+                arrays.append(self._string_array(series))
+            elif pa.types.is_timestamp(field.type):
+                arrays.append(pa.array(pd.to_datetime(series, errors='coerce'), type=field.type))
+            else:
+                arrays.append(pa.array(pd.to_numeric(series, errors='coerce'), type=field.type,
+                                       from_pandas=True))
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+    @staticmethod
+    def _string_array(series: pd.Series):
+        """将一列转为 Arrow 字符串数组（已经全是字符串时直接转换，不逐个调用 str）"""
+        import pyarrow as pa
+
+        if infer_dtype(series, skipna=True) in ('string', 'empty'):
+            return pa.array(series, type=pa.string(), from_pandas=True)
+        values = series.astype(object).to_numpy()
+        missing = series.isna().to_numpy()
+        values[~missing] = [str(value) for value in values[~missing]]
+        values[missing] = None
+        return pa.array(values, type=pa.string())
+
+    def _dictionary_array(self, name: str, series: pd.Series):
+        """
+        将一列转为字典编码的 Arrow 数组
+
+        categorical 列直接使用其编码，只把块中出现的类别转为字符串（不同类型的类别可能得到相同的字符串）；
+        其他列先转为字符串再 factorize
+        """
+        import pyarrow as pa
+
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            codes = series.cat.codes.to_numpy()
+            categories = series.cat.categories
+            used = np.bincount(codes[codes >= 0], minlength=len(categories)) > 0
+            mapping = np.full(len(categories), -1, dtype=np.int64)
+            mapping[used], values = pd.factorize(categories[used].map(str))
+            codes = self._remap(codes, mapping)
+        else:
+            codes, values = pd.factorize(series.map(str, na_action='ignore'))
+        values = np.asarray(values, dtype=object)
+
+        if self.shared_dictionaries:
+            known, dictionary = self._dictionaries.get(name, ({}, pa.array([], type=pa.string())))
+            before = len(known)
+            mapping = np.fromiter((known.setdefault(value, len(known)) for value in values),
+                                  dtype=np.int64, count=len(values))
+            if len(known) > before:
+                new_values = pa.array(values[mapping >= before], type=pa.string())
+                dictionary = pa.concat_arrays([dictionary, new_values])
+            self._dictionaries[name] = (known, dictionary)
+            codes = self._remap(codes, mapping)
+        else:
+            dictionary = pa.array(values, type=pa.string())
+
+        indices = pa.array(codes.astype(np.int32), mask=codes < 0)
+        return pa.DictionaryArray.from_arrays(indices, dictionary)
+
+    @staticmethod
+    def _remap(codes: np.ndarray, mapping: np.ndarray) -> np.ndarray:
+        """按 mapping 转换编码（-1 表示缺失值，保持不变）"""
+        result = np.full(len(codes), -1, dtype=np.int64)
+        valid = codes >= 0
+        result[valid] = mapping[codes[valid]]
+        return result
+
+
+class ParquetStreamWriter(ArrowStreamWriter):
+    """
+    Parquet 流式写入器
+
+    块先在内存中积累到 row_group_size 行再写出一个行组，
+    行组大小与块大小无关，内存占用不超过一个行组
+    """
+
+    extension = '.parquet'
+
+    def __init__(self, output_dir: str, basename: str, columns: List[str],
+                 compression: str = ExportConfig.PARQUET_COMPRESSION,
+                 row_group_size: int = ExportConfig.PARQUET_ROW_GROUP_SIZE):
+        """
+        Args:
+            compression: 压缩方式（snappy / zstd / gzip / lz4 / none）
+            row_group_size: 每个行组的行数
+        """
+        super().__init__(output_dir, basename, columns)
+        self.compression = compression
+        self.row_group_size = row_group_size
+        self._buffer = []
+        self._buffer_rows = 0
+
+    def _write_frame(self, df: pd.DataFrame):
+        self._buffer.append(self._to_table(df))
+        self._buffer_rows += len(df)
+        if self._buffer_rows >= self.row_group_size:
+            self._flush(final=False)
+
+    def _flush(self, final: bool):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if self._writer is None:
+            path = self._file_path(1)
+            self._writer = pq.ParquetWriter(path, self.schema, compression=self.compression)
+            self.files.append(path)
+
+        table = pa.concat_tables(self._buffer) if self._buffer else self.schema.empty_table()
+        # 不满一个行组的尾部留到下次写入
+        full_rows = len(table) if final else len(table) - len(table) % self.row_group_size
+        if full_rows:
+            self._writer.write_table(table.slice(0, full_rows), row_group_size=self.row_group_size)
+
+        rest = table.slice(full_rows)
+        self._buffer = [rest] if len(rest) else []
+        self._buffer_rows = len(rest)
+
+    def close(self) -> List[str]:
+        self._flush(final=True)
+        self._writer.close()
+        return self.files
+
+    def discard(self):
+        if self._writer is not None:
+            self._writer.close()
+        super().discard()
+
+
+class FeatherStreamWriter(ArrowStreamWriter):
+    """Feather v2 (Arrow IPC 文件) 流式写入器"""
+
+    extension = '.feather'
+    shared_dictionaries = True
+
+    def __init__(self, output_dir: str, basename: str, columns: List[str],
+                 compression: str = ExportConfig.FEATHER_COMPRESSION):
+        """
+        Args:
+            compression: 压缩方式（lz4 / zstd / none）
+        """
+        super().__init__(output_dir, basename, columns)
+        self.compression = None if compression in (None, 'none') else compression
+
+    def _open(self):
+        import pyarrow as pa
+
+        path = self._file_path(1)
+        options = pa.ipc.IpcWriteOptions(compression=self.compression, emit_dictionary_deltas=True)
+        self._writer = pa.ipc.new_file(path, self.schema, options=options)
+        self.files.append(path)
+
+    def _write_frame(self, df: pd.DataFrame):
+        if self._writer is None:
+            self._open()
+        self._writer.write_table(self._to_table(df))
+
+    def close(self) -> List[str]:
+        if self._writer is None:
+            self._open()
+        self._writer.close()
+        return self.files
+
+    def discard(self):
+        if self._writer is not None:
+            self._writer.close()
+        super().discard()
+
+
+class CSVStreamWriter(OutputWriter):
+    """
+    CSV 流式写入器
+
+    每个块直接追加到文件末尾；设置 max_rows_per_file 时按行数拆分为多个文件
+    """
+
+    extension = '.csv'
+
+    def __init__(self, output_dir: str, basename: str, columns: List[str],
+                 encoding: str = ExportConfig.CSV_ENCODING,
+                 max_rows_per_file: Optional[int] = None):
+        """
+        Args:
+            encoding: 文件编码（默认带 BOM 的 UTF-8，Excel 可直接打开中文）
+            max_rows_per_file: 每个文件的最大数据行数（None 表示不拆分）
+
+        Raises:
+            ValueError: 编码不存在，或 max_rows_per_file 不是正整数
+        """
+        super().__init__(output_dir, basename, columns)
+        try:
+            self.encoding = codecs.lookup(encoding).name
+        except LookupError:
+            raise ValueError(f"不支持的 CSV 编码: {encoding}")
+        self._append_encoding = self._without_bom(self.encoding)
+        if max_rows_per_file is not None and max_rows_per_file <= 0:
+            raise ValueError(f"csv_max_rows_per_file 必须大于 0: {max_rows_per_file}")
+        self.max_rows_per_file = max_rows_per_file
+        self._file_rows = 0
+
+    @staticmethod
+    def _without_bom(encoding: str) -> str:
+        """追加写入时使用的编码：带 BOM 的编码改为同一字节序的无 BOM 编码（BOM 只在文件开头写一次）"""
+        if encoding == 'utf-8-sig':
+            return 'utf-8'
+        if encoding in ('utf-16', 'utf-32'):
+            return f"{encoding}-{'le' if sys.byteorder == 'little' else 'be'}"
+        return encoding
+
+    def _new_file(self):
+        path = self._file_path(len(self.files) + 1)
+        pd.DataFrame(columns=self.columns).to_csv(path, index=False, encoding=self.encoding)
+        self.files.append(path)
+        self._file_rows = 0
+
+    def _write_frame(self, df: pd.DataFrame):
+        if not self.files:
+            self._new_file()
+
+        start = 0
+        while start < len(df):
+            if self.max_rows_per_file and self._file_rows >= self.max_rows_per_file:
+                self._new_file()
+
+            capacity = (self.max_rows_per_file - self._file_rows
+                        if self.max_rows_per_file else len(df) - start)
+            part = df.iloc[start:start + capacity]
+            # 追加模式下不重复写 BOM
+            part.to_csv(self.files[-1], mode='a', header=False, index=False,
+                        encoding=self._append_encoding)
+            self._file_rows += len(part)
+            start += len(part)
+
+    def close(self) -> List[str]:
+        if not self.files:
+            self._new_file()
+        return self.files
+
+
+class StagedOutput:
+    """
+    按源文件暂存输出块：源文件全部读取成功后才写入目标写入器，读取失败时丢弃，
+    输出中不会留下被跳过文件的部分数据
+
+    暂存的行数不超过 max_memory_rows 时保留在内存中，超过后依次写入临时文件，
+    内存占用仍与块大小成正比
+    """
+
+    def __init__(self, writer: OutputWriter, max_memory_rows: int):
+        """
+        Args:
+            writer: 目标写入器
+            max_memory_rows: 内存中最多暂存的行数
+        """
+        self.writer = writer
+        self.max_memory_rows = max_memory_rows
+        self._chunks: List[pd.DataFrame] = []
+        self._rows = 0
+        self._spool = None
+        self._spooled = 0
+
+    def write(self, df: pd.DataFrame):
+        """暂存一个数据块"""
+        if df.empty:
+            return
+        self._chunks.append(df)
+        self._rows += len(df)
+        if self._rows > self.max_memory_rows:
+            self._spill()
+
+    def _spill(self):
+        """把内存中的块写入临时文件"""
+        if self._spool is None:
+            self._spool = tempfile.TemporaryFile()
+        for df in self._chunks:
+            pickle.dump(df, self._spool, protocol=pickle.HIGHEST_PROTOCOL)
+        self._spooled += len(self._chunks)
+        self._chunks, self._rows = [], 0
+
+    def commit(self):
+        """按暂存顺序写入目标写入器"""
+        if self._spool is not None:
+            self._spool.seek(0)
+            for _ in range(self._spooled):
+                self.writer.write(pickle.load(self._spool))
+        for df in self._chunks:
+            self.writer.write(df)
+        self.discard()
+
+    def discard(self):
+        """丢弃暂存的块"""
+        if self._spool is not None:
+            self._spool.close()
+        self._chunks, self._rows = [], 0
+        self._spool, self._spooled = None, 0
+
+
+def resolve_output_format(output_options: Optional[Dict] = None) -> str:
+    """output_options 中的输出格式（未指定时为默认格式，不支持时抛出 ValueError）"""
+    options = output_options or {}
+    output_format = str(options.get('format') or ExportConfig.DEFAULT_FORMAT).lower()
+    if output_format not in ExportConfig.OUTPUT_FORMATS:
+        raise ValueError(f"不支持的输出格式: {output_format}（可选: {', '.join(ExportConfig.OUTPUT_FORMATS)}）")
+    return output_format
+
+
+def create_output_writer(output_dir: str, basename: str, columns: List[str],
+                         output_options: Optional[Dict] = None) -> OutputWriter:
+    """
+    根据 output_options 创建输出写入器
+
+    output_options 示例:
+        format: parquet              # excel / parquet / feather / csv
+        compression: zstd           # parquet / feather 压缩方式
+        row_group_size: 100000      # parquet 行组大小
+        excel_split: sheet          # excel 超过行数上限时按 sheet 或 file 拆分
+        csv_encoding: utf-8-sig
+        csv_max_rows_per_file: 1000000
+    """
+    options = output_options or {}
+    output_format = resolve_output_format(options)
+
+    if output_format == 'excel':
+        return ExcelStreamWriter(
+            output_dir, basename, columns,
+            split=options.get('excel_split', ExportConfig.EXCEL_SPLIT)
+        )
+    if output_format == 'parquet':
+        return ParquetStreamWriter(
+            output_dir, basename, columns,
+            compression=options.get('compression', ExportConfig.PARQUET_COMPRESSION),
+            row_group_size=int(options.get('row_group_size', ExportConfig.PARQUET_ROW_GROUP_SIZE))
+        )
+    if output_format == 'feather':
+        return FeatherStreamWriter(
+            output_dir, basename, columns,
+            compression=options.get('compression', ExportConfig.FEATHER_COMPRESSION)
+        )
+    if output_format == 'csv':
+        return CSVStreamWriter(
+            output_dir, basename, columns,
+            encoding=options.get('csv_encoding', ExportConfig.CSV_ENCODING),
+            max_rows_per_file=(int(options['csv_max_rows_per_file'])
+                               if options.get('csv_max_rows_per_file') is not None else None)
+        )
@@ -0,0 +1,213 @@
+"""
+并行抽取模块
+将单个文件（或文件中的一个工作表）的 读取 → 映射 → 过滤 → 解析 分发到多个进程，
+结果以压缩的 Arrow IPC 缓冲区传回，并按文件顺序合并
+"""
+import multiprocessing
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+
+from .chunk_processor import ChunkProcessor
+from .compiled_profile import CompiledProfile
+from .constants import ParallelConfig
+from .qc_reporter import QCAccumulator
+
+# 子进程内复用的处理器（每个进程只加载一次规则和缓存）
+_worker_processor: Optional[ChunkProcessor] = None
+_worker_reader: Optional[str] = None
+_worker_use_cache: Optional[bool] = None
+
+
+def pack_frame(df: pd.DataFrame):
+    """
+    将 DataFrame 打包为压缩的 Arrow IPC 缓冲区
+
+    含混合类型 object 列等 Arrow 无法表示的数据时，原样返回 DataFrame（由 pickle 传输）
+    """
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        return ('pandas', df)
+
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=ParallelConfig.ARROW_COMPRESSION)
+    with pa.ipc.new_stream(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return ('arrow', sink.getvalue().to_pybytes())
+
+
+def unpack_frame(packed) -> pd.DataFrame:
+    """还原 pack_frame 打包的 DataFrame"""
+    kind, payload = packed
+    if kind == 'pandas':
+        return payload
+    return pa.ipc.open_stream(pa.py_buffer(payload)).read_all().to_pandas()
+
+
+def _init_worker(compiled: CompiledProfile, run_id: str, reader: Optional[str] = None,
+                 use_cache: Optional[bool] = None):
+    """子进程初始化：用主进程编译好的 profile 创建处理器，并记录新计算的缓存条目"""
+    global _worker_processor, _worker_reader, _worker_use_cache
+    _worker_processor = ChunkProcessor(compiled.profile, run_id, compiled=compiled)
+    _worker_reader = reader
+    _worker_use_cache = use_cache
+    for cache in _worker_processor.caches.values():
+        cache.track_new_entries = True
+
+
+def process_file(file_path: str, skip_rows: int, chunk_rows: Optional[int],
+                 pushdown: bool = False, sheet: int = 0, sheet_name: Optional[str] = None) -> Dict:
+    """
+    在子进程中处理单个文件的一个工作表
+
+    Args:
+        pushdown: 是否按 ChunkProcessor.read_plan() 只读取需要的列和行
+        sheet: 工作表序号（默认第一个）
+        sheet_name: 工作表名称（写入来源工作表列，见 ChunkProcessor.process）
+
+    Returns:
+        {
+            'file_path': 文件路径,
+            'sheet_name': 工作表名称,
+            'rows': 原始行数（含读取时跳过的行）,
+            'rows_skipped': 读取时跳过的行数,
+            'error': 读取失败时的错误信息（已处理的块仍然保留）,
+            'chunks': 打包后的 labs_long 块列表,
+            'qc': QCAccumulator,
+            'stats': ChunkProcessor 累计统计（含各阶段耗时 metrics）,
+            'cache': {namespace: (新条目, 命中数, 未命中数)},
+            'reader_stats': ReaderStats
+        }
+    """
+    from .data_loader import DataLoader
+
+    processor = _worker_processor
+    processor.reset_stats()
+    cache_counts = {name: (cache.hits, cache.misses) for name, cache in processor.caches.items()}
+
+    qc_stats = QCAccumulator()
+    chunks = []
+    rows = 0
+    error = None
+
+    loader = DataLoader(reader=_worker_reader, use_cache=_worker_use_cache)
+    plan = processor.read_plan() if pushdown else {'columns': None, 'row_filter': None}
+    qc_stats.projected = plan['columns'] is not None
+    chunks_iter = loader.iter_file_chunks(file_path, skip_rows, chunk_rows,
+                                          plan['columns'], plan['row_filter'], sheet)
+    metrics = processor.metrics
+    metrics.start_sampling()
+    try:
+        while True:
+            try:
+                with metrics.stage('load') as stage:
+                    df_raw = next(chunks_iter, None)
+                    stage.rows = 0 if df_raw is None else len(df_raw)
+            except Exception as e:
+                error = str(e)
+                break
+            if df_raw is None:
+                break
+
+            rows += len(df_raw)
+            labs_chunk = processor.process(df_raw, sheet_name)
+            with metrics.stage('qc', len(df_raw)):
+                qc_stats.add_raw(df_raw)
+                qc_stats.add_processed(labs_chunk)
+            if not labs_chunk.empty:
+                # 行数由主进程解包时计入
+                with metrics.stage('merge'):
+                    chunks.append(pack_frame(labs_chunk))
+    finally:
+        metrics.stop_sampling()
+
+    skipped = processor.record_skipped(plan['row_filter'])
+    qc_stats.add_skipped(skipped)
+
+    cache = {}
+    for name, cache_obj in processor.caches.items():
+        hits, misses = cache_counts[name]
+        cache[name] = (cache_obj.drain_new_entries(), cache_obj.hits - hits, cache_obj.misses - misses)
+
+    return {
+        'file_path': file_path,
+        'sheet_name': sheet_name,
+        'rows': rows + skipped,
+        'rows_skipped': skipped,
+        'error': error,
+        'chunks': chunks,
+        'qc': qc_stats,
+        'stats': processor.export_stats(),
+        'cache': cache,
+        'reader_stats': loader.reader_stats,
+    }
+
+
+def iter_file_results(sources: List[Tuple[str, int, Optional[str]]], compiled: CompiledProfile,
+                      run_id: str, skip_rows: int,
+                      chunk_rows: Optional[int], workers: int,
+                      is_cancelled: Callable[[], bool],
+                      on_file_done: Optional[Callable[[int, Dict], None]] = None,
+                      reader: Optional[str] = None,
+                      use_cache: Optional[bool] = None,
+                      pushdown: bool = False) -> Iterator[Tuple[int, Dict]]:
+    """
+    并行处理多个文件（同一文件的多个工作表分别作为独立的任务），按顺序依次返回结果
+
+    Args:
+        sources: [(文件路径, 工作表序号, 工作表名称), ...]
+        compiled: 编译后的 profile（传给各工作进程，不在子进程中重新编译）
+        run_id: 运行 ID
+        skip_rows: 表头前跳过的行数
+        chunk_rows: 每个数据块的最大行数
+        workers: 工作进程数
+        is_cancelled: 返回 True 时停止提交并取消未开始的任务
+        on_file_done: 每个任务处理完成时（按完成顺序）回调 (index, result)
+        reader: 优先使用的读取引擎
+        use_cache: 是否使用文件读取缓存（None 时按环境变量决定）
+        pushdown: 是否只读取需要的列，并在读取时跳过未选择项目的行
+
+    Yields:
+        (sources 中的序号, process_file 的结果)，序号严格递增
+    """
+    # 使用 spawn 启动子进程，避免在已有 Qt 线程的进程中 fork
+    context = multiprocessing.get_context('spawn')
+    executor = ProcessPoolExecutor(
+        max_workers=workers, mp_context=context,
+        initializer=_init_worker, initargs=(compiled, run_id, reader, use_cache)
+    )
+
+    try:
+        futures = {
+            executor.submit(process_file, file_path, skip_rows, chunk_rows, pushdown,
+                            sheet, sheet_name): idx
+            for idx, (file_path, sheet, sheet_name) in enumerate(sources)
+        }
+        pending = set(futures)
+        done_results = {}
+        next_index = 0
+
+        while next_index < len(sources):
+            if is_cancelled():
+                return
+
+            if next_index not in done_results:
+                finished, pending = wait(
+                    pending, timeout=ParallelConfig.POLL_INTERVAL_SECONDS,
+                    return_when=FIRST_COMPLETED
+                )
+                for future in finished:
+                    idx = futures[future]
+                    done_results[idx] = future.result()
+                    if on_file_done:
+                        on_file_done(idx, done_results[idx])
+                continue
+
+            # 按文件和工作表的顺序交出结果，保证输出与逐个处理时一致
+            yield next_index, done_results.pop(next_index)
+            next_index += 1
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,790 @@
+"""
+数据抽取流程
+整合所有模块，执行完整的 ETL 流程（不依赖 Qt，界面和命令行共用）
+"""
+import json
+import os
+import time
+import traceback
+from typing import Callable, List, Dict, Optional, Tuple, Union
+from datetime import datetime
+
+from .data_loader import DataLoader
+from .chunk_processor import ChunkProcessor
+from .compiled_profile import CompiledProfile
+from .manifest import IncrementalOutput, RunManifest, config_hash
+from .metrics import RunProfiler, StageTimer
+from .profile_manager import ProfileManager
+from .output_writer import OutputWriter, StagedOutput, create_output_writer, resolve_output_format
+from .qc_reporter import QCReporter, QCAccumulator
+from .parallel import iter_file_results, unpack_frame
+from .readers import backend_order
+from .constants import ExitCode, ExportConfig, ParallelConfig, StreamingConfig
+from .signals import Signal
+from .utils import generate_run_id
+
+
+class PipelineError(Exception):
+    """抽取流程错误（携带命令行退出码）"""
+
+    def __init__(self, message: str, exit_code: int = ExitCode.FAILURE):
+        super().__init__(message)
+        self.exit_code = exit_code
+
+
+class ExtractionPipeline:
+    """
+    数据抽取流程
+
+    进度、日志、结果和错误通过信号回调通知调用方，可以连接任意可调用对象：
+    界面中由 ExtractorEngine 转发到 Qt 信号，命令行中直接打印
+    """
+    progress = Signal(int, str)  # (percentage, message)
+    log = Signal(str)  # log message
+    finished = Signal(dict)  # result dict
+    error = Signal(str)
+    
+    def __init__(self, profile_path: str, chunk_rows: Optional[int] = StreamingConfig.CHUNK_ROWS,
+                 workers: Optional[int] = None, output_format: Optional[str] = None,
+                 reader: Optional[str] = None, use_cache: Optional[bool] = None,
+                 incremental: Optional[bool] = None, pushdown: Optional[bool] = None,
+                 profiler: Optional[str] = None, profile_manager: Optional[ProfileManager] = None):
+        """
+        Args:
+            profile_path: profile 配置文件路径
+            chunk_rows: 每个数据块的最大行数（None 表示每个文件作为一个块）
+            workers: 并行处理的进程数（None 时读取 profile 的 output_options.workers，默认 1）
+            output_format: 输出格式 excel/parquet/feather/csv（None 时读取 profile 的 output_options.format）
+            reader: 优先使用的 Excel 读取引擎 calamine/openpyxl/xlrd（None 时按文件类型自动选择）
+            use_cache: 是否使用文件读取缓存（None 时按环境变量 LIS_FILE_CACHE 决定，默认启用）
+            incremental: 增量抽取，只处理新增或修改的文件（None 时读取 profile 的 output_options.incremental）
+            pushdown: 读取下推，只读取映射的列并在读取时跳过未选择项目的行
+                （None 时读取 profile 的 output_options.pushdown，默认启用）
+            profiler: 对本次运行做性能剖析 cprofile/pyinstrument，结果保存在输出目录（None 时不剖析；
+                并行时只剖析主进程）
+            profile_manager: 通过其内存缓存加载编译后的 profile（多次运行同一 profile 时不再重新读取、编译；
+                None 时每次运行从文件加载）
+        """
+        self.profile_path = profile_path
+        self.chunk_rows = chunk_rows
+        self.workers = workers
+        self.output_format = output_format
+        self.reader = reader
+        self.use_cache = use_cache
+        self.incremental = incremental
+        self.pushdown = pushdown
+        self.profiler = profiler
+        self.profile_manager = profile_manager
+        self.profile = None
+        self.compiled: Optional[CompiledProfile] = None
+        self.run_id = generate_run_id()
+        self.exit_code = ExitCode.SUCCESS
+        self.metrics: Optional[StageTimer] = None  # 最近一次运行的各处理阶段耗时（见 StageTimer.summary()）
+        self.steps: Optional[StageTimer] = None  # 最近一次运行的各步骤（run 中编号的步骤）耗时
+        self._step = None
+        self._profiler: Optional[RunProfiler] = None
+        self._is_cancelled = False
+    
+    def load_profile(self) -> bool:
+        """加载 profile 配置"""
+        try:
+            self._load_profile()
+            return True
+        except PipelineError as e:
+            self.error.emit(str(e))
+            return False
+
+    def _load_profile(self):
+        try:
+            if self.profile_manager is not None:
+                self.compiled = self.profile_manager.load_compiled_file(self.profile_path)
+            else:
+                self.compiled = CompiledProfile.load(self.profile_path)
+            self.profile = self.compiled.profile
+            self.log.emit(f"✓ 加载配置文件: {self.profile['id']}")
+        except Exception as e:
+            raise PipelineError(f"加载配置文件失败: {str(e)}", ExitCode.PROFILE_ERROR)
+    
+    def cancel(self):
+        """取消运行"""
+        self._is_cancelled = True
+        self.log.emit("⚠️ 用户取消操作")
+    
+    def run(self, file_or_folder: Union[str, List[str]], output_dir: str) -> Optional[Dict]:
+        """
+        执行完整的抽取流程
+
+        逐文件、逐块处理（映射 → 过滤 → 解析 → 日期 → 输出），
+        结果增量写入输出文件，质量统计逐块累计，峰值内存只与块大小有关
+
+        Args:
+            file_or_folder: 输入文件或文件夹路径（或路径列表，如自动识别后分到该 profile 的文件）
+            output_dir: 输出目录
+
+        Returns:
+            结果字典（同 finished 信号）；失败或取消时返回 None，原因见 exit_code
+        """
+        self.exit_code = ExitCode.SUCCESS
+        self.metrics = None
+        self.steps = StageTimer(order=())
+        try:
+            self._start_profiler()
+            result = self._run(file_or_folder, output_dir)
+        except PipelineError as e:
+            self.exit_code = e.exit_code
+            self.error.emit(str(e))
+            return None
+        except Exception as e:
+            self.exit_code = ExitCode.FAILURE
+            self.error.emit(f"处理失败: {str(e)}")
+            self.log.emit(traceback.format_exc())
+            return None
+        finally:
+            self._end_step()
+            if self.metrics is not None:
+                self.metrics.stop_sampling()
+            if self._profiler is not None and self._profiler.running:
+                # 失败或取消的运行也保存剖析结果
+                self._save_profile(output_dir)
+
+        if result is None:
+            self.exit_code = ExitCode.CANCELLED
+            return None
+
+        self.finished.emit(result)
+        return result
+
+    def _run(self, file_or_folder: Union[str, List[str]], output_dir: str) -> Optional[Dict]:
+        """执行抽取；用户取消时返回 None，出错时抛出 PipelineError"""
+        started_at = datetime.now()
+        start, start_cpu = time.perf_counter(), time.process_time()
+        self._load_profile()
+        
+        self.progress.emit(0, "开始处理...")
+        
+        # 1. 查找所有 Excel 文件
+        self._begin_step('scan')
+        self.log.emit("📁 扫描文件...")
+        try:
+            backend_order('', self.reader)
+        except ValueError as e:
+            raise PipelineError(str(e), ExitCode.USAGE_ERROR)
+        loader = DataLoader(reader=self.reader, use_cache=self.use_cache)
+        excel_files = loader.find_excel_files(file_or_folder)
+        self.log.emit(f"✓ 找到 {len(excel_files)} 个 Excel 文件")
+        
+        if not excel_files:
+            raise PipelineError("未找到任何 Excel 文件", ExitCode.NO_INPUT)
+        
+        self.progress.emit(10, f"找到 {len(excel_files)} 个文件")
+        
+        # 2. 准备处理组件（所有数据块共享）
+        self._begin_step('prepare')
+        self.log.emit("🔄 准备字段映射、项目标准化和数值解析规则...")
+        processor = ChunkProcessor(self.profile, self.run_id, compiled=self.compiled)
+        self.metrics = processor.metrics
+        self.metrics.start_sampling()
+        self.log.emit(f"✓ 映射字段: {list(self.profile.get('column_mapping', {}).keys())}")
+
+        # 3. 创建输出文件
+        self._begin_step('open_output')
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+        except PermissionError as e:
+            raise PipelineError(f"无法创建输出目录 (权限不足): {output_dir}", ExitCode.OUTPUT_ERROR)
+        except OSError as e:
+            raise PipelineError(f"创建输出目录失败: {str(e)}", ExitCode.OUTPUT_ERROR)
+
+        timestamp = datetime.now().strftime(ExportConfig.TIMESTAMP_FORMAT)
+        output_options = dict(self.profile.get('output_options') or {})
+        if self.output_format:
+            output_options['format'] = self.output_format
+        # 读取下推改变原始数据的质量统计：增量清单按实际使用的设置区分
+        output_options['pushdown'] = self._resolve_pushdown()
+        qc_stats = QCAccumulator()
+        manifest = incremental = staged = None
+        pending_files, unchanged, missing = excel_files, [], []
+        try:
+            resolve_output_format(output_options)
+            if self._resolve_incremental():
+                # 增量模式：每个源文件一个分区，只处理新增或修改的文件
+                manifest = RunManifest(
+                    output_dir, self.profile['id'], config_hash(self.profile, output_options)
+                )
+                manifest.load()
+                if manifest.config_changed:
+                    self.log.emit("⚠️ 配置或输出格式已变化，重新处理全部文件")
+                pending_files, unchanged, missing = manifest.plan(excel_files)
+                self.log.emit(
+                    f"🔁 增量抽取: {len(pending_files)} 个新增或修改的文件，"
+                    f"跳过 {len(unchanged)} 个未变化的文件"
+                )
+                if missing:
+                    self.log.emit(f"⚠️ {len(missing)} 个源文件已不存在，保留其已有输出")
+                incremental = IncrementalOutput(
+                    manifest, processor.output_columns, output_options, timestamp, self.run_id
+                )
+                writer = None
+                output_file = str(manifest.partition_dir)
+                writer_for = incremental.writer_for
+            else:
+                writer = create_output_writer(
+                    output_dir, f'{ExportConfig.LABS_LONG_PREFIX}{timestamp}',
+                    processor.output_columns, output_options
+                )
+                output_file = writer.output_path
+                # 每个文件读取成功后才写入，读取失败的文件不留下部分数据
+                staged = StagedOutput(writer, self.chunk_rows or StreamingConfig.CHUNK_ROWS)
+                writer_for = lambda file_path: staged
+        except ValueError as e:
+            raise PipelineError(str(e), ExitCode.PROFILE_ERROR)
+        except OSError as e:
+            raise PipelineError(f"读取或写入运行清单失败: {str(e)}", ExitCode.OUTPUT_ERROR)
+
+        def on_file_done(file_path: str, ok: bool, file_qc: QCAccumulator):
+            if incremental is not None:
+                # 增量模式下读取失败的文件丢弃本次输出，保留清单中的旧分区
+                try:
+                    incremental.finish_file(file_path, ok, file_qc)
+                except OSError as e:
+                    incremental.discard()
+                    raise PipelineError(f"写入分区失败: {str(e)}", ExitCode.OUTPUT_ERROR)
+            elif ok:
+                with processor.metrics.stage('export'):
+                    staged.commit()
+            else:
+                staged.discard()
+            # 读取失败的文件不计入质量统计和保留行数（与其不写入输出一致）
+            processor.end_file(ok)
+            if ok:
+                qc_stats.merge(file_qc)
+
+        def discard():
+            if incremental is not None:
+                incremental.discard()
+            else:
+                staged.discard()
+                writer.discard()
+
+        # 4. 逐文件、逐块处理
+        step = self._begin_step('process')
+        chunk_desc = f"每块最多 {self.chunk_rows:,} 行" if self.chunk_rows else "每个文件一块"
+        skip_rows = self.profile.get('signature', {}).get('skip_top_rows', 0)
+        sheets = self._select_sheets(loader, pending_files)
+        sources = sum(len(file_sheets or ()) for file_sheets in sheets.values())
+        workers = min(self._resolve_workers(), sources)
+        pushdown = self._resolve_pushdown()
+        if pushdown and pending_files:
+            plan = processor.read_plan()
+            if plan['columns'] is not None:
+                skip_desc = "，读取时跳过未选择项目的行" if plan['row_filter'] is not None else ""
+                self.log.emit(f"⏬ 读取下推: 只读取 {len(plan['columns'])} 个映射的列{skip_desc}")
+
+        if not pending_files:
+            files_read = 0
+        elif workers > 1:
+            self.log.emit(f"📖 使用 {workers} 个进程并行处理文件（{chunk_desc}）...")
+            if incremental is not None:
+                for file_path in pending_files:
+                    incremental.begin_file(file_path)
+            files_read = self._process_parallel(
+                loader, pending_files, sheets, processor, writer_for, on_file_done, skip_rows,
+                workers, pushdown
+            )
+        else:
+            self.log.emit(f"📖 逐块处理文件（{chunk_desc}）...")
+            files_read = self._process_sequential(
+                loader, pending_files, sheets, processor, writer_for, on_file_done, skip_rows,
+                on_file_start=incremental.begin_file if incremental is not None else None,
+                pushdown=pushdown
+            )
+
+        if files_read is None:
+            discard()
+            return None
+
+        if pending_files and files_read == 0 and qc_stats.raw_rows == 0:
+            discard()
+            raise PipelineError("所有文件读取失败", ExitCode.NO_INPUT)
+
+        step.rows, step.rows_out = qc_stats.raw_rows, processor.rows_kept
+        self.log.emit(f"✓ 处理总行数: {qc_stats.raw_rows}")
+        if manifest is not None:
+            # 质量报告覆盖全部分区（包括本次跳过的文件）
+            qc_stats = manifest.merged_qc(excel_files)
+            self.log.emit(f"✓ 全部分区原始行数: {qc_stats.raw_rows}")
+        reader_stats = loader.reader_stats.summary()
+        for backend, stats in reader_stats.items():
+            self.log.emit(
+                f"📈 读取引擎 {backend}: {stats['files']} 个文件, {stats['rows']:,} 行, "
+                f"{stats['seconds']:.2f} 秒 ({stats['rows_per_second']:,} 行/秒)"
+            )
+
+        # 5. 检验项目
+        self._begin_step('test_summary')
+        self.progress.emit(85, "汇总处理结果...")
+        new_tests = processor.new_tests()
+        if new_tests:
+            self.log.emit(f"⚠️ 警告: 发现 {len(new_tests)} 个预览时未出现的检验项目:")
+            # 显示前10个新项目
+            for test in list(new_tests)[:10]:
+                self.log.emit(f"   - {test}")
+            if len(new_tests) > 10:
+                self.log.emit(f"   ... 还有 {len(new_tests)-10} 个")
+            self.log.emit(f"   这些项目将被过滤掉（因为drop_unknown_tests=True）")
+            self.log.emit(f"   如需包含，请重新运行向导并选择更大的预览行数")
+
+        selected_tests = processor.selected_tests
+        self.log.emit(f"✓ 保留 {len(selected_tests)} 个项目，{processor.rows_kept} 行")
+
+        # 6. 数值解析
+        self._begin_step('value_summary')
+        processor.save_caches()
+        cache_stats = processor.value_parser.cache.stats()
+        self.log.emit(
+            f"✓ 解析 {cache_stats['hits'] + cache_stats['misses']} 个不同的结果值"
+            f"（缓存命中率 {cache_stats['hit_rate']:.0%}）"
+        )
+
+        # 7. 日期时间
+        self._begin_step('date_summary')
+        self.log.emit("📅 日期时间解析结果...")
+        if processor.has_datetime:
+            original_non_null = processor.dates_original
+            parsed_non_null = processor.dates_parsed
+            original_samples = processor.date_samples
+            self.log.emit(f"   原始数据中有 {original_non_null} 行包含日期")
+            self.log.emit(f"   成功解析 {parsed_non_null} 个日期")
+            for fmt, count in processor.date_parser.format_counts.most_common():
+                self.log.emit(f"     {processor.date_parser.describe(fmt)}: {count} 行")
+
+            # 详细诊断失败的情况
+            if parsed_non_null < original_non_null:
+                failed_count = original_non_null - parsed_non_null
+                self.log.emit(f"   ⚠️ 警告：{failed_count} 个日期解析失败")
+
+                # 显示无法解析的值和原始样本（用于调试格式问题）
+                if processor.date_parser.failed_samples:
+                    self.log.emit(f"   无法解析的值: {processor.date_parser.failed_samples[:5]}")
+                if original_samples:
+                    self.log.emit(f"   原始数据样本: {original_samples[:5]}")
+
+            if parsed_non_null == 0 and original_non_null > 0:
+                self.log.emit("   ❌ 错误：所有日期解析失败！请检查日期格式")
+            elif parsed_non_null < original_non_null * 0.5 and original_non_null > 10:
+                # 如果失败率超过50%且有足够样本，发出警告
+                failure_rate = (original_non_null - parsed_non_null) / original_non_null * 100
+                self.log.emit(f"   ⚠️ 警告：日期解析失败率较高 ({failure_rate:.1f}%)，建议检查日期格式")
+        else:
+            self.log.emit("   ⚠️ 警告：未找到 sample_datetime 列")
+
+        total_rows = manifest.total_rows() if manifest is not None else writer.rows_written
+        self.log.emit(f"✓ 生成 labs_long: {total_rows} 行")
+
+        # 8. 生成质量报告
+        self._begin_step('qc_report')
+        self.progress.emit(87, "生成质量报告...")
+        self.log.emit("📊 生成质量报告...")
+        qc = QCReporter()
+        with self.metrics.stage('qc'):
+            report = qc.analyze_accumulated(qc_stats, self.profile['id'])
+        self.log.emit("✓ 质量分析完成")
+
+        # 9. 导出文件
+        self._begin_step('export', total_rows)
+        self.progress.emit(90, f"导出数据 ({total_rows} 行)...")
+        self.log.emit("💾 导出文件...")
+
+        try:
+            if manifest is not None:
+                # 分区在各文件处理完成时已经写入
+                output_files = manifest.output_files(excel_files)
+                self.log.emit(
+                    f"✓ labs_long 分区: {os.path.basename(output_file)}/ 共 {len(output_files)} 个文件"
+                    f"（本次更新 {files_read} 个源文件）"
+                )
+            else:
+                with self.metrics.stage('export'):
+                    output_files = writer.close()
+                for path in output_files:
+                    self.log.emit(f"✓ 导出: {os.path.basename(path)}")
+        except PermissionError:
+            raise PipelineError(f"无法写入文件 (权限不足): {output_file}", ExitCode.OUTPUT_ERROR)
+        except IOError as e:
+            raise PipelineError(f"导出数据失败 (磁盘错误): {str(e)}", ExitCode.OUTPUT_ERROR)
+        except Exception as e:
+            raise PipelineError(f"导出数据失败: {str(e)}", ExitCode.OUTPUT_ERROR)
+        if output_files:
+            output_file = output_files[0]
+
+        # 导出质量报告
+        self.progress.emit(97, "导出质量报告...")
+        qc_file = os.path.join(output_dir, f'{ExportConfig.QC_REPORT_PREFIX}{timestamp}.xlsx')
+
+        try:
+            with self.metrics.stage('qc'):
+                qc.export_to_excel(qc_file)
+            self.log.emit(f"✓ 导出: {os.path.basename(qc_file)}")
+        except PermissionError:
+            self.log.emit(f"⚠️ 质量报告导出失败 (权限不足): {qc_file}")
+            # 质量报告失败不应阻止主流程
+        except Exception as e:
+            self.log.emit(f"⚠️ 质量报告导出失败: {str(e)}")
+        
+        # 10. 运行统计
+        self._end_step()
+        self.metrics.stop_sampling()
+        metrics = self._build_metrics(started_at, time.perf_counter() - start,
+                                      time.process_time() - start_cpu, reader_stats)
+        self._log_metrics(metrics)
+        metrics_file = os.path.join(output_dir, f'{ExportConfig.RUN_METRICS_PREFIX}{self.run_id}.json')
+        try:
+            with open(metrics_file, 'w', encoding='utf-8') as f:
+                json.dump(metrics, f, ensure_ascii=False, indent=2)
+            self.log.emit(f"✓ 导出: {os.path.basename(metrics_file)}")
+        except OSError as e:
+            self.log.emit(f"⚠️ 运行统计导出失败: {str(e)}")
+            metrics_file = None
+        profile_file = self._save_profile(output_dir) if self._profiler is not None else None
+
+        # 完成
+        self.progress.emit(100, "完成!")
+        self.log.emit("=" * 50)
+        self.log.emit("✅ 抽取完成!")
+        self.log.emit(f"   输出目录: {output_dir}")
+        self.log.emit(f"   数据行数: {total_rows}")
+        self.log.emit(f"   检验项目: {len(selected_tests)}")
+        self.log.emit("=" * 50)
+        
+        result = {
+            'success': True,
+            'profile_id': self.profile['id'],
+            'run_id': self.run_id,
+            'output_dir': output_dir,
+            'labs_long_file': output_file,
+            'labs_long_files': output_files,
+            'qc_report_file': qc_file,
+            'total_rows': total_rows,
+            'total_tests': len(selected_tests),
+            'reader_stats': reader_stats,
+            'metrics': metrics,
+            'metrics_file': metrics_file,
+            'profile_file': profile_file,
+            'incremental': {
+                'files_processed': files_read,
+                'files_skipped': len(unchanged),
+                'sources_missing': len(missing),
+            } if manifest is not None else None,
+            'report': report
+        }
+        
+        return result
+
+    def _begin_step(self, name: str, rows: int = 0):
+        """结束上一个步骤并开始计时下一个步骤，返回可补充行数的记录"""
+        self._end_step()
+        self._step = self.steps.start(name, rows)
+        return self._step
+
+    def _end_step(self):
+        if self._step is not None:
+            self.steps.stop(self._step)
+            self._step = None
+
+    def _start_profiler(self):
+        self._profiler = None
+        if self.profiler:
+            try:
+                self._profiler = RunProfiler(self.profiler)
+            except ValueError as e:
+                raise PipelineError(str(e), ExitCode.USAGE_ERROR)
+            self._profiler.start()
+
+    def _save_profile(self, output_dir: str) -> Optional[str]:
+        """停止性能剖析并保存到输出目录，返回结果文件路径"""
+        prefix = os.path.join(output_dir, f'{ExportConfig.RUN_PROFILE_PREFIX}{self.run_id}')
+        try:
+            os.makedirs(output_dir, exist_ok=True)
+            path = self._profiler.stop(prefix)
+        except OSError as e:
+            self.log.emit(f"⚠️ 性能剖析结果保存失败: {str(e)}")
+            return None
+        self.log.emit(f"✓ 性能剖析（{self._profiler.kind}）: {os.path.basename(path)}")
+        return path
+
+    def _build_metrics(self, started_at: datetime, seconds: float, cpu_seconds: float,
+                       reader_stats: Dict) -> Dict:
+        """本次运行的统计（写入结果字典和 run_metrics_<run_id>.json）"""
+        steps = self.steps.summary()
+        stages = self.metrics.summary()
+        peaks = [stats['peak_rss_mb'] for stats in (*steps.values(), *stages.values())
+                 if stats['peak_rss_mb'] is not None]
+        return {
+            'run_id': self.run_id,
+            'profile_id': self.profile['id'],
+            'started_at': started_at.isoformat(timespec='seconds'),
+            'seconds': round(seconds, 3),
+            'cpu_seconds': round(cpu_seconds, 3),
+            'peak_rss_mb': max(peaks) if peaks else None,
+            'options': {
+                'workers': self._resolve_workers(),
+                'chunk_rows': self.chunk_rows,
+                'reader': self.reader,
+                'pushdown': self._resolve_pushdown(),
+                'incremental': self._resolve_incremental(),
+                'profiler': self.profiler,
+            },
+            'steps': steps,
+            'stages': stages,
+            'reader_stats': reader_stats,
+        }
+
+    def _log_metrics(self, metrics: Dict):
+        peak = f"，峰值内存 {metrics['peak_rss_mb']} MB" if metrics['peak_rss_mb'] is not None else ""
+        self.log.emit(f"⏱ 运行耗时 {metrics['seconds']:.2f} 秒（CPU {metrics['cpu_seconds']:.2f} 秒{peak}）")
+        for name, stats in metrics['steps'].items():
+            self.log.emit(
+                f"   {name}: {stats['seconds']:.2f} 秒, CPU {stats['cpu_seconds']:.2f} 秒, "
+                f"内存 {stats['rss_delta_mb']:+.1f} MB"
+            )
+        self.log.emit("   处理阶段（并行时为各进程累计）:")
+        for name, stats in metrics['stages'].items():
+            self.log.emit(
+                f"     {name}: {stats['seconds']:.2f} 秒, {stats['rows']:,} → {stats['rows_out']:,} 行"
+                f" ({stats['rows_per_second']:,} 行/秒)"
+            )
+
+    def _resolve_workers(self) -> int:
+        """工作进程数：构造参数优先，其次 profile 的 output_options.workers"""
+        if self.workers is not None:
+            return max(1, self.workers)
+        output_options = self.profile.get('output_options') or {}
+        return max(1, int(output_options.get('workers', ParallelConfig.DEFAULT_WORKERS)))
+
+    def _resolve_incremental(self) -> bool:
+        """是否增量抽取：构造参数优先，其次 profile 的 output_options.incremental"""
+        if self.incremental is not None:
+            return self.incremental
+        output_options = self.profile.get('output_options') or {}
+        return bool(output_options.get('incremental', False))
+
+    def _resolve_pushdown(self) -> bool:
+        """是否读取下推：构造参数优先，其次 profile 的 output_options.pushdown（默认启用）"""
+        if self.pushdown is not None:
+            return self.pushdown
+        output_options = self.profile.get('output_options') or {}
+        return bool(output_options.get('pushdown', True))
+
+    @staticmethod
+    def _file_done_message(filename: str, rows: int, skipped: int) -> str:
+        if skipped:
+            return f"✓ {filename}: {rows} 行（读取时跳过 {skipped} 行未选择的项目）"
+        return f"✓ {filename}: {rows} 行"
+
+    def _select_sheets(self, loader: DataLoader,
+                       excel_files: List[str]) -> Dict[str, Optional[List[Tuple[int, Optional[str]]]]]:
+        """
+        按 profile 的 signature.sheets 选择每个文件要读取的工作表
+
+        Returns:
+            {文件路径: [(工作表序号, 名称), ...]}；无法打开的文件为 None（记为读取失败）
+        """
+        selector = self.compiled.sheets
+        sheets = {}
+        for file_path in excel_files:
+            filename = os.path.basename(file_path)
+            try:
+                sheets[file_path] = loader.select_sheets(file_path, selector)
+            except Exception as e:
+                sheets[file_path] = None
+                self.log.emit(f"✗ 跳过 {filename}: {str(e)}")
+                continue
+            if not sheets[file_path]:
+                self.log.emit(f"⚠️ {filename} 中没有符合 signature.sheets ({selector}) 的工作表")
+
+        if selector is not None:
+            total = sum(len(file_sheets or ()) for file_sheets in sheets.values())
+            self.log.emit(f"📑 读取工作表 ({selector}): {len(excel_files)} 个文件中共 {total} 个工作表")
+        return sheets
+
+    @staticmethod
+    def _source_label(file_path: str, sheet_name: Optional[str]) -> str:
+        """日志中的文件名（读取多个工作表时附上工作表名称）"""
+        filename = os.path.basename(file_path)
+        return f"{filename} [{sheet_name}]" if sheet_name is not None else filename
+
+    def _process_sequential(self, loader: DataLoader, excel_files: List[str],
+                            sheets: Dict[str, Optional[List[Tuple[int, Optional[str]]]]],
+                            processor: ChunkProcessor,
+                            writer_for: Callable[[str], OutputWriter],
+                            on_file_done: Callable[[str, bool, QCAccumulator], None],
+                            skip_rows: int,
+                            on_file_start: Optional[Callable[[str], None]] = None,
+                            pushdown: bool = False) -> Optional[int]:
+        """
+        在当前进程中逐个文件、逐个工作表、逐块处理
+
+        Args:
+            sheets: 每个文件要读取的工作表（见 _select_sheets）
+            writer_for: 返回某个源文件的输出写入器
+            on_file_done: 每个文件结束时回调 (file_path, 是否读取成功, 该文件的质量统计)；
+                回调中调用 processor.end_file(ok)，与每个文件开始时的 processor.begin_file() 配对
+            on_file_start: 每个文件开始处理前回调
+            pushdown: 是否按 processor.read_plan() 只读取需要的列和行
+
+        Returns:
+            成功读取的文件数（任一工作表读取失败时该文件记为失败）；用户取消时返回 None
+        """
+        files_read = 0
+        for idx, file_path in enumerate(excel_files):
+            file_qc = QCAccumulator()
+            ok = sheets[file_path] is not None
+
+            processor.begin_file()
+            if on_file_start is not None:
+                on_file_start(file_path)
+            for sheet, sheet_name in sheets[file_path] or ():
+                sheet_ok = self._process_source(
+                    loader, file_path, sheet, sheet_name, processor, writer_for, file_qc,
+                    skip_rows, pushdown, progress=(idx, len(excel_files))
+                )
+                if sheet_ok is None:
+                    return None
+                ok = ok and sheet_ok
+
+            if ok:
+                files_read += 1
+            on_file_done(file_path, ok, file_qc)
+
+        return files_read
+
+    def _process_source(self, loader: DataLoader, file_path: str, sheet: int,
+                        sheet_name: Optional[str], processor: ChunkProcessor,
+                        writer_for: Callable[[str], OutputWriter], file_qc: QCAccumulator,
+                        skip_rows: int, pushdown: bool, progress: Tuple[int, int]) -> Optional[bool]:
+        """
+        逐块处理一个文件的一个工作表，质量统计累计到 file_qc
+
+        Returns:
+            是否读取成功；用户取消时返回 None
+        """
+        label = self._source_label(file_path, sheet_name)
+        idx, total = progress
+        progress_pct = 10 + int((idx / total) * 75)
+        rows = 0
+
+        plan = processor.read_plan() if pushdown else {'columns': None, 'row_filter': None}
+        file_qc.projected = file_qc.projected or plan['columns'] is not None
+        chunks = loader.iter_file_chunks(file_path, skip_rows, self.chunk_rows,
+                                         plan['columns'], plan['row_filter'], sheet)
+        while True:
+            if self._is_cancelled:
+                return None
+
+            try:
+                with processor.metrics.stage('load') as stage:
+                    df_raw = next(chunks, None)
+                    stage.rows = 0 if df_raw is None else len(df_raw)
+            except Exception as e:
+                file_qc.add_skipped(processor.record_skipped(plan['row_filter']))
+                done = f"（已读取的 {rows} 行不写入输出）" if rows else ""
+                self.log.emit(f"✗ 跳过 {label}{done}: {str(e)}")
+                return False
+
+            if df_raw is None:
+                skipped = processor.record_skipped(plan['row_filter'])
+                file_qc.add_skipped(skipped)
+                self.log.emit(self._file_done_message(label, rows + skipped, skipped))
+                return True
+
+            rows += len(df_raw)
+            self.progress.emit(progress_pct, f"处理 {idx+1}/{total}: {label} ({rows:,} 行)")
+
+            labs_chunk = processor.process(df_raw, sheet_name)
+            with processor.metrics.stage('qc', len(df_raw)):
+                file_qc.add_raw(df_raw)
+                file_qc.add_processed(labs_chunk)
+            with processor.metrics.stage('export', len(labs_chunk)):
+                writer_for(file_path).write(labs_chunk)
+            del df_raw, labs_chunk
+
+    def _process_parallel(self, loader: DataLoader, excel_files: List[str],
+                          sheets: Dict[str, Optional[List[Tuple[int, Optional[str]]]]],
+                          processor: ChunkProcessor,
+                          writer_for: Callable[[str], OutputWriter],
+                          on_file_done: Callable[[str, bool, QCAccumulator], None],
+                          skip_rows: int, workers: int, pushdown: bool = False) -> Optional[int]:
+        """
+        多进程并行处理，每个工作表作为一个任务（同一文件的多个工作表同时读取），
+        结果按文件、工作表的顺序合并写入（参数同 _process_sequential）
+
+        Returns:
+            成功读取的文件数；用户取消时返回 None
+        """
+        sources = [
+            (file_path, sheet, sheet_name)
+            for file_path in excel_files
+            for sheet, sheet_name in sheets[file_path] or ()
+        ]
+        completed = 0
+
+        def on_result(idx: int, result: dict):
+            nonlocal completed
+            completed += 1
+            progress_pct = 10 + int((completed / len(sources)) * 75)
+            label = self._source_label(result['file_path'], result['sheet_name'])
+            self.progress.emit(
+                progress_pct,
+                f"完成 {completed}/{len(sources)}: {label} ({result['rows']:,} 行)"
+            )
+
+        results = iter_file_results(
+            sources, self.compiled, self.run_id, skip_rows, self.chunk_rows, workers,
+            is_cancelled=lambda: self._is_cancelled, on_file_done=on_result,
+            reader=self.reader, use_cache=self.use_cache, pushdown=pushdown
+        )
+
+        files_read = 0
+        caches = processor.caches
+        try:
+            for file_path in excel_files:
+                file_qc = QCAccumulator()
+                ok = sheets[file_path] is not None
+                processor.begin_file()
+                for _ in sheets[file_path] or ():
+                    item = next(results, None)
+                    if item is None:
+                        # 用户取消
+                        return None
+                    _, result = item
+                    label = self._source_label(file_path, result['sheet_name'])
+                    if result['error'] is None:
+                        self.log.emit(self._file_done_message(label, result['rows'], result['rows_skipped']))
+                    else:
+                        ok = False
+                        done = f"（已读取的 {result['rows']} 行不写入输出）" if result['rows'] else ""
+                        self.log.emit(f"✗ 跳过 {label}{done}: {result['error']}")
+
+                    for packed in result['chunks']:
+                        with processor.metrics.stage('merge') as stage:
+                            labs_chunk = unpack_frame(packed)
+                            stage.rows = len(labs_chunk)
+                        with processor.metrics.stage('export', len(labs_chunk)):
+                            writer_for(file_path).write(labs_chunk)
+                        del labs_chunk
+                    file_qc.merge(result['qc'])
+                    loader.reader_stats.merge(result['reader_stats'])
+                    processor.merge_stats(result['stats'])
+                    for name, (entries, hits, misses) in result['cache'].items():
+                        caches[name].merge_entries(entries, hits, misses)
+
+                if ok:
+                    files_read += 1
+                on_file_done(file_path, ok, file_qc)
+        finally:
+            # 关闭结果迭代器，同时关闭进程池
+            results.close()
+
+        if self._is_cancelled:
+            return None
+        return files_read
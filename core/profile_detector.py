@@ -0,0 +1,137 @@
+"""
+profile 自动识别模块
+按每个 profile 的 signature.required_columns 建立「列名 → profile」倒排索引，
+每个输入文件只读取表头行，按表头中的列名查索引累计各 profile 的命中数，选出得分最高的 profile
+"""
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from .constants import ValidatorConfig
+from .logger import get_logger
+from .readers import header_names, read_head_rows
+
+logger = get_logger(__name__)
+
+
+class ProfileDetector:
+    """
+    按表头自动选择 profile
+
+    得分与 DataLoader.validate_columns 相同：表头中出现的必需列数 / 必需列数，
+    不低于该 profile 的 min_match_ratio 才算匹配；得分相同时必需列多的优先，再按 profile 的顺序。
+    每个文件的耗时与表头列数成正比，与 profile 数量无关
+    """
+
+    def __init__(self, profiles: List[Dict], reader: Optional[str] = None):
+        """
+        Args:
+            profiles: ProfileManager.list_profiles() 的结果（使用 id、file_path、signature）；
+                没有 required_columns 的 profile 不参与识别
+            reader: 无法直接解析表头时使用的读取引擎
+        """
+        self.reader = reader
+        self.profiles: List[Dict] = []
+        # 表头所在行 → {列名: [profile 序号, ...]}（不同 profile 的 skip_top_rows 可能不同）
+        self.index: Dict[int, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+
+        for profile in profiles:
+            signature = profile.get('signature') or {}
+            required = {str(col).strip() for col in signature.get('required_columns') or []}
+            if not required:
+                continue
+            ratio = signature.get('min_match_ratio')
+            skip_rows = signature.get('skip_top_rows') or 0
+            position = len(self.profiles)
+            self.profiles.append({
+                'id': profile['id'],
+                'file_path': profile['file_path'],
+                'required': required,
+                'min_match_ratio': ValidatorConfig.DEFAULT_MATCH_RATIO if ratio is None else ratio,
+                'skip_rows': skip_rows,
+            })
+            for column in required:
+                self.index[skip_rows][column].append(position)
+
+        self.index = {skip_rows: dict(columns) for skip_rows, columns in self.index.items()}
+        self._paths = {profile['id']: profile['file_path'] for profile in self.profiles}
+
+    def profile_path(self, profile_id: str) -> str:
+        """profile 文件路径"""
+        return self._paths[profile_id]
+
+    def detect(self, file_path: str) -> Optional[Dict]:
+        """
+        识别一个文件（只读取第一个工作表的表头行）
+
+        Returns:
+            {'profile_id', 'profile_path', 'score', 'matched', 'required', 'missing', 'skip_rows'}；
+            没有匹配的 profile 时返回 None
+
+        Raises:
+            读取文件失败时的异常
+        """
+        if not self.profiles:
+            return None
+        rows = read_head_rows(file_path, max(self.index) + 1, self.reader)
+        return self.match_header(rows)
+
+    def match_header(self, rows: List[list]) -> Optional[Dict]:
+        """
+        按文件开头的原始行（read_head_rows 的结果）选择 profile
+
+        每种表头位置只查一次表头中的列名，只有命中过的 profile 参与比较
+        """
+        best, best_key, best_columns = None, None, None
+        for skip_rows, columns_index in self.index.items():
+            if skip_rows >= len(rows):
+                continue
+            columns = set(header_names(rows[skip_rows]))
+            counts = Counter()
+            for column in columns:
+                for position in columns_index.get(column, ()):
+                    counts[position] += 1
+
+            for position, matched in counts.items():
+                profile = self.profiles[position]
+                score = matched / len(profile['required'])
+                if score < profile['min_match_ratio']:
+                    continue
+                key = (score, matched, -position)
+                if best_key is None or key > best_key:
+                    best, best_key, best_columns = position, key, columns
+
+        if best is None:
+            return None
+        profile = self.profiles[best]
+        return {
+            'profile_id': profile['id'],
+            'profile_path': profile['file_path'],
+            'score': round(best_key[0], 4),
+            'matched': best_key[1],
+            'required': len(profile['required']),
+            'missing': sorted(profile['required'] - best_columns),
+            'skip_rows': profile['skip_rows'],
+        }
+
+    def route(self, files: List[str]) -> Tuple[Dict[str, List[str]], List[str], Dict[str, Optional[Dict]]]:
+        """
+        为每个文件选择 profile
+
+        Returns:
+            ({profile_id: [文件, ...]}（按识别顺序）, 未匹配或无法读取的文件, {文件: 识别结果或 None})
+        """
+        groups: Dict[str, List[str]] = {}
+        unmatched: List[str] = []
+        matches: Dict[str, Optional[Dict]] = {}
+        for file_path in files:
+            try:
+                match = self.detect(file_path)
+            except Exception as e:
+                logger.warning(f"读取表头失败 {file_path}: {e}")
+                match = None
+            matches[file_path] = match
+            if match is None:
+                unmatched.append(file_path)
+            else:
+                groups.setdefault(match['profile_id'], []).append(file_path)
+        return groups, unmatched, matches
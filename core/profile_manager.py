@@ -1,14 +1,27 @@
 """
 Profile 管理器
 管理 LIS Profile 的创建、加载、保存、删除
+
+profile 目录中的索引文件（ProfileIndexConfig.FILENAME）记录每个 profile 的 ID、描述、签名、
+修改时间和内容哈希，列出 profile 时只重新解析有变化的文件；
+已解析和已编译的 profile 保存在内存 LRU 中，文件未修改时直接使用
 """
+import copy
+import hashlib
+import json
 import os
-import yaml
+import threading
+from collections import OrderedDict
 from pathlib import Path
 from typing import List, Dict, Optional
 from datetime import datetime
 
+import yaml
+
+from .compiled_profile import CompiledProfile
+from .constants import ProfileIndexConfig
 from .logger import get_logger
+from .utils import safe_load_yaml
 
 logger = get_logger(__name__)
 
@@ -21,28 +34,29 @@ class ProfileManager:
     def __init__(self, profiles_dir: str = "profiles/lis_profiles"):
         self.profiles_dir = Path(profiles_dir)
         self.profiles_dir.mkdir(parents=True, exist_ok=True)
+        self.index_path = self.profiles_dir / ProfileIndexConfig.FILENAME
+        self._index: Optional[Dict[str, Dict]] = None  # 文件名 → 索引项
+        self._cache: OrderedDict = OrderedDict()  # 文件路径 → {stamp, profile, compiled}
+        self._cache_lock = threading.RLock()  # 界面线程和抽取线程共用同一个管理器
     
     def list_profiles(self) -> List[Dict]:
         """
-        列出所有 profile
-        返回: [{id, name, description, file_path, created_time}, ...]
+        列出所有 profile（使用索引，只解析新增或修改的文件）
+        返回: [{id, name, description, file_path, created_time, signature}, ...]
         """
         profiles = []
         
-        for file_path in self.profiles_dir.glob("*.yaml"):
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    data = yaml.safe_load(f)
-                
-                profiles.append({
-                    'id': data.get('id', ''),
-                    'name': file_path.stem,
-                    'description': data.get('description', ''),
-                    'file_path': str(file_path),
-                    'created_time': datetime.fromtimestamp(file_path.stat().st_ctime)
-                })
-            except Exception as e:
-                logger.warning(f"读取 profile 失败 {file_path}: {e}")
+        for filename, entry in self._refresh_index().items():
+            if 'error' in entry:
+                continue
+            profiles.append({
+                'id': entry['id'],
+                'name': Path(filename).stem,
+                'description': entry['description'],
+                'file_path': str(self.profiles_dir / filename),
+                'created_time': datetime.fromtimestamp(entry['ctime']),
+                'signature': entry['signature']
+            })
         
         # 按创建时间排序
         profiles.sort(key=lambda x: x['created_time'], reverse=True)
@@ -50,18 +64,183 @@ class ProfileManager:
         return profiles
     
     def load_profile(self, profile_id: str) -> Optional[Dict]:
-        """加载指定的 profile"""
-        file_path = self.profiles_dir / f"{profile_id}.yaml"
-        
-        if not file_path.exists():
+        """加载指定的 profile（文件未修改时从内存缓存返回副本）"""
+        entry = self._load_cached(self.profiles_dir / f"{profile_id}.yaml")
+        if entry is None:
             return None
-        
+        return copy.deepcopy(entry['profile'])
+
+    def load_compiled(self, profile_id: str) -> Optional[CompiledProfile]:
+        """
+        加载指定 profile 的执行计划（见 load_compiled_file）
+
+        文件不存在或无法编译时返回 None
+        """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return yaml.safe_load(f)
+            return self.load_compiled_file(self.profiles_dir / f"{profile_id}.yaml")
+        except FileNotFoundError:
+            return None
         except Exception as e:
             logger.error(f"加载 profile 失败: {e}")
             return None
+
+    def load_compiled_file(self, file_path) -> CompiledProfile:
+        """
+        加载 profile 文件的执行计划（文件可以不在 profile 目录中）
+
+        文件大小和修改时间未变时从内存缓存返回（调用方不应修改）；
+        首次加载时通过 CompiledProfile.load 使用磁盘上的编译缓存
+
+        Raises:
+            OSError: 无法读取 profile 文件
+            yaml.YAMLError: profile 文件格式错误
+            ValueError: signature.sheets 配置格式错误
+        """
+        stat = os.stat(file_path)
+        key = self._cache_key(file_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is None or entry['stamp'] != stamp:
+                compiled = CompiledProfile.load(str(file_path))
+                entry = self._remember(key, stamp, compiled.profile)
+                entry['compiled'] = compiled
+            else:
+                self._cache.move_to_end(key)
+                if entry['compiled'] is None:
+                    entry['compiled'] = CompiledProfile(entry['profile'])
+            return entry['compiled']
+
+    @staticmethod
+    def _cache_key(file_path) -> str:
+        return os.path.abspath(file_path)
+
+    def _load_cached(self, file_path: Path) -> Optional[Dict]:
+        """内存缓存中的 profile（大小或修改时间变化时重新解析）；文件不存在或无法解析时返回 None"""
+        try:
+            stat = file_path.stat()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.error(f"加载 profile 失败: {e}")
+            return None
+
+        key = self._cache_key(file_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._cache_lock:
+            entry = self._cache.get(key)
+            if entry is not None and entry['stamp'] == stamp:
+                self._cache.move_to_end(key)
+                return entry
+
+            try:
+                with open(file_path, 'rb') as f:
+                    data = safe_load_yaml(f.read().decode('utf-8'))
+            except Exception as e:
+                logger.error(f"加载 profile 失败: {e}")
+                return None
+            return self._remember(key, stamp, data)
+
+    def _remember(self, key: str, stamp: tuple, profile: Dict) -> Dict:
+        entry = {'stamp': stamp, 'profile': profile, 'compiled': None}
+        self._cache[key] = entry
+        self._cache.move_to_end(key)
+        while len(self._cache) > ProfileIndexConfig.MEMORY_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return entry
+
+    def _refresh_index(self) -> Dict[str, Dict]:
+        """
+        按目录中的 *.yaml 更新索引
+
+        大小和修改时间未变的文件直接使用索引项；变化的文件先比较内容哈希，内容也变化时才重新解析；
+        索引有变化时写回索引文件
+        """
+        previous = self._read_index()
+        index = {}
+        changed = False
+
+        for file_path in self.profiles_dir.glob("*.yaml"):
+            try:
+                stat = file_path.stat()
+            except OSError as e:
+                logger.warning(f"读取 profile 失败 {file_path}: {e}")
+                continue
+            entry = previous.get(file_path.name)
+            if entry is None or entry['mtime_ns'] != stat.st_mtime_ns or entry['size'] != stat.st_size:
+                entry = self._index_entry(file_path, stat, entry)
+                changed = True
+            elif entry['ctime'] != stat.st_ctime:
+                entry = {**entry, 'ctime': stat.st_ctime}
+                changed = True
+            index[file_path.name] = entry
+
+        if changed or index.keys() != previous.keys():
+            self._write_index(index)
+        self._index = index
+        return index
+
+    def _index_entry(self, file_path: Path, stat: os.stat_result, previous: Optional[Dict]) -> Dict:
+        """为新增或修改的文件生成索引项（解析结果同时放入内存缓存）"""
+        stamp = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'ctime': stat.st_ctime}
+        try:
+            with open(file_path, 'rb') as f:
+                content = f.read()
+        except OSError as e:
+            logger.warning(f"读取 profile 失败 {file_path}: {e}")
+            return {**stamp, 'hash': None, 'error': str(e)}
+
+        digest = hashlib.sha1(content).hexdigest()
+        if previous is not None and previous.get('hash') == digest:
+            # 内容未变（如只更新了修改时间）
+            return {**previous, **stamp}
+
+        try:
+            data = safe_load_yaml(content.decode('utf-8'))
+            signature = data.get('signature') or {}
+            entry = {
+                'id': data.get('id', ''),
+                'description': data.get('description', ''),
+                'signature': {
+                    'required_columns': list(signature.get('required_columns') or []),
+                    'min_match_ratio': signature.get('min_match_ratio'),
+                    'skip_top_rows': signature.get('skip_top_rows', 0)
+                }
+            }
+        except Exception as e:
+            logger.warning(f"读取 profile 失败 {file_path}: {e}")
+            return {**stamp, 'hash': digest, 'error': str(e)}
+
+        with self._cache_lock:
+            self._remember(self._cache_key(file_path), (stat.st_mtime_ns, stat.st_size), data)
+        return {**entry, **stamp, 'hash': digest}
+
+    def _read_index(self) -> Dict[str, Dict]:
+        """读取索引（本实例已读取过时使用内存中的索引；文件不存在、损坏或版本不同时返回空索引）"""
+        if self._index is not None:
+            return self._index
+        try:
+            with open(self.index_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.debug(f"profile 索引无法读取，重新建立: {self.index_path} ({e})")
+            return {}
+        if not isinstance(data, dict) or data.get('version') != ProfileIndexConfig.FORMAT_VERSION:
+            return {}
+        return data.get('profiles', {})
+
+    def _write_index(self, index: Dict[str, Dict]):
+        """写入索引（先写临时文件再替换；目录只读时跳过）"""
+        tmp_path = f'{self.index_path}.{os.getpid()}.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': ProfileIndexConfig.FORMAT_VERSION, 'profiles': index},
+                          f, ensure_ascii=False, default=str)
+            os.replace(tmp_path, self.index_path)
+        except OSError as e:
+            logger.debug(f"profile 索引无法写入: {self.index_path} ({e})")
     
     def save_profile(self, profile: Dict) -> str:
         """
@@ -77,6 +256,8 @@ class ProfileManager:
         
         with open(file_path, 'w', encoding='utf-8') as f:
             yaml.dump(profile, f, allow_unicode=True, default_flow_style=False, sort_keys=False)
+        with self._cache_lock:
+            self._cache.pop(self._cache_key(file_path), None)
         
         return str(file_path)
     
@@ -86,6 +267,8 @@ class ProfileManager:
         
         if file_path.exists():
             file_path.unlink()
+            with self._cache_lock:
+                self._cache.pop(self._cache_key(file_path), None)
             return True
         
         return False
@@ -2,10 +2,201 @@
 质量控制报告模块
 生成数据质量分析报告
 """
+from collections import Counter
+import numpy as np
 import pandas as pd
 from typing import Dict, List
 from datetime import datetime
 
+from .constants import StreamingConfig
+
+_HASH_MULTIPLIER = np.uint64(0x100000001B3)  # 逐列合并行哈希的乘数（FNV 素数）
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)  # 缺失值的哈希（所有缺失值视为相同，与 duplicated() 一致）
+
+
+def value_counts(series: pd.Series) -> Dict:
+    """各值出现的次数（categorical 列不包含未出现的类别）"""
+    counts = series.value_counts()
+    return counts[counts > 0].to_dict()
+
+
+def _factorize_hash(series: pd.Series):
+    """
+    返回 (各行的编码, 各编码的哈希)；缺失值的编码为 -1，对应哈希数组的最后一项 _NULL_HASH
+    """
+    values = series
+    if isinstance(series.dtype, pd.StringDtype):
+        # 直接 factorize 底层的 object 数组比经过扩展数组更快
+        values = np.asarray(series.array)
+    codes, uniques = pd.factorize(values)
+    value_hashes = pd.util.hash_array(np.asarray(uniques, dtype=object), categorize=False)
+    return codes, np.append(value_hashes, _NULL_HASH)
+
+
+class QCAccumulator:
+    """
+    可合并的质量统计累加器
+
+    逐块累计原始数据和处理后数据的统计量（行数、各列非空数、行哈希、test_code / value_flag 计数），
+    不保留数据本身。多个累加器可以按任意分组和顺序合并（跨块、跨文件、跨进程），
+    统计结果与对合并后的完整数据直接计算一致（重复行按 64 位行哈希统计）。
+    读取时被跳过的行（读取下推）只计入原始行数，缺失值和重复行只统计实际读取的行和列
+    （raw_summary() 中以 projected 标明）。
+    """
+
+    def __init__(self):
+        self.raw_rows = 0  # 源数据行数（含读取时跳过的行）
+        self.rows_read = 0
+        self.rows_skipped = 0
+        self.projected = False  # 是否只读取了映射的列（读取下推），raw_columns 只包含读取的列
+        self.raw_columns = {}  # 保持列首次出现的顺序
+        self.raw_non_null = Counter()
+        self.processed_rows = 0
+        self.processed_columns = {}
+        self.processed_non_null = Counter()
+        self.test_distribution = Counter()
+        self.value_flags = Counter()
+
+        # 已去重的行哈希（有序）+ 尚未去重的行哈希
+        self._row_hashes = np.empty(0, dtype=np.uint64)
+        self._pending_hashes = []
+        self._pending_count = 0
+        self._duplicates = 0
+
+    def add_raw(self, df: pd.DataFrame):
+        """累计一块原始数据"""
+        self.raw_rows += len(df)
+        self.rows_read += len(df)
+        self.raw_columns.update(dict.fromkeys(df.columns))
+        if not len(df) or not len(df.columns):
+            self.raw_non_null.update(dict.fromkeys(df.columns, 0))
+            return
+
+        # 每列 factorize 一次，同时得到非空数和行哈希（只对不同的值计算哈希）；
+        # 按列名排序，使列顺序不同的文件之间也能识别重复行
+        hashes = np.zeros(len(df), dtype=np.uint64)
+        for position in sorted(range(len(df.columns)), key=lambda i: df.columns[i]):
+            codes, value_hashes = _factorize_hash(df.iloc[:, position])
+            self.raw_non_null[df.columns[position]] += int(np.count_nonzero(codes >= 0))
+            hashes = hashes * _HASH_MULTIPLIER ^ value_hashes[codes]
+
+        self._pending_hashes.append(hashes)
+        self._pending_count += len(hashes)
+        if self._pending_count >= StreamingConfig.QC_HASH_COMPACT_ROWS:
+            self._compact()
+
+    def add_skipped(self, rows: int):
+        """累计读取时按检验项目跳过的行数"""
+        self.raw_rows += rows
+        self.rows_skipped += rows
+
+    def add_processed(self, df: pd.DataFrame):
+        """累计一块处理后数据"""
+        self.processed_rows += len(df)
+        self.processed_columns.update(dict.fromkeys(df.columns))
+        self.processed_non_null.update(df.notna().sum().to_dict())
+
+        if 'test_code' in df.columns:
+            self.test_distribution.update(value_counts(df['test_code']))
+        if 'value_flag' in df.columns:
+            self.value_flags.update(value_counts(df['value_flag']))
+
+    def merge(self, other: 'QCAccumulator') -> 'QCAccumulator':
+        """合并另一个累加器（原地修改并返回自身，other 不变）"""
+        self.raw_rows += other.raw_rows
+        self.rows_read += other.rows_read
+        self.rows_skipped += other.rows_skipped
+        self.projected = self.projected or other.projected
+        self.raw_columns.update(other.raw_columns)
+        self.raw_non_null.update(other.raw_non_null)
+        self.processed_rows += other.processed_rows
+        self.processed_columns.update(other.processed_columns)
+        self.processed_non_null.update(other.processed_non_null)
+        self.test_distribution.update(other.test_distribution)
+        self.value_flags.update(other.value_flags)
+
+        # 两边的重复行在下次去重时统计，合并本身不排序
+        self._pending_hashes.append(other._row_hashes)
+        self._pending_hashes.extend(other._pending_hashes)
+        self._pending_count += len(other._row_hashes) + other._pending_count
+        self._duplicates += other._duplicates
+        if self._pending_count >= StreamingConfig.QC_HASH_COMPACT_ROWS:
+            self._compact()
+        return self
+
+    def _compact(self):
+        """
+        对累计的行哈希去重，只保留唯一哈希和重复计数
+
+        只排序尚未去重的部分，再按位置插入已有的有序哈希（不重新排序全部哈希）
+        """
+        if not self._pending_hashes:
+            return
+        pending = np.concatenate(self._pending_hashes)
+        new = np.unique(pending)
+        existing = self._row_hashes
+        positions = np.searchsorted(existing, new)
+        seen = positions < len(existing)
+        seen[seen] = existing[positions[seen]] == new[seen]
+
+        self._duplicates += len(pending) - len(new) + int(seen.sum())
+        self._row_hashes = np.insert(existing, positions[~seen], new[~seen])
+        self._pending_hashes = []
+        self._pending_count = 0
+
+    def __getstate__(self):
+        # 传回主进程或随增量清单保存前先去重，减少数据量
+        self._compact()
+        return self.__dict__
+
+    @property
+    def duplicate_rows(self) -> int:
+        self._compact()
+        return self._duplicates
+
+    def raw_summary(self) -> Dict:
+        """
+        原始数据统计（有跳过的行时增加 rows_skipped_on_read）
+
+        只读取了部分列或部分行时增加 projected: True，此时 total_columns / columns 为读取的列，
+        missing_values 和 duplicate_rows 只统计读取的行和列
+        """
+        summary = {
+            'total_rows': self.raw_rows,
+            'total_columns': len(self.raw_columns),
+            'columns': list(self.raw_columns),
+            'missing_values': {
+                col: self.rows_read - self.raw_non_null[col] for col in self.raw_columns
+            },
+            'duplicate_rows': self.duplicate_rows
+        }
+        if self.rows_skipped:
+            summary['rows_skipped_on_read'] = self.rows_skipped
+        if self.projected or self.rows_skipped:
+            summary['projected'] = True
+        return summary
+
+    def processed_summary(self) -> Dict:
+        """处理后数据统计（与 QCReporter._analyze_processed 的结构一致）"""
+        if self.processed_rows == 0:
+            return {
+                'total_rows': 0,
+                'total_tests': 0,
+                'test_distribution': {},
+                'value_flags': {}
+            }
+
+        return {
+            'total_rows': self.processed_rows,
+            'total_tests': len(self.test_distribution),
+            'test_distribution': dict(self.test_distribution.most_common()),
+            'value_flags': dict(self.value_flags.most_common()),
+            'missing_values': {
+                col: self.processed_rows - self.processed_non_null[col]
+                for col in self.processed_columns
+            }
+        }
+
 
 class QCReporter:
     """
@@ -18,7 +209,7 @@ class QCReporter:
     def analyze(self, df_raw: pd.DataFrame, df_processed: pd.DataFrame, 
                 profile_name: str) -> Dict:
         """
-        分析数据质量
+        分析数据质量（完整数据框一次累计，统计方式与流式处理相同）
         
         Args:
             df_raw: 原始数据
@@ -28,55 +219,46 @@ class QCReporter:
         Returns:
             质量报告字典
         """
+        stats = QCAccumulator()
+        stats.add_raw(df_raw)
+        stats.add_processed(df_processed)
+        return self.analyze_accumulated(stats, profile_name)
+
+    def analyze_accumulated(self, stats: QCAccumulator, profile_name: str) -> Dict:
+        """
+        根据逐块累计的统计量生成质量报告（流式处理时使用）
+
+        Args:
+            stats: 质量统计累加器
+            profile_name: 配置文件名称
+
+        Returns:
+            质量报告字典（结构与 analyze 相同）
+        """
         report = {
             'profile': profile_name,
             'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            'raw_data': self._analyze_raw(df_raw),
-            'processed_data': self._analyze_processed(df_processed),
-            'quality_metrics': self._calculate_metrics(df_raw, df_processed)
+            'raw_data': stats.raw_summary(),
+            'processed_data': stats.processed_summary(),
+            'quality_metrics': self._metrics_from_counts(
+                stats.raw_rows, stats.processed_rows,
+                stats.processed_non_null.get('value_numeric')
+            )
         }
-        
+
         self.report = report
         return report
-    
-    def _analyze_raw(self, df: pd.DataFrame) -> Dict:
-        """分析原始数据"""
-        return {
-            'total_rows': len(df),
-            'total_columns': len(df.columns),
-            'columns': df.columns.tolist(),
-            'missing_values': df.isnull().sum().to_dict(),
-            'duplicate_rows': df.duplicated().sum()
-        }
-    
-    def _analyze_processed(self, df: pd.DataFrame) -> Dict:
-        """分析处理后的数据"""
-        if df.empty:
-            return {
-                'total_rows': 0,
-                'total_tests': 0,
-                'test_distribution': {},
-                'value_flags': {}
-            }
-        
-        test_dist = {}
-        if 'test_code' in df.columns:
-            test_dist = df['test_code'].value_counts().to_dict()
-        
-        value_flags = {}
-        if 'value_flag' in df.columns:
-            value_flags = df['value_flag'].value_counts().to_dict()
-        
-        return {
-            'total_rows': len(df),
-            'total_tests': len(test_dist),
-            'test_distribution': test_dist,
-            'value_flags': value_flags,
-            'missing_values': df.isnull().sum().to_dict()
-        }
-    
-    def _calculate_metrics(self, df_raw: pd.DataFrame, df_processed: pd.DataFrame) -> Dict:
-        """计算质量指标"""
+
+    def _metrics_from_counts(self, raw_rows: int, processed_rows: int,
+                             non_null_values) -> Dict:
+        """
+        根据行数计算质量指标
+
+        Args:
+            raw_rows: 原始数据行数
+            processed_rows: 处理后行数
+            non_null_values: value_numeric 非空数量（无该列时为 None）
+        """
         metrics = {
             'data_retention_rate': 0.0,
             'value_parse_success_rate': 0.0,
@@ -84,14 +266,12 @@ class QCReporter:
         }
         
         # 数据保留率
-        if len(df_raw) > 0:
-            metrics['data_retention_rate'] = len(df_processed) / len(df_raw)
+        if raw_rows > 0:
+            metrics['data_retention_rate'] = processed_rows / raw_rows
         
         # 数值解析成功率
-        if 'value_numeric' in df_processed.columns:
-            non_null_values = df_processed['value_numeric'].notna().sum()
-            if len(df_processed) > 0:
-                metrics['value_parse_success_rate'] = non_null_values / len(df_processed)
+        if non_null_values is not None and processed_rows > 0:
+            metrics['value_parse_success_rate'] = non_null_values / processed_rows
         
         # 警告
         if metrics['data_retention_rate'] < 0.5:
@@ -118,8 +298,15 @@ class QCReporter:
         lines.append("【原始数据】")
         raw = self.report['raw_data']
         lines.append(f"  总行数: {raw['total_rows']}")
-        lines.append(f"  总列数: {raw['total_columns']}")
-        lines.append(f"  重复行: {raw['duplicate_rows']}")
+        if raw.get('projected'):
+            # 读取下推：列数和重复行只针对读取的列和行
+            lines.append(f"  读取列数: {raw['total_columns']}")
+            lines.append(f"  重复行（仅统计读取的行和列）: {raw['duplicate_rows']}")
+        else:
+            lines.append(f"  总列数: {raw['total_columns']}")
+            lines.append(f"  重复行: {raw['duplicate_rows']}")
+        if raw.get('rows_skipped_on_read'):
+            lines.append(f"  读取时跳过（未选择的项目）: {raw['rows_skipped_on_read']}")
         lines.append("")
         
         lines.append("【处理后数据】")
@@ -0,0 +1,821 @@
+"""
+Excel 读取引擎模块
+按文件类型选择最快的可用引擎（python-calamine / openpyxl 只读模式 / xlrd），
+失败时自动回退到下一个引擎，并按引擎统计读取速度
+
+各引擎只负责逐行返回单元格值（转换规则与 pandas 对应引擎一致），
+类型推断统一由 pandas 的 TextParser 完成，因此不同引擎读取的结果相同
+"""
+import importlib.util
+import math
+import os
+import re
+import time
+import zipfile
+from datetime import date, time as dt_time, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+
+import numpy as np
+import pandas as pd
+from pandas._libs.parsers import STR_NA_VALUES
+from pandas.io.parsers import TextParser
+
+from .constants import LoaderConfig
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class ReaderBackend:
+    """
+    读取引擎基类
+
+    iter_rows() 逐行返回一个工作表（按序号，默认第一个）的单元格值，空单元格为 ''；
+    sheet_names() 返回所有工作表的名称，顺序与 iter_rows() 的序号一致
+    """
+    name = ''
+    module = ''  # 依赖的第三方模块
+
+    @classmethod
+    def is_available(cls) -> bool:
+        """依赖模块是否已安装"""
+        return importlib.util.find_spec(cls.module) is not None
+
+    def iter_rows(self, file_path: str, max_rows: Optional[int] = None,
+                  sheet: int = 0) -> Iterator[list]:
+        raise NotImplementedError
+
+    def sheet_names(self, file_path: str) -> List[str]:
+        raise NotImplementedError
+
+
+class CalamineBackend(ReaderBackend):
+    """python-calamine（Rust 实现，支持 .xlsx / .xlsm / .xls，最快）"""
+    name = 'calamine'
+    module = 'python_calamine'
+
+    def iter_rows(self, file_path: str, max_rows: Optional[int] = None,
+                  sheet: int = 0) -> Iterator[list]:
+        from python_calamine import CalamineWorkbook
+
+        workbook = CalamineWorkbook.from_path(file_path)
+        try:
+            worksheet = workbook.get_sheet_by_index(sheet)
+            for row in worksheet.to_python(skip_empty_area=False, nrows=max_rows):
+                yield [self._convert_cell(value) for value in row]
+        finally:
+            self._close(workbook)
+
+    def sheet_names(self, file_path: str) -> List[str]:
+        from python_calamine import CalamineWorkbook
+
+        workbook = CalamineWorkbook.from_path(file_path)
+        try:
+            return list(workbook.sheet_names)
+        finally:
+            self._close(workbook)
+
+    @staticmethod
+    def _close(workbook):
+        close = getattr(workbook, 'close', None)
+        if close:
+            close()
+
+    @staticmethod
+    def _convert_cell(value):
+        if isinstance(value, float):
+            int_value = int(value) if math.isfinite(value) else None
+            if int_value == value:
+                return int_value
+            return value
+        if isinstance(value, date):
+            return pd.Timestamp(value)
+        if isinstance(value, timedelta):
+            return pd.Timedelta(value)
+        return value
+
+
+class OpenpyxlBackend(ReaderBackend):
+    """
+    openpyxl 只读模式（逐行解析 XML，内存占用与文件大小无关）
+
+    以文件对象打开，扩展名为 .xls 但内容为 .xlsx 的文件（部分 LIS 导出）也能读取
+    """
+    name = 'openpyxl'
+    module = 'openpyxl'
+
+    def iter_rows(self, file_path: str, max_rows: Optional[int] = None,
+                  sheet: int = 0) -> Iterator[list]:
+        from openpyxl import load_workbook
+
+        with open(file_path, 'rb') as f:
+            workbook = load_workbook(f, read_only=True, data_only=True, keep_links=False)
+            try:
+                worksheet = workbook.worksheets[sheet]
+                # 只读模式下的尺寸信息可能不准确，按实际内容读取
+                worksheet.reset_dimensions()
+                for row in worksheet.iter_rows(max_row=max_rows):
+                    yield [self._convert_cell(cell) for cell in row]
+            finally:
+                workbook.close()
+
+    def sheet_names(self, file_path: str) -> List[str]:
+        from openpyxl import load_workbook
+
+        with open(file_path, 'rb') as f:
+            workbook = load_workbook(f, read_only=True, data_only=True, keep_links=False)
+            try:
+                # 只包含工作表（不含图表页），与 iter_rows 的序号一致
+                return [worksheet.title for worksheet in workbook.worksheets]
+            finally:
+                workbook.close()
+
+    @staticmethod
+    def _convert_cell(cell):
+        from openpyxl.cell.cell import TYPE_ERROR, TYPE_NUMERIC
+
+        if cell.value is None:
+            return ''
+        if cell.data_type == TYPE_ERROR:
+            return np.nan
+        if cell.data_type == TYPE_NUMERIC:
+            value = int(cell.value)
+            if value == cell.value:
+                return value
+            return float(cell.value)
+        return cell.value
+
+
+class XlrdBackend(ReaderBackend):
+    """xlrd（旧版 .xls）"""
+    name = 'xlrd'
+    module = 'xlrd'
+
+    def iter_rows(self, file_path: str, max_rows: Optional[int] = None,
+                  sheet: int = 0) -> Iterator[list]:
+        import xlrd
+
+        book = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            worksheet = book.sheet_by_index(sheet)
+            epoch1904 = book.datemode
+            nrows = worksheet.nrows if max_rows is None else min(worksheet.nrows, max_rows)
+            for i in range(nrows):
+                yield [
+                    self._convert_cell(value, ctype, epoch1904)
+                    for value, ctype in zip(worksheet.row_values(i), worksheet.row_types(i))
+                ]
+        finally:
+            book.release_resources()
+
+    def sheet_names(self, file_path: str) -> List[str]:
+        import xlrd
+
+        book = xlrd.open_workbook(file_path, on_demand=True)
+        try:
+            return book.sheet_names()
+        finally:
+            book.release_resources()
+
+    @staticmethod
+    def _convert_cell(value, ctype: int, epoch1904: int):
+        import xlrd
+
+        if ctype == xlrd.XL_CELL_DATE:
+            try:
+                value = xlrd.xldate.xldate_as_datetime(value, epoch1904)
+            except OverflowError:
+                return value
+            # 只有时间没有日期的单元格
+            year = value.timetuple()[0:3]
+            if (not epoch1904 and year == (1899, 12, 31)) or (epoch1904 and year == (1904, 1, 1)):
+                value = dt_time(value.hour, value.minute, value.second, value.microsecond)
+        elif ctype == xlrd.XL_CELL_ERROR:
+            value = np.nan
+        elif ctype == xlrd.XL_CELL_BOOLEAN:
+            value = bool(value)
+        elif ctype == xlrd.XL_CELL_NUMBER and math.isfinite(value):
+            int_value = int(value)
+            if int_value == value:
+                value = int_value
+        return value
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (CalamineBackend, OpenpyxlBackend, XlrdBackend)
+}
+
+
+class ReaderStats:
+    """
+    按引擎统计读取速度（可合并，多进程时由主进程汇总）
+    """
+
+    def __init__(self):
+        self.backends: Dict[str, Dict] = {}
+
+    def record(self, backend: str, rows: int = 0, cells: int = 0,
+               seconds: float = 0.0, files: int = 0):
+        """累计一次读取"""
+        stats = self.backends.setdefault(
+            backend, {'files': 0, 'rows': 0, 'cells': 0, 'seconds': 0.0}
+        )
+        stats['files'] += files
+        stats['rows'] += rows
+        stats['cells'] += cells
+        stats['seconds'] += seconds
+
+    def merge(self, other: 'ReaderStats'):
+        """合并另一个统计对象"""
+        for backend, stats in other.backends.items():
+            self.record(backend, **stats)
+
+    def summary(self) -> Dict[str, Dict]:
+        """每个引擎的累计量和吞吐量（行/秒、单元格/秒）"""
+        result = {}
+        for backend, stats in self.backends.items():
+            seconds = stats['seconds']
+            result[backend] = {
+                **stats,
+                'seconds': round(seconds, 3),
+                'rows_per_second': round(stats['rows'] / seconds) if seconds else 0,
+                'cells_per_second': round(stats['cells'] / seconds) if seconds else 0,
+            }
+        return result
+
+
+class RowFilter:
+    """
+    读取时按某一列的值筛选行（谓词下推）
+
+    在类型推断之前对原始单元格值做判断，不保留的行不会被解析成 DataFrame；
+    每个不同的值只判断一次。记录跳过的行数和被跳过的不同值，
+    使调用方仍能统计数据中出现过的全部值
+    """
+
+    def __init__(self, column: str, predicate: Callable[[Any], bool], key: str = ''):
+        """
+        Args:
+            column: 筛选列的列名（与去除首尾空格后的表头比较）
+            predicate: 判断原始单元格值的函数（空单元格为 ''），返回 True 的行被保留
+            key: 筛选规则的标识（参与读取缓存键），规则相同时应相同
+        """
+        self.column = column
+        self.predicate = predicate
+        self.key = key
+        self.rows_skipped = 0
+        self._results: Dict[Tuple[type, Any], bool] = {}
+        self._skipped_values = set()
+
+    def keep(self, value, rows: int = 1) -> bool:
+        """判断筛选列的原始单元格值为 value 的 rows 行是否保留"""
+        memo_key = (type(value), value)
+        result = self._results.get(memo_key)
+        if result is None:
+            result = self._results[memo_key] = bool(self.predicate(value))
+            # 与 TextParser 一样把缺失值标记视为空值，不计入出现过的值
+            if not result and value == value and str(value) not in STR_NA_VALUES:
+                self._skipped_values.add(value if isinstance(value, str) else str(value))
+        if not result:
+            self.rows_skipped += rows
+        return result
+
+    @property
+    def skipped_values(self) -> set:
+        """被跳过的行中出现过的不同值（非空）"""
+        return set(self._skipped_values)
+
+    def state(self) -> Dict:
+        """筛选结果统计（可 JSON 序列化，随读取缓存保存）"""
+        return {'rows_skipped': self.rows_skipped, 'skipped_values': sorted(self._skipped_values)}
+
+    def restore(self, state: Dict):
+        """从读取缓存恢复筛选结果统计（命中缓存时不再逐行判断）"""
+        self.rows_skipped += state['rows_skipped']
+        self._skipped_values.update(state['skipped_values'])
+
+
+class SheetSelector:
+    """
+    按 profile 中 signature.sheets 选择要读取的工作表
+
+    写法:
+        sheets: all                      # 全部工作表
+        sheets: {pattern: '^Sheet\\d+$'}   # 名称匹配正则（re.search）的工作表
+        sheets: [0, 1, '2月']            # 按序号（从 0 开始）或名称
+    未配置时只读取第一个工作表（parse 返回 None）
+    """
+
+    def __init__(self, mode: str, pattern: Optional[str] = None, items: Tuple = ()):
+        self.mode = mode
+        self.pattern = pattern
+        self.items = tuple(items)
+        self._regex = re.compile(pattern) if pattern is not None else None
+
+    @classmethod
+    def parse(cls, value) -> Optional['SheetSelector']:
+        """
+        解析 signature.sheets 配置
+
+        Raises:
+            ValueError: 配置格式错误
+        """
+        if value is None:
+            return None
+        if isinstance(value, str) and value.strip().lower() == LoaderConfig.ALL_SHEETS:
+            return cls('all')
+        if isinstance(value, dict) and set(value) == {'pattern'} and isinstance(value['pattern'], str):
+            try:
+                return cls('pattern', pattern=value['pattern'])
+            except re.error as e:
+                raise ValueError(f"工作表名称正则错误: {value['pattern']} ({e})")
+        if isinstance(value, (int, str)) and not isinstance(value, bool):
+            value = [value]
+        if (isinstance(value, list) and value
+                and all(isinstance(item, (int, str)) and not isinstance(item, bool) for item in value)):
+            if any(isinstance(item, int) and item < 0 for item in value):
+                raise ValueError(f"工作表序号须从 0 开始: {value}")
+            return cls('list', items=value)
+        raise ValueError(
+            f"无法识别的工作表配置 signature.sheets: {value!r}"
+            f"（可用 {LoaderConfig.ALL_SHEETS}、{{pattern: 正则}} 或序号 / 名称列表）"
+        )
+
+    def select(self, names: List[str]) -> List[Tuple[int, str]]:
+        """
+        Args:
+            names: 文件中的工作表名称（按顺序）
+
+        Returns:
+            [(序号, 名称), ...]，按工作表在文件中的顺序，不存在的序号和名称被忽略
+        """
+        if self.mode == 'all':
+            return list(enumerate(names))
+        if self.mode == 'pattern':
+            return [(i, name) for i, name in enumerate(names) if self._regex.search(name)]
+        wanted = set(self.items)
+        return [(i, name) for i, name in enumerate(names) if i in wanted or name in wanted]
+
+    def __getstate__(self):
+        return {'mode': self.mode, 'pattern': self.pattern, 'items': self.items}
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __repr__(self) -> str:
+        if self.mode == 'all':
+            return LoaderConfig.ALL_SHEETS
+        if self.mode == 'pattern':
+            return f'pattern={self.pattern}'
+        return ', '.join(map(str, self.items))
+
+
+def backend_order(file_path: str, preferred: Optional[str] = None) -> List[type]:
+    """
+    返回文件可用的读取引擎（按优先顺序）
+
+    Args:
+        file_path: 文件路径（按扩展名选择引擎）
+        preferred: 优先使用的引擎名称；None 时读取环境变量 LIS_EXCEL_READER
+    """
+    preferred = preferred or os.getenv('LIS_EXCEL_READER')
+    if preferred and preferred not in BACKENDS:
+        raise ValueError(f"未知的读取引擎: {preferred}（可选: {', '.join(BACKENDS)}）")
+
+    ext = Path(file_path).suffix.lower()
+    names = list(LoaderConfig.READER_BACKENDS.get(ext, ()))
+    if preferred in names:
+        names.remove(preferred)
+        names.insert(0, preferred)
+
+    return [BACKENDS[name] for name in names if BACKENDS[name].is_available()]
+
+
+def _available_backends(file_path: str, reader: Optional[str]) -> List[type]:
+    """可用的读取引擎；没有任何可用引擎时抛出 ImportError"""
+    backends = backend_order(file_path, reader)
+    if not backends:
+        ext = Path(file_path).suffix.lower()
+        required = [BACKENDS[name].module for name in LoaderConfig.READER_BACKENDS.get(ext, ())]
+        raise ImportError(f"没有可读取 {ext} 文件的引擎，请安装: {', '.join(required) or '无'}")
+    return backends
+
+
+def sheet_names(file_path: str, reader: Optional[str] = None) -> List[str]:
+    """
+    工作表名称列表（序号与 iter_frames 的 sheet 参数一致），首选引擎无法打开文件时自动回退
+    """
+    last_error = None
+    for backend in _available_backends(file_path, reader):
+        try:
+            return backend().sheet_names(file_path)
+        except Exception as e:
+            last_error = e
+            logger.warning(f"{backend.name} 无法读取 {os.path.basename(file_path)}，尝试下一个引擎: {e}")
+    raise last_error
+
+
+def open_rows(file_path: str, max_rows: Optional[int] = None,
+              reader: Optional[str] = None, sheet: int = 0) -> Tuple[str, Iterator[list]]:
+    """
+    打开文件并逐行读取一个工作表，首选引擎无法打开文件时自动回退
+
+    Args:
+        sheet: 工作表序号（从 0 开始）
+
+    Returns:
+        (实际使用的引擎名称, 行迭代器)
+    """
+    last_error = None
+    for backend in _available_backends(file_path, reader):
+        rows = backend().iter_rows(file_path, max_rows, sheet)
+        try:
+            first = next(rows, None)
+        except Exception as e:
+            last_error = e
+            logger.warning(f"{backend.name} 无法读取 {os.path.basename(file_path)}，尝试下一个引擎: {e}")
+            continue
+        return backend.name, _prepend(first, rows)
+
+    raise last_error
+
+
+def _prepend(first: Optional[list], rows: Iterator[list]) -> Iterator[list]:
+    """将已读取的第一行放回迭代器（迭代器关闭时同时关闭文件）"""
+    try:
+        if first is not None:
+            yield first
+            yield from rows
+    finally:
+        rows.close()
+
+
+def iter_frames(file_path: str, header: Optional[int] = 0, chunk_rows: Optional[int] = None,
+                nrows: Optional[int] = None, usecols: Optional[Callable] = None,
+                dtype_backend: Optional[str] = None, reader: Optional[str] = None,
+                stats: Optional[ReaderStats] = None,
+                row_filter: Optional[RowFilter] = None, sheet: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    读取一个工作表（默认第一个），按块生成 DataFrame
+
+    结果与 pd.read_excel(file_path, header=header, nrows=nrows, dtype_backend=...) 一致；
+    每积累 chunk_rows 行生成一个块（None 时整个表作为一个块）
+
+    Args:
+        header: 表头所在行（None 表示没有表头，列名为 0..n-1），之前的行被跳过
+        chunk_rows: 每块最大行数
+        nrows: 最多读取的数据行数
+        usecols: 按列名筛选列的函数（列名规则同 pandas），只有返回 True 的列被解析
+        dtype_backend: 传给 TextParser 的 dtype_backend（如 'numpy_nullable'）
+        reader: 优先使用的读取引擎
+        stats: 读取速度统计（None 表示不统计）
+        row_filter: 按列值筛选行（需要表头；表头中没有该列时不筛选），
+            不保留的行在类型推断之前丢弃，chunk_rows 和 nrows 分别按保留的行数和源数据行数计算
+        sheet: 工作表序号（从 0 开始，见 sheet_names）
+
+    注意：类型推断按块进行；第一个块中为文本的列在后续块中保持文本，
+    其余列在不同块中的 dtype 可能不同（使用 row_filter 时只根据保留的行推断）
+    """
+    skip_rows = header or 0
+    max_rows = skip_rows + 1 + nrows if nrows is not None else None
+    backend, source = open_rows(file_path, max_rows, reader, sheet)
+    try:
+        yield from _frames_from_rows(source, header, chunk_rows, nrows, usecols,
+                                     dtype_backend, backend, stats, row_filter)
+    finally:
+        source.close()
+
+
+def read_frame(file_path: str, header: Optional[int] = 0, **kwargs) -> pd.DataFrame:
+    """整表读取为一个 DataFrame（参数同 iter_frames）"""
+    return next(iter_frames(file_path, header=header, chunk_rows=None, **kwargs))
+
+
+def read_rows(file_path: str, max_rows: Optional[int] = None,
+              reader: Optional[str] = None) -> List[list]:
+    """
+    读取前 max_rows 行原始单元格值（不做类型推断，不读取其余行）
+
+    配合 frame_from_rows 使用：读取一次后可以按不同的表头位置构建 DataFrame
+    """
+    _, source = open_rows(file_path, max_rows, reader)
+    try:
+        return list(source)
+    finally:
+        source.close()
+
+
+def read_head_rows(file_path: str, max_rows: int, reader: Optional[str] = None) -> List[list]:
+    """
+    读取第一个工作表的前 max_rows 行原始单元格值（结果同 read_rows，用于只需要表头的场合）
+
+    .xlsx / .xlsm（包括扩展名为 .xls 的 .xlsx）直接流式解析工作表 XML 的开头，
+    共享字符串只解析到表头用到的最大序号为止，耗时与文件大小无关
+    （日期格式的数值单元格返回数值，不转换为日期）；其他文件或解析失败时使用 read_rows
+    """
+    if zipfile.is_zipfile(file_path):
+        try:
+            return _xlsx_head_rows(file_path, max_rows)
+        except Exception as e:
+            logger.debug(f"无法直接解析 {os.path.basename(file_path)} 的表头，使用读取引擎: {e}")
+    return read_rows(file_path, max_rows, reader)
+
+
+def header_names(values: list) -> List[str]:
+    """表头行的列名（与读取为 DataFrame 并清理列名后的结果相同）"""
+    values = list(values)
+    while values and values[-1] == '':
+        values.pop()
+    return [str(name).strip() for name in _column_names(values)]
+
+
+_XLSX_MAIN = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+_XLSX_RELS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+_XLSX_DOC_RELS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+
+
+def _xlsx_head_rows(file_path: str, max_rows: int) -> List[list]:
+    """按 OpenpyxlBackend 的转换规则解析第一个工作表的前 max_rows 行（不经过 openpyxl）"""
+    with zipfile.ZipFile(file_path) as archive:
+        sheet_path, strings_path = _xlsx_parts(archive)
+        rows: List[list] = []
+        shared: List[Tuple[int, int]] = []  # (行, 列)：值为共享字符串序号，稍后替换
+        next_row = 1
+        with archive.open(sheet_path) as f:
+            for _, element in ElementTree.iterparse(f):
+                if element.tag != f'{_XLSX_MAIN}row':
+                    continue
+                number = int(element.get('r', next_row))
+                if number > max_rows:
+                    break
+                # 中间缺少的行为空行（与 openpyxl 一致）
+                rows.extend([] for _ in range(number - next_row))
+                rows.append(_xlsx_row(element, len(rows), shared))
+                next_row = number + 1
+                element.clear()
+
+        if shared:
+            strings = _xlsx_shared_strings(archive, strings_path, max(rows[i][j] for i, j in shared))
+            for i, j in shared:
+                rows[i][j] = strings[rows[i][j]]
+    return rows
+
+
+def _xlsx_parts(archive: zipfile.ZipFile) -> Tuple[str, Optional[str]]:
+    """第一个工作表（不含图表页）和共享字符串在压缩包中的路径"""
+    def resolve(target: str) -> str:
+        return target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+
+    relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    strings_path = None
+    for relation in relations.iter(f'{_XLSX_RELS}Relationship'):
+        kind = relation.get('Type', '')
+        if kind.endswith('/worksheet'):
+            targets[relation.get('Id')] = resolve(relation.get('Target'))
+        elif kind.endswith('/sharedStrings'):
+            strings_path = resolve(relation.get('Target'))
+
+    workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+    for sheet in workbook.iter(f'{_XLSX_MAIN}sheet'):
+        target = targets.get(sheet.get(f'{_XLSX_DOC_RELS}id'))
+        if target is not None:
+            return target, strings_path
+    raise ValueError("工作簿中没有工作表")
+
+
+def _xlsx_row(element, row_index: int, shared: List[Tuple[int, int]]) -> list:
+    values = []
+    for cell in element.iter(f'{_XLSX_MAIN}c'):
+        reference = cell.get('r')
+        if reference:
+            column = _column_index(reference)
+            values.extend('' for _ in range(column - len(values)))
+        kind = cell.get('t', 'n')
+        if kind == 'inlineStr':
+            node = cell.find(f'{_XLSX_MAIN}is')
+            values.append(_xlsx_text(node) if node is not None else '')
+            continue
+        raw = cell.findtext(f'{_XLSX_MAIN}v')
+        if raw is None:
+            values.append('')
+        elif kind == 's':
+            shared.append((row_index, len(values)))
+            values.append(int(raw))
+        elif kind == 'n':
+            number = float(raw)
+            values.append(int(number) if number.is_integer() else number)
+        elif kind == 'b':
+            values.append(raw == '1')
+        elif kind == 'e':
+            values.append(np.nan)
+        else:
+            values.append(raw)
+    return values
+
+
+def _column_index(reference: str) -> int:
+    """单元格引用（如 AB3）的列序号（从 0 开始）"""
+    index = 0
+    for char in reference:
+        if not char.isalpha():
+            break
+        index = index * 26 + ord(char.upper()) - 64
+    return index - 1
+
+
+def _xlsx_text(node) -> str:
+    """字符串节点的文本（富文本各段相连，不含拼音注音）"""
+    text = node.findtext(f'{_XLSX_MAIN}t')
+    if text is not None:
+        return text
+    return ''.join(run.findtext(f'{_XLSX_MAIN}t') or '' for run in node.iter(f'{_XLSX_MAIN}r'))
+
+
+def _xlsx_shared_strings(archive: zipfile.ZipFile, path: Optional[str], last: int) -> List[str]:
+    """前 last + 1 个共享字符串（流式解析，读到 last 为止）"""
+    if path is None:
+        raise ValueError("工作簿中没有共享字符串表")
+    strings = []
+    with archive.open(path) as f:
+        for _, element in ElementTree.iterparse(f):
+            if element.tag != f'{_XLSX_MAIN}si':
+                continue
+            strings.append(_xlsx_text(element))
+            element.clear()
+            if len(strings) > last:
+                break
+    return strings
+
+
+def frame_from_rows(rows: List[list], header: Optional[int] = 0, nrows: Optional[int] = None,
+                    dtype_backend: Optional[str] = None) -> pd.DataFrame:
+    """
+    由 read_rows 读取的原始行构建 DataFrame
+
+    结果与对同一文件调用 read_frame(header=header, nrows=nrows) 一致
+    （rows 需包含表头之后至少 nrows + 1 行，或者已经是整个工作表）
+    """
+    source = iter([list(row) for row in rows])
+    return next(_frames_from_rows(source, header, None, nrows, None, dtype_backend))
+
+
+def _frames_from_rows(source: Iterator[list], header: Optional[int], chunk_rows: Optional[int],
+                      nrows: Optional[int], usecols: Optional[Callable],
+                      dtype_backend: Optional[str], backend: str = '',
+                      stats: Optional[ReaderStats] = None,
+                      row_filter: Optional[RowFilter] = None) -> Iterator[pd.DataFrame]:
+    """按 iter_frames 的规则将原始行转为 DataFrame 块"""
+    skip_rows = header or 0
+    parser = _FrameBuilder(header is not None, dtype_backend)
+    data_rows = 0
+    keep = None
+    filter_index = None
+    rows = []
+    blank_rows = []
+
+    started = time.perf_counter()
+    for row_number, values in enumerate(source):
+        if row_number < skip_rows:
+            continue
+
+        # 去掉行尾的空单元格
+        while values and values[-1] == '':
+            values.pop()
+
+        if header is not None and parser.header is None:
+            names = _column_names(values)
+            if row_filter is not None:
+                filter_index = next((i for i, name in enumerate(names)
+                                     if str(name).strip() == row_filter.column), None)
+            if usecols is not None:
+                keep = [i for i, name in enumerate(names) if usecols(name)]
+                if not keep:
+                    break
+                # 列被筛选后按原位置命名
+                values = names
+            parser.header = _project(values, keep)
+            continue
+
+        if nrows is not None and data_rows >= nrows:
+            if header is None and data_rows == 0:
+                # 没有表头时按第一行确定列数
+                parser.width = len(values)
+            break
+        data_rows += 1
+
+        # 空行只有在后面还有数据时才保留（与整表读取时去掉末尾空行一致）
+        if not values:
+            blank_rows.append(values)
+            continue
+        if blank_rows:
+            if filter_index is None or row_filter.keep('', len(blank_rows)):
+                rows.extend(blank_rows)
+            blank_rows = []
+        if filter_index is not None:
+            if not row_filter.keep(values[filter_index] if filter_index < len(values) else ''):
+                continue
+        rows.append(_project(values, keep))
+
+        if chunk_rows and len(rows) >= chunk_rows:
+            df = parser.build(rows)
+            rows = []
+            if stats is not None:
+                stats.record(backend, rows=len(df), cells=df.size,
+                             seconds=time.perf_counter() - started)
+            yield df
+            started = time.perf_counter()
+
+    if usecols is not None and not keep:
+        df = pd.DataFrame()
+    elif header is not None and parser.header is None:
+        df = pd.DataFrame()
+    elif rows or parser.columns is None:
+        df = parser.build(rows)
+    else:
+        df = None
+
+    if stats is not None:
+        stats.record(backend, rows=len(df) if df is not None else 0,
+                     cells=df.size if df is not None else 0,
+                     seconds=time.perf_counter() - started, files=1)
+    if df is not None:
+        yield df
+
+
+def _column_names(header: list) -> list:
+    """与 pandas 相同的列名（空列名为 Unnamed: i，重名加 .1、.2 后缀），供 usecols 判断"""
+    names = []
+    counts = {}
+    for i, value in enumerate(header):
+        name = value if value != '' else f'Unnamed: {i}'
+        count = counts.get(name, 0)
+        counts[name] = count + 1
+        names.append(f'{name}.{count}' if count else name)
+    return names
+
+
+def _project(values: list, keep: Optional[List[int]]) -> list:
+    """只保留选中的列"""
+    if keep is None:
+        return values
+    return [values[i] if i < len(values) else '' for i in keep]
+
+
+class _FrameBuilder:
+    """
+    将原始行转为 DataFrame
+
+    第一个块连同表头一起解析以得到列名（处理重名、空列名），
+    后续块复用第一个块的列名和文本列类型，行宽按第一个块对齐
+    """
+
+    def __init__(self, has_header: bool, dtype_backend: Optional[str]):
+        self.has_header = has_header
+        self.header = None
+        self.columns = None
+        self.width = 0
+        self.text_dtypes = {}
+        self.options = dict(skip_blank_lines=False)
+        if dtype_backend:
+            self.options['dtype_backend'] = dtype_backend
+
+    def build(self, rows: List[list]) -> pd.DataFrame:
+        if self.columns is None:
+            return self._build_first(rows)
+
+        if not rows:
+            return pd.DataFrame(columns=self.columns)
+        rows = self._pad(rows)
+        return TextParser(rows, names=self.columns, header=None,
+                          dtype=self.text_dtypes, **self.options).read()
+
+    def _build_first(self, rows: List[list]) -> pd.DataFrame:
+        header = self.header if self.has_header else []
+        self.width = max([self.width, len(header)] + [len(row) for row in rows])
+        data = self._pad(([header] if self.has_header else []) + rows)
+
+        if not data and self.width:
+            df = pd.DataFrame(columns=range(self.width))
+        elif not data:
+            df = pd.DataFrame()
+        elif self.has_header:
+            df = TextParser(data, header=0, **self.options).read()
+        else:
+            df = TextParser(data, header=None, **self.options).read()
+
+        # 第一个块中为文本的列在后续块中保持文本，
+        # 避免 "21.10" 这类值在某个全是数字的块中被转成 21.1
+        self.columns = list(df.columns)
+        self.text_dtypes = {
+            col: dtype for col, dtype in df.dtypes.items()
+            if dtype == object or isinstance(dtype, pd.StringDtype)
+        }
+        return df
+
+    def _pad(self, rows: List[list]) -> List[list]:
+        width = self.width
+        return [(row + [''] * (width - len(row)))[:width] for row in rows]
@@ -0,0 +1,318 @@
+"""
+完整数据扫描模块
+每个文件只流式读取一遍，同时收集检验项目计数、结果值格式、日期格式和各项目的单位，
+供向导第 3 步（项目选择）和第 4 步（数值解析规则）使用，不再为每一列重复读取文件
+"""
+import multiprocessing
+import os
+import time
+from collections import Counter
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+from .column_mapper import ColumnMapper
+from .constants import ParallelConfig, ScanConfig, StreamingConfig
+from .file_cache import open_file_cache
+from .readers import ReaderStats, iter_frames
+from .signals import Signal
+from .utils import classify_value_format, detect_special_value_patterns
+
+
+class ScanReport:
+    """
+    可合并的扫描结果
+
+    所有计数都按行统计；样本为不同的原始值，每类数量有上限
+    """
+
+    def __init__(self):
+        self.files = 0
+        self.rows = 0
+        self.errors: List[str] = []
+        self.missing_fields: Dict[str, List[str]] = {}  # {文件名: 缺少的字段}
+        self.test_counts = Counter()
+        self.value_formats = Counter()
+        self.value_samples: Dict[str, List[str]] = {}
+        self.date_formats = Counter()
+        self.date_samples: Dict[str, List[str]] = {}
+        self.test_units: Dict[str, set] = {}
+        self.reader_stats = ReaderStats()
+
+    def add_chunk(self, df: pd.DataFrame):
+        """累计一块已映射为标准字段名的数据"""
+        self.rows += len(df)
+
+        test_names = None
+        if 'test_name' in df.columns:
+            test_names = df['test_name'].astype('string').str.strip()
+            self.test_counts.update(test_names.dropna().value_counts().to_dict())
+
+        if 'test_value' in df.columns:
+            values = df['test_value'].dropna().astype('string').str.strip()
+            for value, count in values.value_counts(sort=False).items():
+                value_format = classify_value_format(value)
+                self.value_formats[value_format] += count
+                self._add_sample(self.value_samples, value_format, value,
+                                 ScanConfig.VALUE_SAMPLES_PER_FORMAT)
+
+        if 'sample_datetime' in df.columns:
+            self._add_dates(df['sample_datetime'].dropna())
+
+        if test_names is not None and 'unit' in df.columns:
+            units = pd.DataFrame({
+                'test_name': test_names,
+                'unit': df['unit'].astype('string').str.strip()
+            }).dropna().drop_duplicates()
+            for test_name, unit in zip(units['test_name'], units['unit']):
+                test_units = self.test_units.setdefault(test_name, set())
+                if len(test_units) < ScanConfig.UNITS_PER_TEST:
+                    test_units.add(unit)
+
+    def _add_dates(self, dates: pd.Series):
+        """按格式（数字替换为 9）统计日期值"""
+        if pd.api.types.is_datetime64_any_dtype(dates):
+            # Excel 中的日期单元格，读取时已经是日期类型
+            self.date_formats['Excel 日期'] += len(dates)
+            for value in dates.head(ScanConfig.DATE_SAMPLES_PER_FORMAT):
+                self._add_sample(self.date_samples, 'Excel 日期', str(value),
+                                 ScanConfig.DATE_SAMPLES_PER_FORMAT)
+            return
+
+        counts = dates.astype('string').str.strip().value_counts(sort=False)
+        shapes = counts.index.str.replace(r'\d', '9', regex=True)
+        for value, shape, count in zip(counts.index, shapes, counts.to_numpy()):
+            self.date_formats[shape] += int(count)
+            self._add_sample(self.date_samples, shape, value, ScanConfig.DATE_SAMPLES_PER_FORMAT)
+
+    @staticmethod
+    def _add_sample(samples: Dict[str, List[str]], key: str, value: str, limit: int):
+        bucket = samples.setdefault(key, [])
+        if len(bucket) < limit and value not in bucket:
+            bucket.append(value)
+
+    def merge(self, other: 'ScanReport'):
+        """合并另一个扫描结果（按文件顺序合并时样本与逐个扫描一致）"""
+        self.files += other.files
+        self.rows += other.rows
+        self.errors.extend(other.errors)
+        self.missing_fields.update(other.missing_fields)
+        self.test_counts.update(other.test_counts)
+        self.value_formats.update(other.value_formats)
+        self.date_formats.update(other.date_formats)
+        for key, values in other.value_samples.items():
+            for value in values:
+                self._add_sample(self.value_samples, key, value, ScanConfig.VALUE_SAMPLES_PER_FORMAT)
+        for key, values in other.date_samples.items():
+            for value in values:
+                self._add_sample(self.date_samples, key, value, ScanConfig.DATE_SAMPLES_PER_FORMAT)
+        for test_name, units in other.test_units.items():
+            test_units = self.test_units.setdefault(test_name, set())
+            for unit in sorted(units):
+                if len(test_units) < ScanConfig.UNITS_PER_TEST:
+                    test_units.add(unit)
+        self.reader_stats.merge(other.reader_stats)
+
+    def format_info(self) -> Dict:
+        """结果值格式分布（与 detect_value_formats 的返回结构相同，计数为行数）"""
+        format_counts = {
+            name: int(self.value_formats.get(name, 0))
+            for name in ('normal', 'scientific', 'power', 'titer', 'range', 'less_than',
+                         'greater_than', 'text_positive', 'text_negative', 'invalid')
+        }
+        return {
+            'format_counts': format_counts,
+            'samples': {name: list(self.value_samples.get(name, [])) for name in format_counts},
+            'total': sum(format_counts.values()),
+            'basis': 'rows',
+        }
+
+    def special_patterns(self) -> Dict[str, List[str]]:
+        """特殊值模式（同 detect_special_value_patterns，基于收集到的样本）"""
+        samples = [value for values in self.value_samples.values() for value in values]
+        return detect_special_value_patterns(pd.Series(samples, dtype=object))
+
+    def units_for(self, test_name: str) -> List[str]:
+        """某个检验项目出现过的单位"""
+        return sorted(self.test_units.get(test_name, ()))
+
+    def to_dict(self) -> Dict:
+        """转为可序列化的字典"""
+        return {
+            'files': self.files,
+            'rows': self.rows,
+            'errors': list(self.errors),
+            'missing_fields': dict(self.missing_fields),
+            'test_counts': {name: int(count) for name, count in self.test_counts.most_common()},
+            'value_formats': self.format_info(),
+            'date_formats': {shape: int(count) for shape, count in self.date_formats.most_common()},
+            'date_samples': dict(self.date_samples),
+            'test_units': {name: sorted(units) for name, units in self.test_units.items()},
+            'reader_stats': self.reader_stats.summary(),
+        }
+
+
+def scan_file(file_path: str, mapping: Dict, skip_rows: int = 0,
+              chunk_rows: Optional[int] = StreamingConfig.CHUNK_ROWS,
+              reader: Optional[str] = None, use_cache: Optional[bool] = None) -> ScanReport:
+    """
+    扫描单个文件（可在子进程中运行）
+
+    只解析映射到 ScanConfig.FIELDS 的原始列；成功的扫描结果保存在读取缓存中，
+    文件未修改时直接返回缓存的结果
+    """
+    filename = os.path.basename(file_path)
+    fields = {field: mapping.get(field) for field in ScanConfig.FIELDS}
+
+    start = time.perf_counter()
+    cache = open_file_cache(use_cache)
+    key = None
+    if cache is not None:
+        try:
+            key = cache.key(file_path, 'scan', mapping=fields, skip_rows=skip_rows,
+                            chunk_rows=chunk_rows)
+        except OSError:
+            # 文件无法访问时不使用缓存，错误由下面的读取报告
+            cache = None
+        else:
+            report = cache.get_result(key, 'scan')
+            if report is not None:
+                report.reader_stats.record('cache', rows=report.rows,
+                                           seconds=time.perf_counter() - start, files=1)
+                return report
+
+    report = ScanReport()
+    mapper = ColumnMapper(fields)
+    wanted = set(mapper.reverse_mapping)
+
+    try:
+        for df in iter_frames(file_path, header=skip_rows, chunk_rows=chunk_rows,
+                              usecols=lambda name: str(name).strip() in wanted,
+                              dtype_backend='numpy_nullable', reader=reader,
+                              stats=report.reader_stats):
+            df.columns = [str(col).strip() for col in df.columns]
+            df_mapped = mapper.apply(df, copy=False)
+            missing = [field for field in ScanConfig.FIELDS
+                       if mapping.get(field) and field not in df_mapped.columns]
+            if missing:
+                report.missing_fields[filename] = missing
+            report.add_chunk(df_mapped)
+        report.files = 1
+    except Exception as e:
+        report.errors.append(f"扫描文件失败 {filename}: {str(e)}")
+
+    if cache is not None and not report.errors:
+        # 缓存中不保存本次的读取速度统计
+        reader_stats, report.reader_stats = report.reader_stats, ReaderStats()
+        cache.put_result(key, 'scan', file_path, report)
+        report.reader_stats = reader_stats
+    return report
+
+
+class DataScanner:
+    """
+    完整数据扫描器
+
+    files 较多时可以多进程并行扫描，结果按文件顺序合并
+    """
+    progress = Signal(int, str)  # (percentage, message)
+    error = Signal(str)
+
+    def __init__(self, mapping: Dict, skip_rows: int = 0,
+                 workers: int = ParallelConfig.DEFAULT_WORKERS,
+                 chunk_rows: Optional[int] = StreamingConfig.CHUNK_ROWS,
+                 reader: Optional[str] = None, use_cache: Optional[bool] = None):
+        """
+        Args:
+            mapping: 字段映射 {standard_field: original_column_name}
+            skip_rows: 表头前跳过的行数
+            workers: 并行扫描的进程数
+            chunk_rows: 每个数据块的最大行数
+            reader: 优先使用的读取引擎
+            use_cache: 是否使用文件读取缓存，None 时按环境变量 LIS_FILE_CACHE 决定
+        """
+        self.mapping = mapping
+        self.skip_rows = skip_rows
+        self.workers = max(1, workers)
+        self.chunk_rows = chunk_rows
+        self.reader = reader
+        self.use_cache = use_cache
+        self._is_cancelled = False
+
+    def cancel(self):
+        """取消扫描"""
+        self._is_cancelled = True
+
+    def scan(self, files: List[str]) -> Optional[ScanReport]:
+        """
+        扫描文件列表
+
+        Returns:
+            合并后的扫描结果；取消时返回 None
+        """
+        report = ScanReport()
+        if not files:
+            return report
+
+        args = (self.mapping, self.skip_rows, self.chunk_rows, self.reader, self.use_cache)
+        workers = min(self.workers, len(files))
+        if workers > 1:
+            results = self._scan_parallel(files, args, workers)
+        else:
+            results = self._scan_sequential(files, args)
+        if results is None:
+            return None
+
+        for file_report in results:
+            for message in file_report.errors:
+                self.error.emit(message)
+            report.merge(file_report)
+
+        self.progress.emit(
+            100, f"扫描完成: {len(report.test_counts)} 个检验项目, {report.rows:,} 行"
+        )
+        return report
+
+    def _scan_sequential(self, files: List[str], args: tuple) -> Optional[List[ScanReport]]:
+        results = []
+        for idx, file_path in enumerate(files):
+            if self._is_cancelled:
+                return None
+            self.progress.emit(
+                int((idx / len(files)) * 100),
+                f"扫描 {idx+1}/{len(files)}: {os.path.basename(file_path)}"
+            )
+            results.append(scan_file(file_path, *args))
+        return results
+
+    def _scan_parallel(self, files: List[str], args: tuple,
+                       workers: int) -> Optional[List[ScanReport]]:
+        # 使用 spawn 启动子进程，避免在已有 Qt 线程的进程中 fork
+        context = multiprocessing.get_context('spawn')
+        executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+        try:
+            futures = {
+                executor.submit(scan_file, file_path, *args): idx
+                for idx, file_path in enumerate(files)
+            }
+            pending = set(futures)
+            results = [None] * len(files)
+            while pending:
+                if self._is_cancelled:
+                    return None
+                finished, pending = wait(
+                    pending, timeout=ParallelConfig.POLL_INTERVAL_SECONDS,
+                    return_when=FIRST_COMPLETED
+                )
+                for future in finished:
+                    idx = futures[future]
+                    results[idx] = future.result()
+                    done = len(files) - len(pending)
+                    self.progress.emit(
+                        int((done / len(files)) * 100),
+                        f"完成 {done}/{len(files)}: {os.path.basename(files[idx])}"
+                    )
+            return results
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
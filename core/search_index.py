@@ -0,0 +1,65 @@
+"""
+文本搜索索引模块
+为向导中的项目列表等长列表预先建立小写（安装 pypinyin 时还包括全拼和拼音首字母）的搜索键，
+子串搜索只比较预先生成的键；输入逐字增加时只在上一次的结果中继续筛选
+"""
+from importlib.util import find_spec
+from typing import List, Sequence
+
+_HAS_PYPINYIN = find_spec('pypinyin') is not None
+
+# 同一项的各个搜索键之间的分隔符（输入中不会出现，子串不会跨越两个键）
+_KEY_SEPARATOR = '\x00'
+
+
+def _pinyin_keys(text: str) -> List[str]:
+    """全拼和拼音首字母（无中文或未安装 pypinyin 时返回空列表）"""
+    if not _HAS_PYPINYIN or text.isascii():
+        return []
+    from pypinyin import lazy_pinyin
+
+    syllables = [syllable.lower() for syllable in lazy_pinyin(text) if syllable.strip()]
+    return [''.join(syllables), ''.join(syllable[0] for syllable in syllables)]
+
+
+class SearchIndex:
+    """
+    子串搜索索引（不区分大小写，结果为原列表中的序号，按原顺序排列）
+
+    安装 pypinyin 时，中文项目也能用全拼或首字母搜索（如「血红蛋白」可用 xhdb 搜到）
+    """
+
+    def __init__(self, texts: Sequence[str]):
+        """
+        Args:
+            texts: 要搜索的文本列表
+        """
+        self.keys = [
+            _KEY_SEPARATOR.join([text.lower()] + _pinyin_keys(text))
+            for text in map(str, texts)
+        ]
+        self._last_query = ''
+        self._last_result = list(range(len(self.keys)))
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def search(self, query: str) -> List[int]:
+        """
+        Args:
+            query: 搜索文本（去掉首尾空白，不区分大小写；为空时返回全部）
+
+        Returns:
+            包含该文本的项的序号列表
+        """
+        query = query.strip().lower()
+        if not query:
+            result = list(range(len(self.keys)))
+        else:
+            # 包含新查询的键一定包含上一次的查询：只需在上一次的结果中筛选
+            candidates = self._last_result if self._last_query and self._last_query in query \
+                else range(len(self.keys))
+            keys = self.keys
+            result = [i for i in candidates if query in keys[i]]
+        self._last_query, self._last_result = query, result
+        return result
@@ -0,0 +1,60 @@
+"""
+轻量信号模块
+不依赖 PyQt 的信号/回调机制，接口与 pyqtSignal 的 connect/disconnect/emit 一致，
+使核心处理流程可以在没有 Qt 的环境（命令行、定时任务）中运行
+"""
+from typing import Callable, List
+
+
+class BoundSignal:
+    """绑定到具体对象的信号（同步调用所有已连接的回调）"""
+
+    def __init__(self):
+        self._slots: List[Callable] = []
+
+    def connect(self, slot: Callable):
+        """连接回调（可以是任意可调用对象，包括 pyqtSignal 的 emit）"""
+        self._slots.append(slot)
+
+    def disconnect(self, slot: Callable = None):
+        """断开指定回调；不指定时断开全部"""
+        if slot is None:
+            self._slots.clear()
+        elif slot in self._slots:
+            self._slots.remove(slot)
+
+    def emit(self, *args):
+        """按连接顺序调用所有回调"""
+        for slot in list(self._slots):
+            slot(*args)
+
+
+class Signal:
+    """
+    信号声明（类属性），用法与 pyqtSignal 相同:
+
+        class Loader:
+            progress = Signal(int, str)
+
+        loader.progress.connect(callback)
+        loader.progress.emit(50, "读取中")
+
+    回调在发出信号的线程中同步执行；在 Qt 界面中使用时，
+    应连接到 QObject 的 pyqtSignal.emit，由 Qt 负责跨线程投递
+    """
+
+    def __init__(self, *types):
+        self.types = types
+        self._name = None
+
+    def __set_name__(self, owner, name):
+        self._name = f'_signal_{name}'
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        bound = instance.__dict__.get(self._name)
+        if bound is None:
+            bound = BoundSignal()
+            instance.__dict__[self._name] = bound
+        return bound
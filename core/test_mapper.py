@@ -5,13 +5,16 @@
 import pandas as pd
 from typing import Dict, List, Optional, Set
 
+from .value_cache import UniqueValueCache
+
 
 class TestMapper:
     """
     检验项目映射器
     """
     
-    def __init__(self, test_mapping: Optional[Dict] = None):
+    def __init__(self, test_mapping: Optional[Dict] = None, persist_cache: bool = False,
+                 categorical: bool = False, compiled=None):
         """
         test_mapping: {
             'CEA': {
@@ -20,18 +23,60 @@ class TestMapper:
                 'range': [0, 5]
             }
         }
+        persist_cache: 唯一值缓存是否持久化到磁盘（按映射哈希区分）
+        categorical: test_code、unit_std 是否生成为 pandas categorical
+        compiled: 已编译的 CompiledProfile（须与 test_mapping 对应），直接使用其别名表和标准单位
         """
         self.test_mapping = test_mapping or {}
-        self._build_reverse_index()
-    
+        self.persist_cache = persist_cache
+        self.categorical = categorical
+        if compiled is not None:
+            self.alias_to_standard = dict(compiled.alias_index)
+            self.standard_units = dict(compiled.standard_units)
+            self._aliases = None  # 各项目的别名（修改映射时再建立）
+        else:
+            self._build_reverse_index()
+        self._cache = None
+
     def _build_reverse_index(self):
-        """构建别名反向索引"""
+        """构建别名反向索引和标准单位表（同一别名属于多个项目时，以映射中靠后的项目为准）"""
         self.alias_to_standard = {}
-        
+        self.standard_units = {}
+        self._aliases = {}
         for standard_name, config in self.test_mapping.items():
-            aliases = config.get('aliases', [])
-            for alias in aliases:
-                self.alias_to_standard[alias.strip().lower()] = standard_name
+            self._aliases[standard_name] = [alias.strip().lower() for alias in config.get('aliases', [])]
+            for alias in self._aliases[standard_name]:
+                self.alias_to_standard[alias] = standard_name
+            self.standard_units[standard_name] = config.get('unit')
+        self._cache = None
+
+    def _index_test(self, standard_name: str):
+        """添加或修改一个项目后只更新该项目的索引；别名与其他项目冲突时整体重建"""
+        config = self.test_mapping[standard_name]
+        aliases = [alias.strip().lower() for alias in config.get('aliases', [])]
+        old_aliases = self._aliases.get(standard_name, []) if self._aliases is not None else None
+        conflict = old_aliases is None or any(
+            self.alias_to_standard.get(alias, standard_name) != standard_name
+            for alias in old_aliases + aliases
+        )
+        if conflict:
+            self._build_reverse_index()
+            return
+
+        for alias in old_aliases:
+            self.alias_to_standard.pop(alias, None)
+        for alias in aliases:
+            self.alias_to_standard[alias] = standard_name
+        self._aliases[standard_name] = aliases
+        self.standard_units[standard_name] = config.get('unit')
+        self._cache = None
+
+    @property
+    def cache(self) -> UniqueValueCache:
+        """与当前映射对应的唯一值缓存（映射变化后旧的缓存结果失效）"""
+        if self._cache is None:
+            self._cache = UniqueValueCache('test_mapping', self.test_mapping, persist=self.persist_cache)
+        return self._cache
     
     def standardize_test_name(self, raw_name: str) -> str:
         """
@@ -51,9 +96,7 @@ class TestMapper:
     
     def get_standard_unit(self, test_name: str) -> Optional[str]:
         """获取标准单位"""
-        if test_name in self.test_mapping:
-            return self.test_mapping[test_name].get('unit')
-        return None
+        return self.standard_units.get(test_name)
     
     def get_reference_range(self, test_name: str) -> Optional[List[float]]:
         """获取参考范围"""
@@ -61,26 +104,49 @@ class TestMapper:
             return self.test_mapping[test_name].get('range')
         return None
     
-    def apply(self, df: pd.DataFrame, test_name_col: str = 'test_name') -> pd.DataFrame:
+    def apply(self, df: pd.DataFrame, test_name_col: str = 'test_name',
+              copy: bool = True) -> pd.DataFrame:
         """
         应用映射到 DataFrame
         添加 test_code 列（标准化名称）
+
+        Args:
+            copy: False 时直接在 df 上添加列并返回 df
         """
-        df = df.copy()
-        
-        df['test_code'] = df[test_name_col].apply(self.standardize_test_name)
-        
-        # 添加标准单位列（如果配置了）
-        df['unit_std'] = df['test_code'].apply(self.get_standard_unit)
-        
+        if copy:
+            df = df.copy()
+
+        def compute(names: pd.Series):
+            test_codes = [self.standardize_test_name(name) for name in names]
+            # 添加标准单位列（如果配置了）
+            units = [self.standard_units.get(code) for code in test_codes]
+            return test_codes, units
+
+        # 每个不同的项目名称只标准化一次
+        df['test_code'], df['unit_std'] = self.cache.map_series(
+            df[test_name_col], compute, dtypes=(object, object),
+            categorical=(self.categorical, self.categorical)
+        )
+
         return df
+
+    def save_cache(self):
+        """持久化唯一值缓存"""
+        self.cache.save()
     
     def filter_selected_tests(self, df: pd.DataFrame, selected_tests: Set[str], 
-                             test_code_col: str = 'test_code') -> pd.DataFrame:
+                             test_code_col: str = 'test_code', copy: bool = True) -> pd.DataFrame:
         """
         过滤出选中的检验项目
+
+        Args:
+            copy: False 时不再额外复制（全部行都保留时直接返回 df）
         """
-        return df[df[test_code_col].isin(selected_tests)].copy()
+        mask = df[test_code_col].isin(selected_tests)
+        if not copy and mask.all():
+            return df
+        filtered = df[mask]
+        return filtered.copy() if copy else filtered
     
     def get_test_statistics(self, df: pd.DataFrame, test_name_col: str = 'test_name') -> pd.DataFrame:
         """
@@ -133,11 +199,11 @@ class TestMapper:
             'unit': unit,
             'range': ref_range
         }
-        self._build_reverse_index()
+        self._index_test(standard_name)
     
     def update_test(self, standard_name: str, **kwargs):
         """更新检验项目配置"""
         if standard_name in self.test_mapping:
             self.test_mapping[standard_name].update(kwargs)
-            self._build_reverse_index()
+            self._index_test(standard_name)
 
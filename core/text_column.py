@@ -0,0 +1,218 @@
+"""
+向量化字符串列模块
+在保持 Python str / re 语义的前提下批量执行字符串匹配与提取
+"""
+import re
+from typing import Callable, List
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# Python re 的 \s 在 ASCII 范围内还匹配 \v 和 \x1c-\x1f，RE2 的 \s 不包含这些字符
+_ASCII_SPACE_CHARS = r' \t\n\r\x0b\x0c\x1c-\x1f'
+
+_ANCHORS = {
+    'search': '{}',
+    'match': '^(?:{})',
+    'fullmatch': '^(?:{})$',
+}
+
+
+def _to_re2(pattern: str) -> str:
+    """将 Python 正则改写为在纯 ASCII 输入上行为一致的 RE2 正则"""
+    converted = []
+    in_class = False
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == '\\':
+            token = pattern[i:i + 2]
+            if token == r'\s':
+                token = _ASCII_SPACE_CHARS if in_class else f'[{_ASCII_SPACE_CHARS}]'
+            converted.append(token)
+            i += 2
+            continue
+        if char == '[' and not in_class:
+            in_class = True
+        elif char == ']' and in_class:
+            in_class = False
+        elif char == '$' and not in_class and i == len(pattern) - 1:
+            # Python 的 $ 还能匹配末尾换行符之前的位置
+            char = r'\n?$'
+        converted.append(char)
+        i += 1
+    return ''.join(converted)
+
+
+class TextColumn:
+    """
+    字符串列（不含缺失值）
+
+    同时持有 Python 字符串数组和按需构建的 Arrow 数组：
+    - 字面量匹配直接使用 Arrow compute（按 UTF-8 字节比较，与 Python 结果一致）
+    - 正则匹配中纯 ASCII 的行交给 Arrow (RE2) 批量计算，
+      含非 ASCII 字符的行回退到 Python re，保证 \\d、\\s 等字符类语义不变
+    """
+
+    def __init__(self, values):
+        self.values = np.asarray(values, dtype=object)
+        self._arrow = None
+        self._ascii = None
+
+    @classmethod
+    def from_series(cls, series) -> 'TextColumn':
+        """从字符串 Series 创建（调用方保证不含缺失值）"""
+        return cls(series.to_numpy(dtype=object))
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+    @property
+    def arrow(self) -> pa.Array:
+        if self._arrow is None:
+            self._arrow = pa.array(self.values, type=pa.string())
+        return self._arrow
+
+    @property
+    def ascii_mask(self) -> np.ndarray:
+        if self._ascii is None:
+            self._ascii = self._to_bool(pc.string_is_ascii(self.arrow))
+        return self._ascii
+
+    @staticmethod
+    def _to_bool(array: pa.Array) -> np.ndarray:
+        return array.to_numpy(zero_copy_only=False).astype(bool)
+
+    def take(self, positions: np.ndarray) -> 'TextColumn':
+        """按位置取子列（复用已构建的 Arrow 数组）"""
+        column = TextColumn(self.values[positions])
+        if self._arrow is not None:
+            column._arrow = self._arrow.take(pa.array(positions, type=pa.int64()))
+        if self._ascii is not None:
+            column._ascii = self._ascii[positions]
+        return column
+
+    # ---------- 字面量操作 ----------
+
+    def contains(self, literal: str) -> np.ndarray:
+        """等价于 literal in value"""
+        return self._to_bool(pc.match_substring(self.arrow, literal))
+
+    def equals(self, literal: str) -> np.ndarray:
+        """等价于 value == literal"""
+        return self._to_bool(pc.equal(self.arrow, literal))
+
+    def startswith(self, *prefixes: str) -> np.ndarray:
+        """等价于 value.startswith(prefixes)"""
+        result = np.zeros(len(self), dtype=bool)
+        for prefix in prefixes:
+            result |= self._to_bool(pc.starts_with(self.arrow, prefix))
+        return result
+
+    def count(self, literal: str) -> np.ndarray:
+        """等价于 value.count(literal)"""
+        return pc.count_substring(self.arrow, literal).to_numpy(zero_copy_only=False)
+
+    def map(self, func: Callable[[str], str]) -> 'TextColumn':
+        """逐个应用 Python 字符串函数（如 str.lower、str.strip）"""
+        return TextColumn([func(value) for value in self.values])
+
+    def replace(self, old: str, new: str) -> 'TextColumn':
+        """等价于 value.replace(old, new)"""
+        return TextColumn([value.replace(old, new) for value in self.values])
+
+    # ---------- 正则操作 ----------
+
+    def search(self, pattern: str, ignore_case: bool = False) -> np.ndarray:
+        """等价于 re.search(pattern, value) is not None"""
+        return self._regex_mask(pattern, 'search', ignore_case)
+
+    def match(self, pattern: str) -> np.ndarray:
+        """等价于 re.match(pattern, value) is not None"""
+        return self._regex_mask(pattern, 'match', False)
+
+    def fullmatch(self, pattern: str) -> np.ndarray:
+        """等价于 re.fullmatch(pattern, value) is not None"""
+        return self._regex_mask(pattern, 'fullmatch', False)
+
+    def _split_ascii(self):
+        """返回 (ASCII 行位置, 非 ASCII 行位置)"""
+        ascii_mask = self.ascii_mask
+        return np.flatnonzero(ascii_mask), np.flatnonzero(~ascii_mask)
+
+    def _ascii_arrow(self, ascii_pos: np.ndarray) -> pa.Array:
+        if len(ascii_pos) == len(self):
+            return self.arrow
+        return self.arrow.take(pa.array(ascii_pos, type=pa.int64()))
+
+    def _regex_mask(self, pattern: str, mode: str, ignore_case: bool) -> np.ndarray:
+        result = np.zeros(len(self), dtype=bool)
+        if len(self) == 0:
+            return result
+
+        ascii_pos, other_pos = self._split_ascii()
+
+        if len(ascii_pos):
+            re2_pattern = _ANCHORS[mode].format(_to_re2(pattern))
+            matched = pc.match_substring_regex(
+                self._ascii_arrow(ascii_pos), re2_pattern, ignore_case=ignore_case
+            )
+            result[ascii_pos] = self._to_bool(matched)
+
+        if len(other_pos):
+            compiled = re.compile(pattern, re.IGNORECASE if ignore_case else 0)
+            method = getattr(compiled, mode)
+            result[other_pos] = [method(value) is not None for value in self.values[other_pos]]
+
+        return result
+
+    def extract(self, pattern: str) -> List[np.ndarray]:
+        """
+        等价于 re.search(pattern, value).groups()
+
+        pattern 中的捕获组必须使用 (?P<name>...) 命名（RE2 提取要求）。
+
+        Returns:
+            每个捕获组一个 object 数组，未匹配的行为 None
+        """
+        compiled = re.compile(pattern)
+        groups = [np.full(len(self), None, dtype=object) for _ in range(compiled.groups)]
+        if len(self) == 0:
+            return groups
+
+        ascii_pos, other_pos = self._split_ascii()
+
+        if len(ascii_pos):
+            extracted = pc.extract_regex(self._ascii_arrow(ascii_pos), _to_re2(pattern))
+            valid = self._to_bool(extracted.is_valid())
+            for group, field in zip(groups, extracted.flatten()):
+                values = field.to_numpy(zero_copy_only=False)
+                group[ascii_pos[valid]] = values[valid]
+
+        for pos in other_pos:
+            found = compiled.search(self.values[pos])
+            if found:
+                for group, value in zip(groups, found.groups()):
+                    group[pos] = value
+
+        return groups
+
+    def sub(self, pattern: str, repl: str) -> 'TextColumn':
+        """等价于 re.sub(pattern, repl, value)"""
+        if len(self) == 0:
+            return TextColumn([])
+
+        values = self.values.copy()
+        ascii_pos, other_pos = self._split_ascii()
+
+        if len(ascii_pos):
+            replaced = pc.replace_substring_regex(self._ascii_arrow(ascii_pos), _to_re2(pattern), repl)
+            values[ascii_pos] = replaced.to_numpy(zero_copy_only=False)
+
+        if len(other_pos):
+            compiled = re.compile(pattern)
+            values[other_pos] = [compiled.sub(repl, value) for value in self.values[other_pos]]
+
+        return TextColumn(values)
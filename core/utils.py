@@ -3,11 +3,26 @@
 """
 import re
 from datetime import datetime
-from typing import Optional, List, Any
+from typing import Optional, List, Any, Tuple
+import numpy as np
 import pandas as pd
+import yaml
 
+from .constants import LoaderConfig, ParserConfig
+from .readers import frame_from_rows, read_rows
+from .text_column import TextColumn
 
-def detect_header_row(df: pd.DataFrame, max_rows: int = 10) -> int:
+
+# 有 libyaml 时使用 C 实现的解析器（结果与 yaml.safe_load 相同，速度快一个数量级）
+_YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+
+def safe_load_yaml(content):
+    """解析 YAML 文本或字节（等同于 yaml.safe_load）"""
+    return yaml.load(content, Loader=_YAML_LOADER)
+
+
+def detect_header_row(df: pd.DataFrame, max_rows: int = LoaderConfig.HEADER_SEARCH_ROWS) -> int:
     """
     自动检测 Excel 中的 header 行位置
     通过分析前几行，找到最可能是列名的那一行
@@ -27,15 +42,18 @@ def load_excel_auto_header(file_path: str, max_preview_rows: int = 100) -> tuple
     """
     加载 Excel 文件，自动检测 header
     返回: (DataFrame, header_row_index, original_columns)
+
+    只读取一次文件的前 max_preview_rows + HEADER_SEARCH_ROWS + 1 行，
+    检测 header 和生成预览都在内存中完成，不解析其余行
     """
-    # 先读取原始数据（无 header）
-    df_raw = pd.read_excel(file_path, header=None, nrows=max_preview_rows)
-    
-    # 检测 header 行
+    rows = read_rows(file_path, max_rows=max_preview_rows + LoaderConfig.HEADER_SEARCH_ROWS + 1)
+
+    # 检测 header 行（无 header 的原始数据）
+    df_raw = frame_from_rows(rows, header=None, nrows=max_preview_rows)
     header_row = detect_header_row(df_raw)
     
-    # 重新读取，指定 header
-    df = pd.read_excel(file_path, header=header_row, nrows=max_preview_rows)
+    # 将检测到的行作为 header
+    df = frame_from_rows(rows, header=header_row, nrows=max_preview_rows)
     
     # 清理列名（去除空格、特殊字符）
     original_columns = df.columns.tolist()
@@ -81,18 +99,7 @@ def parse_datetime(value: Any) -> Optional[datetime]:
             return None
         
         # 尝试多种格式
-        formats = [
-            '%Y-%m-%d',
-            '%Y/%m/%d',
-            '%Y-%m-%d %H:%M:%S',
-            '%Y/%m/%d %H:%M:%S',
-            '%Y.%m.%d',
-            '%Y%m%d',
-            '%Y年%m月%d日',
-            '%Y-%m-%d %H:%M',
-            '%Y/%m/%d %H:%M',
-        ]
-        for fmt in formats:
+        for fmt in ParserConfig.DATETIME_FORMATS:
             try:
                 return datetime.strptime(value, fmt)
             except (ValueError, TypeError):
@@ -198,6 +205,115 @@ def extract_numeric(value: str) -> Optional[float]:
     return None
 
 
+# 纯 ASCII 的标准浮点写法，命中的字符串可直接批量转换
+# 首尾空白只列出 float() 接受的字符（\s 还包括 \x1c-\x1f，float() 不接受）
+_ASCII_FLOAT_SPACE = r'[ \t\n\r\x0b\x0c]*'
+_ASCII_FLOAT_PATTERN = (_ASCII_FLOAT_SPACE + r'[+-]?(?:[0-9]+\.?[0-9]*|\.[0-9]+)(?:[eE][+-]?[0-9]+)?'
+                        + _ASCII_FLOAT_SPACE)
+# float() 还接受下划线分隔、非 ASCII 数字、inf/nan 等写法，这些少数值逐个转换
+_EXOTIC_FLOAT_PATTERN = r'[_\s]|[^\x00-\x7f]|inf|nan'
+
+
+def safe_float_vectorized(column: TextColumn) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    safe_float 的向量化版本
+
+    标准写法批量转换，其余可能被 float() 接受的写法逐个回退到 safe_float，
+    结果与逐个调用 safe_float 完全一致。
+
+    Returns:
+        (values, found): float64 数组和转换是否成功的布尔数组
+    """
+    n = len(column)
+    values = np.full(n, np.nan)
+    found = np.zeros(n, dtype=bool)
+    if n == 0:
+        return values, found
+
+    strict = column.fullmatch(_ASCII_FLOAT_PATTERN)
+    if strict.any():
+        values[strict] = column.values[strict].astype(float)
+        found[strict] = True
+
+    exotic = ~strict & column.search(_EXOTIC_FLOAT_PATTERN, ignore_case=True)
+    for pos in np.flatnonzero(exotic):
+        numeric = safe_float(column.values[pos])
+        if numeric is not None:
+            values[pos] = numeric
+            found[pos] = True
+
+    return values, found
+
+
+def extract_numeric_vectorized(column: TextColumn) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    extract_numeric 的向量化版本（输入为已 strip 的字符串列）
+
+    按 extract_numeric 相同的顺序逐步处理尚未解析的行：
+    直接转换 → 幂表示 → 滴度 → 区间 → 正则提取
+
+    Returns:
+        (values, found): float64 数组和是否提取成功的布尔数组
+    """
+    n = len(column)
+    values = np.full(n, np.nan)
+    found = np.zeros(n, dtype=bool)
+    if n == 0:
+        return values, found
+
+    text = column.replace(',', '')
+
+    # 1. 直接转换
+    numeric, ok = safe_float_vectorized(text)
+    values[ok] = numeric[ok]
+    found |= ok
+
+    # 2. 幂表示: 10^3 → 1000
+    pos = np.flatnonzero(~found & text.contains('^'))
+    if len(pos):
+        base, exp = text.take(pos).extract(r'(?P<base>\d+\.?\d*)\s*\^\s*(?P<exp>\d+)')
+        matched = pd.notna(base)
+        if matched.any():
+            # 幂表示的行很少，逐个用 Python 的 ** 计算（np.power 的结果可能差一个 ulp，如 10^31）；
+            # 溢出时抛出 OverflowError，extract_numeric 会继续尝试后续规则
+            rows = pos[matched]
+            for row, b, e in zip(rows, base[matched], exp[matched]):
+                try:
+                    values[row] = float(b) ** float(e)
+                except OverflowError:
+                    continue
+                found[row] = True
+
+    # 3. 滴度: 1:128 → 128
+    pos = np.flatnonzero(~found & (text.count(':') == 1))
+    if len(pos):
+        titer = text.take(pos).map(lambda value: value.split(':')[1].strip())
+        numeric, ok = safe_float_vectorized(titer)
+        values[pos[ok]] = numeric[ok]
+        found[pos[ok]] = True
+
+    # 4. 区间: 1.5-2.0 → 1.75
+    pos = np.flatnonzero(~found & text.contains('-') & ~text.startswith('-'))
+    if len(pos):
+        lower, upper = text.take(pos).extract(r'^(?P<lower>\d+\.?\d*)\s*-\s*(?P<upper>\d+\.?\d*)$')
+        matched = pd.notna(lower)
+        if matched.any():
+            values[pos[matched]] = (lower[matched].astype(float) + upper[matched].astype(float)) / 2
+            found[pos[matched]] = True
+
+    # 5/6. 移除比较符号后正则提取
+    pos = np.flatnonzero(~found)
+    if len(pos):
+        cleaned = text.take(pos).sub(r'[<>≤≥~±]', '')
+        number, = cleaned.extract(r'(?P<number>[-+]?\d*\.?\d+(?:[eE][-+]?\d+)?)')
+        matched = pd.notna(number)
+        if matched.any():
+            values[pos[matched]] = number[matched].astype(float)
+            found[pos[matched]] = True
+
+    return values, found
+
+
 def detect_special_value_patterns(series: pd.Series) -> dict:
     """
     检测一列数据中的特殊值模式
@@ -235,6 +351,61 @@ def detect_special_value_patterns(series: pd.Series) -> dict:
     return {k: sorted(list(v)) for k, v in patterns.items()}
 
 
+# 数值格式检测的文本关键词
+POSITIVE_KEYWORDS = ['阳性', '阳', '+', '阳（', 'positive']
+NEGATIVE_KEYWORDS = ['阴性', '阴', '阴（', 'negative']
+INVALID_KEYWORDS = ['溶血', '样本不足', '标本凝集', '未检出', '--', '/', '#', 'NA', 'N/A']
+
+
+def classify_value_format(val_str: str) -> str:
+    """
+    判断单个结果值的格式类别（detect_value_formats 中的类别名称）
+    """
+    # 检查无效值
+    if any(kw in val_str for kw in INVALID_KEYWORDS):
+        return 'invalid'
+    
+    # 检查阳性文本
+    if any(kw in val_str for kw in POSITIVE_KEYWORDS):
+        return 'text_positive'
+    
+    # 检查阴性文本
+    if any(kw in val_str for kw in NEGATIVE_KEYWORDS):
+        return 'text_negative'
+    
+    # 检查小于号
+    if val_str.startswith('<') or val_str.startswith('≤'):
+        return 'less_than'
+    
+    # 检查大于号
+    if val_str.startswith('>') or val_str.startswith('≥'):
+        return 'greater_than'
+    
+    # 检查科学计数法
+    if re.search(r'\d+\.?\d*[eE][-+]?\d+', val_str):
+        return 'scientific'
+    
+    # 检查幂表示
+    if '^' in val_str and re.search(r'\d+\s*\^\s*\d+', val_str):
+        return 'power'
+    
+    # 检查滴度
+    if re.match(r'\d+:\d+', val_str):
+        return 'titer'
+    
+    # 检查区间
+    if re.match(r'^\d+\.?\d*\s*-\s*\d+\.?\d*$', val_str):
+        return 'range'
+    
+    # 尝试解析为普通数字
+    try:
+        float(val_str.replace(',', ''))
+        return 'normal'
+    except (ValueError, TypeError):
+        # 无法识别
+        return 'invalid'
+
+
 def detect_value_formats(series: pd.Series, max_samples: int = 100) -> dict:
     """
     检测数据列中的数值格式分布
@@ -278,88 +449,12 @@ def detect_value_formats(series: pd.Series, max_samples: int = 100) -> dict:
     unique_values = series.dropna().unique()
     samples_to_check = unique_values[:max_samples] if len(unique_values) > max_samples else unique_values
     
-    # 文本关键词
-    positive_keywords = ['阳性', '阳', '+', '阳（', 'positive']
-    negative_keywords = ['阴性', '阴', '阴（', 'negative']
-    invalid_keywords = ['溶血', '样本不足', '标本凝集', '未检出', '--', '/', '#', 'NA', 'N/A']
-    
     for val in samples_to_check:
         val_str = str(val).strip()
-        
-        # 检查无效值
-        if any(kw in val_str for kw in invalid_keywords):
-            format_counts['invalid'] += 1
-            if len(format_samples['invalid']) < 3:
-                format_samples['invalid'].append(val_str)
-            continue
-        
-        # 检查阳性文本
-        if any(kw in val_str for kw in positive_keywords):
-            format_counts['text_positive'] += 1
-            if len(format_samples['text_positive']) < 3:
-                format_samples['text_positive'].append(val_str)
-            continue
-        
-        # 检查阴性文本
-        if any(kw in val_str for kw in negative_keywords):
-            format_counts['text_negative'] += 1
-            if len(format_samples['text_negative']) < 3:
-                format_samples['text_negative'].append(val_str)
-            continue
-        
-        # 检查小于号
-        if val_str.startswith('<') or val_str.startswith('≤'):
-            format_counts['less_than'] += 1
-            if len(format_samples['less_than']) < 3:
-                format_samples['less_than'].append(val_str)
-            continue
-        
-        # 检查大于号
-        if val_str.startswith('>') or val_str.startswith('≥'):
-            format_counts['greater_than'] += 1
-            if len(format_samples['greater_than']) < 3:
-                format_samples['greater_than'].append(val_str)
-            continue
-        
-        # 检查科学计数法
-        if re.search(r'\d+\.?\d*[eE][-+]?\d+', val_str):
-            format_counts['scientific'] += 1
-            if len(format_samples['scientific']) < 3:
-                format_samples['scientific'].append(val_str)
-            continue
-        
-        # 检查幂表示
-        if '^' in val_str and re.search(r'\d+\s*\^\s*\d+', val_str):
-            format_counts['power'] += 1
-            if len(format_samples['power']) < 3:
-                format_samples['power'].append(val_str)
-            continue
-        
-        # 检查滴度
-        if re.match(r'\d+:\d+', val_str):
-            format_counts['titer'] += 1
-            if len(format_samples['titer']) < 3:
-                format_samples['titer'].append(val_str)
-            continue
-        
-        # 检查区间
-        if re.match(r'^\d+\.?\d*\s*-\s*\d+\.?\d*$', val_str):
-            format_counts['range'] += 1
-            if len(format_samples['range']) < 3:
-                format_samples['range'].append(val_str)
-            continue
-        
-        # 尝试解析为普通数字
-        try:
-            float(val_str.replace(',', ''))
-            format_counts['normal'] += 1
-            if len(format_samples['normal']) < 3:
-                format_samples['normal'].append(val_str)
-        except (ValueError, TypeError):
-            # 无法识别
-            format_counts['invalid'] += 1
-            if len(format_samples['invalid']) < 3:
-                format_samples['invalid'].append(val_str)
+        value_format = classify_value_format(val_str)
+        format_counts[value_format] += 1
+        if len(format_samples[value_format]) < 3:
+            format_samples[value_format].append(val_str)
     
     # 统计总数
     total = sum(format_counts.values())
@@ -0,0 +1,232 @@
+"""
+唯一值记忆化缓存模块
+检验结果、项目名称等列高度重复：先 factorize 得到唯一值，
+只计算缓存中没有的唯一值，再按编码广播回整列
+"""
+import os
+import json
+import hashlib
+from pathlib import Path
+from collections import OrderedDict
+from typing import Any, Callable, List, Sequence
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import infer_dtype
+
+from .constants import CacheConfig
+from .logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def get_cache_dir() -> Path:
+    """获取缓存目录"""
+    # 优先使用环境变量
+    if cache_dir := os.getenv('LIS_CACHE_DIR'):
+        path = Path(cache_dir)
+    else:
+        # 默认使用用户目录下的 .lis-extractor/cache
+        path = Path.home() / '.lis-extractor' / 'cache'
+
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def hash_rules(rules: Any) -> str:
+    """计算规则配置的哈希（用于区分不同 profile 的缓存）"""
+    payload = json.dumps(
+        [CacheConfig.MEMO_FORMAT_VERSION, rules],
+        sort_keys=True, ensure_ascii=False, default=str
+    )
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+class UniqueValueCache:
+    """
+    唯一值缓存
+
+    以原始值的字符串形式为键（解析与标准化都只依赖 str(value)），
+    每个键缓存一组结果字段，例如 (value_numeric, value_flag)。
+    容量有上限，超出后按最近最少使用淘汰；可按规则哈希持久化到磁盘，
+    相同 profile 的后续运行直接从热缓存开始。
+    """
+
+    def __init__(self, namespace: str, rules: Any,
+                 max_entries: int = CacheConfig.MEMO_MAX_ENTRIES,
+                 persist: bool = False):
+        """
+        Args:
+            namespace: 缓存名称（如 'value_parsing'）
+            rules: 决定计算结果的规则配置，规则变化时缓存自动失效
+            max_entries: 最大缓存条目数
+            persist: 是否持久化到磁盘
+        """
+        self.namespace = namespace
+        self.rule_hash = hash_rules(rules)
+        self.max_entries = max_entries
+        self.persist = persist
+        self._entries = OrderedDict()
+        self._dirty = False
+        # 是否记录新计算的键（并行抽取的子进程中开启，见 drain_new_entries）
+        self.track_new_entries = False
+        self._new_keys = []
+        self.hits = 0
+        self.misses = 0
+
+        if persist:
+            self.load()
+
+    @property
+    def cache_file(self) -> Path:
+        return get_cache_dir() / f"{self.namespace}_{self.rule_hash}.json"
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def map_series(self, series: pd.Series,
+                   compute: Callable[[pd.Series], Sequence[np.ndarray]],
+                   dtypes: Sequence[Any],
+                   categorical: Sequence[bool] = ()) -> List[Any]:
+        """
+        对整列做 factorize → 计算未缓存的唯一值 → 广播回整列
+
+        Args:
+            series: 原始列
+            compute: 接收唯一值字符串 Series，返回与之对齐的各结果字段数组；
+                     也会以单个缺失值调用一次，用于得到缺失值对应的结果
+            dtypes: 各结果字段的 dtype
+            categorical: 各结果字段是否返回 pd.Categorical（只广播整数编码，不复制对象）
+
+        Returns:
+            各结果字段的数组（或 Categorical），长度与 series 一致
+        """
+        values = series
+        # 混合类型的 object 列中 1、1.0、True 会被 factorize 视为同一个值，先统一转为字符串
+        if series.dtype == object and infer_dtype(series, skipna=True) not in ('string', 'empty'):
+            values = series.map(str, na_action='ignore')
+
+        codes, uniques = pd.factorize(values)
+        keys = [str(value) for value in uniques]
+
+        # 末尾多留一个位置存放缺失值的结果，编码 -1 恰好索引到它
+        fields = [np.empty(len(keys) + 1, dtype=dtype) for dtype in dtypes]
+
+        missing = []
+        for pos, key in enumerate(keys):
+            cached = self._entries.get(key)
+            if cached is None:
+                missing.append(pos)
+                continue
+            self._entries.move_to_end(key)
+            for field, value in zip(fields, cached):
+                field[pos] = value
+
+        self.hits += len(keys) - len(missing)
+        self.misses += len(missing)
+
+        if missing:
+            missing_keys = [keys[pos] for pos in missing]
+            computed = compute(pd.Series(missing_keys, dtype=object))
+            for field, values_computed in zip(fields, computed):
+                field[missing] = np.asarray(values_computed)
+            for i, key in enumerate(missing_keys):
+                self._entries[key] = tuple(self._to_python(field[missing[i]]) for field in fields)
+            if self.track_new_entries:
+                self._new_keys.extend(missing_keys)
+            self._dirty = True
+            self._evict()
+
+        if (codes < 0).any():
+            na_result = compute(pd.Series([None], dtype=object))
+            for field, values_computed in zip(fields, na_result):
+                field[-1] = np.asarray(values_computed)[0]
+
+        categorical = list(categorical) + [False] * (len(fields) - len(categorical))
+        return [self._broadcast_categorical(field, codes) if as_category else field[codes]
+                for field, as_category in zip(fields, categorical)]
+
+    @staticmethod
+    def _broadcast_categorical(field: np.ndarray, codes: np.ndarray) -> pd.Categorical:
+        """唯一值的结果再 factorize 一次（不同原始值可能得到相同结果），按编码组合成 Categorical"""
+        field_codes, categories = pd.factorize(field)
+        return pd.Categorical.from_codes(field_codes[codes], categories)
+
+    @staticmethod
+    def _to_python(value: Any) -> Any:
+        """将 NumPy 标量转为可 JSON 序列化的 Python 对象"""
+        if isinstance(value, np.generic):
+            return value.item()
+        return value
+
+    def _evict(self):
+        """淘汰最久未使用的条目"""
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def drain_new_entries(self) -> list:
+        """
+        取出自上次调用以来新计算的条目（并行抽取时由子进程传回主进程）
+
+        Returns:
+            [(key, fields), ...]
+        """
+        entries = [(key, self._entries[key]) for key in self._new_keys if key in self._entries]
+        self._new_keys = []
+        return entries
+
+    def merge_entries(self, entries: list, hits: int = 0, misses: int = 0):
+        """合并其他进程计算的条目和命中统计"""
+        for key, value in entries:
+            self._entries[key] = tuple(value)
+        if entries:
+            self._dirty = True
+            self._evict()
+        self.hits += hits
+        self.misses += misses
+
+    def clear(self):
+        """清空缓存"""
+        self._entries.clear()
+        self._dirty = True
+
+    def load(self):
+        """从磁盘加载缓存"""
+        try:
+            cache_file = self.cache_file
+            if not cache_file.exists():
+                return
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            for key, value in data.get('entries', []):
+                self._entries[key] = tuple(value)
+            self._evict()
+            logger.info(f"加载缓存 {cache_file.name}: {len(self._entries)} 条")
+        except (OSError, ValueError) as e:
+            logger.warning(f"读取缓存失败，将重新计算: {e}")
+            self._entries.clear()
+
+    def save(self):
+        """保存缓存到磁盘（仅在启用持久化且有变化时写入）"""
+        if not self.persist or not self._dirty:
+            return
+
+        try:
+            cache_file = self.cache_file
+            tmp_file = cache_file.with_suffix('.tmp')
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({'entries': list(self._entries.items())}, f, ensure_ascii=False)
+            os.replace(tmp_file, cache_file)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"保存缓存失败: {e}")
+
+    def stats(self) -> dict:
+        """缓存命中统计"""
+        total = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0
+        }
@@ -2,12 +2,15 @@
 数值解析模块
 处理特殊格式的检验结果（<0.5, >1000, 阳性等）
 """
-import re
 import math
+import numpy as np
 import pandas as pd
 from typing import Optional, Dict, Any, Tuple
 
-from .utils import extract_numeric, safe_float
+from .utils import extract_numeric, safe_float, extract_numeric_vectorized, safe_float_vectorized
+from .text_column import TextColumn
+from .value_cache import UniqueValueCache, hash_rules
+from .compiled_profile import ValueRules
 from .constants import ParserConfig
 
 
@@ -16,7 +19,8 @@ class ValueParser:
     检验结果值解析器
     """
     
-    def __init__(self, parsing_rules: Optional[Dict] = None):
+    def __init__(self, parsing_rules: Optional[Dict] = None, persist_cache: bool = False,
+                 categorical: bool = False, compiled: Optional[ValueRules] = None):
         """
         parsing_rules: {
             'less_than': {'rule': 'half'},  # 或 'lower_bound', 'na'
@@ -31,8 +35,22 @@ class ValueParser:
                 'mapping': {'溶血': None, '样本不足': None}
             }
         }
+        persist_cache: 唯一值缓存是否持久化到磁盘（按规则哈希区分）
+        categorical: value_flag 是否生成为 pandas categorical
+        compiled: 已编译的规则（CompiledProfile.value_rules，须与 parsing_rules 对应；None 时在此编译）
+
+        解析时只使用编译后的规则；直接修改 rules 后需调用 compile()（update_rule 会自动调用）
         """
         self.rules = parsing_rules or self._default_rules()
+        self.persist_cache = persist_cache
+        self.categorical = categorical
+        self.compiled = compiled if compiled is not None else ValueRules(self.rules)
+        self.cache = UniqueValueCache('value_parsing', self.rules, persist=persist_cache)
+
+    def compile(self):
+        """按当前 rules 重新编译规则，并重建对应的唯一值缓存"""
+        self.compiled = ValueRules(self.rules)
+        self.cache = UniqueValueCache('value_parsing', self.rules, persist=self.persist_cache)
     
     @staticmethod
     def _default_rules() -> Dict:
@@ -90,53 +108,43 @@ class ValueParser:
             return None, None
         
         value_str = str(raw_value).strip()
+        value_lower = value_str.lower()
+        rules = self.compiled
         
-        # 1. 检查是否是无效值
-        invalid_mapping = self.rules.get('invalid_values', {}).get('mapping', {})
-        for invalid_text, replacement in invalid_mapping.items():
-            if invalid_text.lower() in value_str.lower():
-                return replacement, 'invalid'
-        
-        # 2. 检查阳性文本
-        positive_mapping = self.rules.get('positive_text', {}).get('mapping', {})
-        for pos_text, pos_value in positive_mapping.items():
-            if pos_text.lower() in value_str.lower():
-                return pos_value, 'text_positive'
+        # 1-2. 检查无效值和阳性文本（子串匹配，无效值优先，各自按配置顺序）
+        text_match = rules.text_matcher.match(value_lower)
+        if text_match is not None:
+            return text_match
         
         # 3. 检查阴性文本
-        negative_mapping = self.rules.get('negative_text', {}).get('mapping', {})
-        for neg_text, neg_value in negative_mapping.items():
-            if neg_text.lower() == value_str.lower():
-                return neg_value, 'text_negative'
+        if value_lower in rules.negative_lookup:
+            return rules.negative_lookup[value_lower], 'text_negative'
         
         # 4. 处理小于号 <
-        if value_str.startswith('<') or value_str.startswith('≤'):
+        if value_str.startswith(('<', '≤')):
             numeric = extract_numeric(value_str)
             if numeric is not None:
-                rule = self.rules.get('less_than', {}).get('rule', 'half')
-                if rule == 'half':
+                if rules.less_than == 'half':
                     return numeric / 2, 'less_than'
-                elif rule == 'lower_bound':
+                elif rules.less_than == 'lower_bound':
                     return numeric, 'less_than'
                 else:  # 'na'
                     return None, 'less_than'
         
         # 5. 处理大于号 >
-        if value_str.startswith('>') or value_str.startswith('≥'):
+        if value_str.startswith(('>', '≥')):
             numeric = extract_numeric(value_str)
             if numeric is not None:
-                rule = self.rules.get('greater_than', {}).get('rule', 'keep')
-                if rule == 'keep':
+                if rules.greater_than == 'keep':
                     return numeric, 'greater_than'
-                elif rule == 'cap':
-                    cap_value = self.rules.get('greater_than', {}).get('cap_value', numeric)
-                    return cap_value, 'greater_than'
+                elif rules.greater_than == 'cap':
+                    return (rules.cap_value if rules.has_cap_value else numeric), 'greater_than'
                 else:  # 'na'
                     return None, 'greater_than'
         
         # 6. 检测特殊格式（用于标记），同时进行边界值检查
         # 科学计数法
-        if re.search(r'\d+\.?\d*[eE][-+]?\d+', value_str):
+        if rules.SCIENTIFIC.search(value_str):
             numeric = extract_numeric(value_str)
             if numeric is not None:
                 return self._validate_numeric(numeric, 'scientific')
@@ -148,14 +156,14 @@ class ValueParser:
                 return self._validate_numeric(numeric, 'power')
 
         # 滴度
-        if ':' in value_str and re.match(r'\d+:\d+', value_str):
+        if ':' in value_str and rules.TITER.match(value_str):
             numeric = extract_numeric(value_str)
             if numeric is not None:
                 return self._validate_numeric(numeric, 'titer')
 
         # 区间
         if '-' in value_str and not value_str.startswith('-'):
-            if re.match(r'^\d+\.?\d*\s*-\s*\d+\.?\d*$', value_str):
+            if rules.RANGE.match(value_str):
                 numeric = extract_numeric(value_str)
                 if numeric is not None:
                     return self._validate_numeric(numeric, 'range')
@@ -195,19 +203,174 @@ class ValueParser:
 
         return numeric, original_flag
     
-    def apply(self, df: pd.DataFrame, value_col: str = 'test_value') -> pd.DataFrame:
+    def parse_series(self, series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """
+        向量化解析整列检验结果
+
+        使用 pandas 字符串操作和 NumPy 掩码一次处理整列，规则顺序与 parse_value 完全一致:
+        无效值 → 阳性 → 阴性 → < → > → 科学计数法/幂/滴度/区间 → 直接转换 → 提取数值
+
+        value_numeric 统一为 float64（None 以 NaN 表示）；
+        映射中含非数值替换值时自动回退到逐行解析。
+
+        Returns:
+            (value_numeric, value_flag)，索引与输入一致
+        """
+        if not self.compiled.vectorized:
+            return self._parse_series_scalar(series)
+
+        n = len(series)
+        values = np.full(n, np.nan)
+        flags = np.full(n, None, dtype=object)
+
+        non_null = np.flatnonzero(series.notna().to_numpy())
+        if len(non_null):
+            raw = series.iloc[non_null].to_numpy(dtype=object)
+            text = TextColumn([str(value).strip() for value in raw])
+            values[non_null], flags[non_null] = self._parse_text_vectorized(text)
+
+        return (
+            pd.Series(values, index=series.index, name='value_numeric'),
+            pd.Series(flags, index=series.index, name='value_flag')
+        )
+
+    def _parse_text_vectorized(self, text: TextColumn) -> Tuple[np.ndarray, np.ndarray]:
+        """对已 strip 的字符串列按规则顺序逐步解析，每一步只处理尚未命中的行"""
+        n = len(text)
+        values = np.full(n, np.nan)
+        flags = np.full(n, None, dtype=object)
+        pending = np.ones(n, dtype=bool)
+        lower = text.map(str.lower)
+        rules = self.compiled
+
+        def resolve(pos, value, flag):
+            values[pos] = np.nan if value is None else value
+            flags[pos] = flag
+            pending[pos] = False
+
+        def resolve_validated(pos, numeric, flag):
+            bad = np.isinf(numeric) | np.isnan(numeric)
+            extreme = ~bad & (np.abs(numeric) > ParserConfig.EXTREME_VALUE_THRESHOLD)
+            resolve(pos, numeric, flag)
+            values[pos[bad]] = np.nan
+            flags[pos[bad]] = 'invalid'
+            flags[pos[extreme]] = 'extreme_value'
+
+        def extract_pending(mask):
+            pos = np.flatnonzero(pending & mask)
+            numeric, ok = extract_numeric_vectorized(text.take(pos))
+            return pos[ok], numeric[ok]
+
+        # 1-2. 无效值和阳性文本：整列只做一次合并正则筛选，命中的值再按规则顺序确定是哪条规则
+        if rules.text_matcher:
+            for pos in np.flatnonzero(lower.search(rules.text_matcher.pattern)):
+                resolve(pos, *rules.text_matcher.match(lower.values[pos]))
+
+        # 3. 阴性文本（整值相等，按配置顺序）
+        for text_key, replacement in rules.negative:
+            pos = np.flatnonzero(pending & lower.equals(text_key))
+            if len(pos):
+                resolve(pos, replacement, 'text_negative')
+
+        # 4. 小于号 <
+        pos, numeric = extract_pending(text.startswith('<', '≤'))
+        if rules.less_than == 'half':
+            resolve(pos, numeric / 2, 'less_than')
+        elif rules.less_than == 'lower_bound':
+            resolve(pos, numeric, 'less_than')
+        else:  # 'na'
+            resolve(pos, None, 'less_than')
+
+        # 5. 大于号 >
+        pos, numeric = extract_pending(text.startswith('>', '≥'))
+        if rules.greater_than == 'keep':
+            resolve(pos, numeric, 'greater_than')
+        elif rules.greater_than == 'cap':
+            resolve(pos, rules.cap_value if rules.has_cap_value else numeric, 'greater_than')
+        else:  # 'na'
+            resolve(pos, None, 'greater_than')
+
+        # 6. 特殊格式（科学计数法 / 幂 / 滴度 / 区间）
+        special_formats = [
+            ('scientific', lambda: text.search(rules.SCIENTIFIC.pattern)),
+            ('power', lambda: text.contains('^')),
+            ('titer', lambda: text.contains(':') & text.match(rules.TITER.pattern)),
+            ('range', lambda: (
+                text.contains('-')
+                & ~text.startswith('-')
+                & text.match(rules.RANGE.pattern)
+            )),
+        ]
+        for flag, mask_func in special_formats:
+            if pending.any():
+                resolve_validated(*extract_pending(mask_func()), flag)
+
+        # 7. 直接转为数值
+        pos = np.flatnonzero(pending)
+        numeric, ok = safe_float_vectorized(text.take(pos).replace(',', ''))
+        resolve_validated(pos[ok], numeric[ok], 'normal')
+
+        # 8. 提取数值
+        resolve_validated(*extract_pending(pending), 'normal')
+
+        # 9. 无法解析
+        resolve(np.flatnonzero(pending), None, 'invalid')
+
+        return values, flags
+
+    def _parse_series_scalar(self, series: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """逐行调用 parse_value 解析整列（向量化解析的参照实现）"""
+        parsed_results = series.apply(self.parse_value)
+
+        value_numeric = parsed_results.apply(lambda x: x[0])
+        value_flag = parsed_results.apply(lambda x: x[1])
+
+        return value_numeric, value_flag
+
+    def _get_cache(self) -> UniqueValueCache:
+        """获取与当前规则对应的唯一值缓存（rules 被直接修改后重新编译并重建）"""
+        if self.cache.rule_hash != hash_rules(self.rules):
+            self.compile()
+        return self.cache
+
+    def save_cache(self):
+        """持久化唯一值缓存"""
+        self.cache.save()
+
+    def apply(self, df: pd.DataFrame, value_col: str = 'test_value',
+              vectorized: bool = True, memoize: bool = True, copy: bool = True) -> pd.DataFrame:
         """
         应用解析规则到 DataFrame
         添加 value_numeric（解析后的数值）和 value_flag（标志）列
+
+        Args:
+            df: 输入数据
+            value_col: 检验结果列名
+            vectorized: 是否使用向量化解析（False 时逐行调用 parse_value）
+            memoize: 是否只解析唯一值再广播回整列
+            copy: False 时直接在 df 上添加列并返回 df
         """
-        df = df.copy()
-        
-        # 解析每一行
-        parsed_results = df[value_col].apply(self.parse_value)
-        
-        df['value_numeric'] = parsed_results.apply(lambda x: x[0])
-        df['value_flag'] = parsed_results.apply(lambda x: x[1])
-        
+        if copy:
+            df = df.copy()
+        parse = self.parse_series if vectorized else self._parse_series_scalar
+        cache = self._get_cache()
+
+        if memoize:
+            value_dtype = float if self.compiled.vectorized else object
+            value_numeric, value_flag = cache.map_series(
+                df[value_col],
+                lambda keys: [result.to_numpy() for result in parse(keys)],
+                dtypes=(value_dtype, object),
+                categorical=(False, self.categorical)
+            )
+        else:
+            value_numeric, value_flag = parse(df[value_col])
+            if self.categorical:
+                value_flag = value_flag.astype('category')
+
+        df['value_numeric'] = value_numeric
+        df['value_flag'] = value_flag
+
         return df
     
     def to_dict(self) -> Dict:
@@ -224,4 +387,5 @@ class ValueParser:
         if rule_type not in self.rules:
             self.rules[rule_type] = {}
         self.rules[rule_type].update(kwargs)
+        self.compile()
 
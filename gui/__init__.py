@@ -1,5 +1,6 @@
 # GUI modules
 from .components import (
+    DataFrameModel,
     DataPreviewTable,
     ProgressPanel,
     LogViewer,
@@ -14,6 +15,7 @@ __all__ = [
     'MainWindow',
     'WizardDialog',
     # Components
+    'DataFrameModel',
     'DataPreviewTable',
     'ProgressPanel',
     'LogViewer',
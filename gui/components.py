@@ -1,51 +1,113 @@
 """
 GUI 通用组件
 """
-from PyQt6.QtWidgets import (QTableWidget, QTableWidgetItem, QPushButton, 
-                             QProgressBar, QTextEdit, QLabel, QHBoxLayout,
-                             QVBoxLayout, QWidget, QHeaderView, QSizePolicy)
-from PyQt6.QtCore import Qt, pyqtSignal
+from typing import Optional
+
+from PyQt6.QtWidgets import (QTableView, QAbstractItemView, QPushButton, QProgressBar,
+                             QTextEdit, QLabel, QHBoxLayout, QVBoxLayout, QWidget,
+                             QHeaderView, QSizePolicy)
+from PyQt6.QtCore import Qt, pyqtSignal, QAbstractTableModel, QModelIndex
 from PyQt6.QtGui import QColor
 import pandas as pd
 
+from core.constants import UIConfig
+from core.search_index import SearchIndex
+
+
+class DataFrameModel(QAbstractTableModel):
+    """
+    DataFrame 只读表格模型
+
+    直接引用各列的数组（不复制为单元格对象），单元格文本在视图绘制时才格式化，
+    因此只有可见的行会被格式化，行数再多也不会卡住界面
+    """
+
+    def __init__(self, df: Optional[pd.DataFrame] = None, parent=None):
+        super().__init__(parent)
+        self._headers = []
+        self._columns = []
+        self._rows = 0
+        if df is not None:
+            self.set_dataframe(df)
+
+    def set_dataframe(self, df: pd.DataFrame):
+        """更换显示的数据（重置模型）"""
+        self.beginResetModel()
+        self._headers = [str(col) for col in df.columns]
+        self._columns = [self._column_values(df.iloc[:, j]) for j in range(df.shape[1])]
+        self._rows = len(df)
+        self.endResetModel()
+
+    @staticmethod
+    def _column_values(series: pd.Series):
+        # 日期时间列保留 pandas 数组（取值为 Timestamp，文本与 iloc 取值一致），其余列使用 NumPy 数组
+        if series.dtype.kind in 'mM':
+            return series.array
+        return series.to_numpy()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else self._rows
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._columns)
+
+    def cell_text(self, row: int, column: int) -> str:
+        """单元格文本（与 str(df.iloc[row, column]) 相同）"""
+        return str(self._columns[column][row])
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and index.isValid():
+            return self.cell_text(index.row(), index.column())
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._headers[section]
+        return str(section + 1)
 
-class DataPreviewTable(QTableWidget):
+
+class DataPreviewTable(QTableView):
     """
-    数据预览表格组件
+    数据预览表格组件（由 DataFrameModel 提供数据，只格式化可见的单元格）
     """
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.preview_model = DataFrameModel(parent=self)
+        self.setModel(self.preview_model)
         self.setAlternatingRowColors(True)
         self.horizontalHeader().setStretchLastSection(True)
         self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
-        self.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        # 固定行高：滚动时不需要逐行计算行高
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
     
-    def load_dataframe(self, df: pd.DataFrame, max_rows: int = 20):
-        """加载 DataFrame 到表格"""
-        self.clear()
-        
-        if df.empty:
-            self.setRowCount(0)
-            self.setColumnCount(0)
-            return
-        
-        # 限制行数
-        df_display = df.head(max_rows)
-        
-        self.setRowCount(len(df_display))
-        self.setColumnCount(len(df_display.columns))
-        self.setHorizontalHeaderLabels([str(col) for col in df_display.columns])
-        
-        # 填充数据
-        for i in range(len(df_display)):
-            for j in range(len(df_display.columns)):
-                value = df_display.iloc[i, j]
-                item = QTableWidgetItem(str(value))
-                self.setItem(i, j, item)
-        
-        # 自动调整列宽
-        self.resizeColumnsToContents()
+    def load_dataframe(self, df: pd.DataFrame, max_rows: Optional[int] = 20):
+        """加载 DataFrame 到表格（max_rows 为 None 时显示全部行）"""
+        df_display = df if max_rows is None else df.head(max_rows)
+        self.preview_model.set_dataframe(df_display)
+        self.resize_columns()
+
+    def resize_columns(self, sample_rows: int = UIConfig.PREVIEW_WIDTH_SAMPLE_ROWS):
+        """按表头和前 sample_rows 行的文本宽度设置列宽（不遍历全部行）"""
+        _fit_column_widths(self, self.preview_model, sample_rows)
+
+
+def _fit_column_widths(view: QTableView, model, sample_rows: int):
+    """按表头和前 sample_rows 行的文本宽度设置列宽（model 需提供 cell_text）"""
+    metrics = view.fontMetrics()
+    header_metrics = view.horizontalHeader().fontMetrics()
+    rows = min(sample_rows, model.rowCount())
+    for column in range(model.columnCount()):
+        header = model.headerData(column, Qt.Orientation.Horizontal)
+        width = header_metrics.horizontalAdvance(header)
+        for row in range(rows):
+            width = max(width, metrics.horizontalAdvance(model.cell_text(row, column)))
+        view.setColumnWidth(column, min(width + UIConfig.PREVIEW_COLUMN_PADDING,
+                                        UIConfig.PREVIEW_MAX_COLUMN_WIDTH))
 
 
 class ProgressPanel(QWidget):
@@ -155,57 +217,163 @@ class NavigationButtons(QWidget):
             self.previous_btn.setEnabled(enabled)
 
 
-class CheckableTableWidget(QTableWidget):
+class CheckableItemModel(QAbstractTableModel):
     """
-    带复选框的表格
+    带复选框的列表模型（第 0 列为复选框）
+
+    选中状态以项的序号集合保存，统计和读取选中项只与选中数量有关；
+    搜索使用 SearchIndex 预先建立的键，筛选后只保留可见项的序号，不逐行隐藏
+    """
+    checked_changed = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._items = []
+        self._headers = ["选择"]
+        self._visible = []
+        self._checked = set()
+        self._index = SearchIndex([])
+
+    def set_items(self, items: list, columns: list, checked=None):
+        """
+        Args:
+            items: [(col1, col2, ...), ...]（按第一列搜索）
+            columns: [header1, header2, ...]
+            checked: 要勾选的项（第一列的值）；为 None 时全部勾选
+        """
+        self.beginResetModel()
+        self._items = list(items)
+        self._headers = ["选择"] + list(columns)
+        self._index = SearchIndex([item[0] for item in self._items])
+        self._visible = list(range(len(self._items)))
+        if checked is None:
+            self._checked = set(self._visible)
+        else:
+            checked = {str(value) for value in checked}
+            self._checked = {i for i, item in enumerate(self._items) if str(item[0]) in checked}
+        self.endResetModel()
+        self.checked_changed.emit()
+
+    def set_filter(self, text: str) -> int:
+        """只显示第一列包含 text 的项（为空时显示全部），返回可见项数"""
+        self.beginResetModel()
+        self._visible = self._index.search(text)
+        self.endResetModel()
+        return len(self._visible)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._visible)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._headers)
+
+    def cell_text(self, row: int, column: int) -> str:
+        """可见的第 row 行的单元格文本（复选框列为空）"""
+        if column == 0:
+            return ''
+        return str(self._items[self._visible[row]][column - 1])
+
+    def data(self, index: QModelIndex, role: int = Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if index.column() == 0:
+            if role == Qt.ItemDataRole.CheckStateRole:
+                checked = self._visible[index.row()] in self._checked
+                return Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.cell_text(index.row(), index.column())
+        return None
+
+    def setData(self, index: QModelIndex, value, role: int = Qt.ItemDataRole.EditRole) -> bool:
+        if not index.isValid() or index.column() != 0 or role != Qt.ItemDataRole.CheckStateRole:
+            return False
+        item = self._visible[index.row()]
+        if Qt.CheckState(value) == Qt.CheckState.Checked:
+            self._checked.add(item)
+        else:
+            self._checked.discard(item)
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        self.checked_changed.emit()
+        return True
+
+    def flags(self, index: QModelIndex) -> Qt.ItemFlag:
+        if index.isValid() and index.column() == 0:
+            return Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled
+        return Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEnabled
+
+    def headerData(self, section: int, orientation: Qt.Orientation,
+                   role: int = Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self._headers[section]
+        return str(section + 1)
+
+    def checked_count(self) -> int:
+        return len(self._checked)
+
+    def checked_values(self, column: int = 0) -> list:
+        """选中项第 column 列的文本（按原顺序）"""
+        return [str(self._items[i][column]) for i in sorted(self._checked)]
+
+    def values(self, column: int = 0) -> list:
+        """所有项第 column 列的文本（按原顺序，包括搜索时隐藏的项）"""
+        return [str(item[column]) for item in self._items]
+
+    def check_all(self, checked: bool):
+        """勾选 / 取消勾选所有项（包括搜索时隐藏的项）"""
+        self._checked = set(range(len(self._items))) if checked else set()
+        if self._visible:
+            self.dataChanged.emit(self.index(0, 0), self.index(len(self._visible) - 1, 0),
+                                  [Qt.ItemDataRole.CheckStateRole])
+        self.checked_changed.emit()
+
+
+class CheckableTableWidget(QTableView):
+    """
+    带复选框的表格（由 CheckableItemModel 提供数据，数万项时搜索和勾选仍然流畅）
     """
     selection_changed = pyqtSignal()
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.item_model = CheckableItemModel(self)
+        self.setModel(self.item_model)
         self.setAlternatingRowColors(True)
         self.horizontalHeader().setStretchLastSection(True)
         self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self.item_model.checked_changed.connect(self.selection_changed.emit)
     
-    def load_items(self, items: list, columns: list):
+    def load_items(self, items: list, columns: list, checked=None):
         """
         加载数据项
         items: [(col1, col2, ...), ...]
         columns: [header1, header2, ...]
+        checked: 要勾选的项（第一列的值），为 None 时全部勾选
         """
-        self.clear()
-        self.setRowCount(len(items))
-        self.setColumnCount(len(columns) + 1)  # +1 for checkbox
-        
-        headers = ["选择"] + columns
-        self.setHorizontalHeaderLabels(headers)
-        
-        for i, item in enumerate(items):
-            # 复选框
-            check_item = QTableWidgetItem()
-            check_item.setFlags(Qt.ItemFlag.ItemIsUserCheckable | Qt.ItemFlag.ItemIsEnabled)
-            check_item.setCheckState(Qt.CheckState.Checked)
-            self.setItem(i, 0, check_item)
-            
-            # 其他列
-            for j, value in enumerate(item):
-                self.setItem(i, j + 1, QTableWidgetItem(str(value)))
-        
-        self.resizeColumnsToContents()
-        self.itemChanged.connect(lambda: self.selection_changed.emit())
+        self.item_model.set_items(items, columns, checked)
+        _fit_column_widths(self, self.item_model, UIConfig.PREVIEW_WIDTH_SAMPLE_ROWS)
+
+    def set_filter(self, text: str) -> int:
+        """按第一列搜索（不区分大小写，安装 pypinyin 时支持拼音），返回可见项数"""
+        return self.item_model.set_filter(text)
+
+    def checked_count(self) -> int:
+        """选中的项数"""
+        return self.item_model.checked_count()
     
     def get_checked_items(self, column_index: int = 1) -> list:
         """获取选中的项（返回指定列的值）"""
-        checked = []
-        for i in range(self.rowCount()):
-            if self.item(i, 0).checkState() == Qt.CheckState.Checked:
-                checked.append(self.item(i, column_index).text())
-        return checked
+        return self.item_model.checked_values(column_index - 1)
+
+    def get_items(self, column_index: int = 1) -> list:
+        """获取所有项（返回指定列的值）"""
+        return self.item_model.values(column_index - 1)
     
     def check_all(self, checked: bool):
         """全选/全不选"""
-        state = Qt.CheckState.Checked if checked else Qt.CheckState.Unchecked
-        for i in range(self.rowCount()):
-            self.item(i, 0).setCheckState(state)
-
+        self.item_model.check_all(checked)
@@ -406,7 +406,7 @@ class MainWindow(QMainWindow):
         )
         
         # 创建抽取引擎
-        self.extractor_engine = ExtractorEngine(profile_path)
+        self.extractor_engine = ExtractorEngine(profile_path, profile_manager=self.profile_manager)
         
         # 连接信号
         self.extractor_engine.progress.connect(self.on_progress)
@@ -292,29 +292,13 @@ class WizardStep1FileSelect(QWidget):
         self.df_preview = df
         self.header_row = header_row
 
-        # 限制表格显示行数（即使加载了更多）
-        display_rows = min(len(self.df_preview), 500)  # 最多显示500行
-
-        # 更新信息标签（在填充表格之前）
-        self.info_label.setText(f"正在填充表格 ({display_rows} 行)...")
-        QApplication.processEvents()
-
-        # 填充表格
-        self.preview_table.load_dataframe(self.df_preview, max_rows=display_rows)
-
-        # 更新标题
-        if len(self.df_preview) > display_rows:
-            self.preview_group.setTitle(f"数据预览 (加载 {len(self.df_preview)} 行，显示前 {display_rows} 行)")
-        else:
-            self.preview_group.setTitle(f"数据预览 (前 {len(self.df_preview)} 行)")
+        # 填充表格（表格模型只格式化可见的单元格，可以显示全部已加载的行）
+        self.preview_table.load_dataframe(self.df_preview, max_rows=None)
+        self.preview_group.setTitle(f"数据预览 (共 {len(self.df_preview)} 行)")
 
         # 更新信息
         info = f"✓ 已加载: {len(self.df_preview)} 行, {len(self.df_preview.columns)} 列 (Header 行: {self.header_row})"
 
-        # 添加警告信息：如果显示行数少于加载行数
-        if len(self.df_preview) > display_rows:
-            info += f"\n⚠️ 注意: 字段映射和项目选择将基于全部 {len(self.df_preview)} 行数据"
-
         # 添加警告信息：如果只加载了部分数据
         max_rows = self.row_slider.value()
         if max_rows < 50000:  # 如果预览行数相对较少
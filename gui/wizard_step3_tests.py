@@ -3,31 +3,39 @@
 """
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QLineEdit, QGroupBox, QMessageBox,
-                             QCheckBox, QTableWidget, QTableWidgetItem,
-                             QApplication, QProgressDialog)
-from PyQt6.QtCore import pyqtSignal, Qt, QThread
+                             QCheckBox, QApplication, QProgressDialog)
+from PyQt6.QtCore import pyqtSignal, Qt, QThread, QTimer
+import os
 import pandas as pd
 
-from core import TestMapper, ColumnMapper, DataLoader, UserMessage
+from core import TestMapper, ColumnMapper, DataLoader, DataScanner, UserMessage, UIConfig
 from .components import CheckableTableWidget, NavigationButtons
 
 
 class FullScanThread(QThread):
-    """后台扫描线程"""
-    finished = pyqtSignal(dict)  # {test_name: count}
+    """
+    后台扫描线程
+
+    一次扫描同时收集项目计数、结果值格式、日期格式和单位（ScanReport），
+    第 4 步直接使用扫描结果，不再重新读取文件
+    """
+    finished = pyqtSignal(object)  # ScanReport
     progress = pyqtSignal(int, str)  # (percentage, message)
     error = pyqtSignal(str)
 
-    def __init__(self, input_path: str, test_name_column: str, skip_rows: int = 0):
+    def __init__(self, input_path: str, mapping: dict, skip_rows: int = 0):
         super().__init__()
         self.input_path = input_path
-        self.test_name_column = test_name_column
+        self.mapping = mapping
         self.skip_rows = skip_rows
         self._is_cancelled = False
+        self.scanner = None
 
     def cancel(self):
         """取消操作"""
         self._is_cancelled = True
+        if self.scanner:
+            self.scanner.cancel()
 
     def run(self):
         """执行扫描"""
@@ -35,21 +43,22 @@ class FullScanThread(QThread):
             if self._is_cancelled:
                 return
 
-            loader = DataLoader()
-            loader.progress.connect(self.progress.emit)
-            loader.error.connect(self.error.emit)
+            files = DataLoader().find_excel_files(self.input_path)
 
-            result = loader.scan_test_names(
-                self.input_path,
-                self.test_name_column,
-                self.skip_rows
+            # 多个文件时按 CPU 核数并行扫描
+            self.scanner = DataScanner(
+                self.mapping, self.skip_rows, workers=os.cpu_count() or 1
             )
+            self.scanner.progress.connect(self.progress.emit)
+            self.scanner.error.connect(self.error.emit)
+
+            report = self.scanner.scan(files)
 
             # 检查取消状态，避免在取消后发射信号
-            if self._is_cancelled:
+            if self._is_cancelled or report is None:
                 return
 
-            self.finished.emit(result)
+            self.finished.emit(report)
         except Exception as e:
             if not self._is_cancelled:
                 self.error.emit(str(e))
@@ -73,6 +82,8 @@ class WizardStep3Tests(QWidget):
         self.header_row = 0
         self.test_name_column = None  # 原始列名
         self.full_scan_result = None  # 完整扫描结果
+        self.scan_report = None  # 完整扫描的 ScanReport（传给第 4 步）
+        self.mapping = {}
         self.scan_thread = None
 
         self.init_ui()
@@ -96,7 +107,12 @@ class WizardStep3Tests(QWidget):
         control_layout.addWidget(search_label)
         self.search_edit = QLineEdit()
         self.search_edit.setPlaceholderText("输入项目名称进行搜索...")
-        self.search_edit.textChanged.connect(self.filter_tests)
+        # 停止输入 UIConfig.SEARCH_DEBOUNCE_MS 毫秒后再筛选，连续输入时不逐字刷新列表
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(UIConfig.SEARCH_DEBOUNCE_MS)
+        self.search_timer.timeout.connect(self.filter_tests)
+        self.search_edit.textChanged.connect(self.search_timer.start)
         control_layout.addWidget(self.search_edit, stretch=1)
         
         # 全选/全不选
@@ -160,7 +176,11 @@ class WizardStep3Tests(QWidget):
 
         # 获取test_name对应的原始列名
         mapping = data.get('mapping', {})
+        self.mapping = mapping
         self.test_name_column = mapping.get('test_name', None)
+        # 映射可能已修改，之前的完整扫描结果不再适用
+        self.full_scan_result = None
+        self.scan_report = None
 
         # 应用映射
         df_mapped = self.mapper.apply(self.df_preview)
@@ -193,15 +213,17 @@ class WizardStep3Tests(QWidget):
         # 启用扫描按钮
         self.full_scan_btn.setEnabled(bool(self.input_path and self.test_name_column))
 
-    def _populate_table_from_stats(self):
-        """从统计数据填充表格"""
+    def _populate_table_from_stats(self, checked=None):
+        """从统计数据填充表格（checked 为要勾选的项目，None 表示全部勾选）"""
         # 使用向量化操作代替 iterrows()，性能提升约100倍
         items = list(zip(
             self.test_stats['test_name'].tolist(),
             self.test_stats['count'].tolist()
         ))
 
-        self.test_table.load_items(items, ['项目名称', '出现次数'])
+        self.test_table.load_items(items, ['项目名称', '出现次数'], checked)
+        # 保留搜索框中的筛选条件
+        self.filter_tests()
 
     def start_full_scan(self):
         """开始完整扫描"""
@@ -225,7 +247,7 @@ class WizardStep3Tests(QWidget):
         # 创建并启动扫描线程
         self.scan_thread = FullScanThread(
             self.input_path,
-            self.test_name_column,
+            self.mapping,
             self.header_row
         )
         self.scan_thread.progress.connect(self._on_scan_progress)
@@ -238,33 +260,30 @@ class WizardStep3Tests(QWidget):
         self.scan_status_label.setText(f"{message} ({percentage}%)")
         QApplication.processEvents()
 
-    def _on_scan_finished(self, result: dict):
+    def _on_scan_finished(self, report):
         """扫描完成"""
+        self.scan_report = report
+        result = dict(report.test_counts)
         self.full_scan_result = result
         self.full_scan_btn.setText("🔍 扫描完整数据")
         self.full_scan_btn.setEnabled(True)
 
         # 将结果转换为DataFrame格式
         if result:
-            # 保存当前选中的项目
+            # 保存当前选中的项目（之前取消勾选的项目保持不选，新发现的项目默认勾选）
             previously_selected = set(self.test_table.get_checked_items(column_index=1))
+            previously_listed = set(self.test_table.get_items(column_index=1))
 
             # 创建新的统计数据
             data = [{'test_name': name, 'count': count} for name, count in result.items()]
             self.test_stats = pd.DataFrame(data).sort_values('count', ascending=False)
 
-            # 重新填充表格
-            self._populate_table_from_stats()
-
-            # 恢复之前选中的项目
-            for i in range(self.test_table.rowCount()):
-                test_name = self.test_table.item(i, 1).text()
-                if test_name in previously_selected:
-                    self.test_table.item(i, 0).setCheckState(Qt.CheckState.Checked)
+            # 重新填充表格并恢复之前选中的项目
+            checked = previously_selected | {str(name) for name in result if str(name) not in previously_listed}
+            self._populate_table_from_stats(checked)
 
             # 计算新发现的项目
-            preview_tests = set(self.df_preview['test_name'].dropna().unique()) if 'test_name' in self.mapper.apply(self.df_preview).columns else set()
-            # 重新从mapper获取
+            preview_tests = set()
             df_mapped = self.mapper.apply(self.df_preview)
             if 'test_name' in df_mapped.columns:
                 preview_tests = set(df_mapped['test_name'].dropna().astype(str).str.strip().unique())
@@ -311,23 +330,16 @@ class WizardStep3Tests(QWidget):
     
     def filter_tests(self):
         """过滤/搜索检验项目"""
-        search_text = self.search_edit.text().lower()
-        
-        for i in range(self.test_table.rowCount()):
-            test_name = self.test_table.item(i, 1).text().lower()
-            
-            if search_text in test_name:
-                self.test_table.setRowHidden(i, False)
-            else:
-                self.test_table.setRowHidden(i, True)
+        self.search_timer.stop()
+        self.test_table.set_filter(self.search_edit.text())
     
     def update_selection_count(self):
         """更新选择计数"""
-        selected = self.test_table.get_checked_items(column_index=1)
-        self.selection_label.setText(f"已选择: {len(selected)} 个项目")
+        selected = self.test_table.checked_count()
+        self.selection_label.setText(f"已选择: {selected} 个项目")
         
         # 至少选择一个项目才能继续
-        self.nav_buttons.enable_next(len(selected) > 0)
+        self.nav_buttons.enable_next(selected > 0)
     
     def on_next(self):
         """下一步"""
@@ -341,18 +353,21 @@ class WizardStep3Tests(QWidget):
             )
             return
         
-        # 创建 test_mapping（此时还没有别名和单位，Step 3 只是选择）
+        # 创建 test_mapping（此时还没有别名，Step 3 只是选择）
+        # 完整扫描中只出现一种单位的项目直接填入单位
         test_mapping = {}
         for test_name in selected:
+            units = self.scan_report.units_for(test_name.strip()) if self.scan_report else []
             test_mapping[test_name] = {
                 'aliases': [test_name.strip()],  # 确保aliases也被strip
-                'unit': None,
+                'unit': units[0] if len(units) == 1 else None,
                 'range': None
             }
         
         data = {
             'test_mapping': test_mapping,
-            'selected_tests': selected
+            'selected_tests': selected,
+            'scan_report': self.scan_report
         }
         
         self.next_step.emit(data)
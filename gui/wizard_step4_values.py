@@ -223,6 +223,12 @@ class WizardStep4Values(QWidget):
         self.df_preview = data['df_preview']
         self.mapper = data['mapper']
 
+        # 第 3 步已扫描完整数据时直接使用扫描结果
+        scan_report = data.get('scan_report')
+        if scan_report is not None:
+            self._on_analysis_finished(scan_report.special_patterns(), scan_report.format_info())
+            return
+
         # 显示加载状态
         self.format_stats_label.setText("正在分析数据格式...")
 
@@ -336,7 +342,10 @@ class WizardStep4Values(QWidget):
         
         # 构建统计文本
         stats_lines = []
-        stats_lines.append(f"<b>检测到 {total} 个唯一值样本：</b><br>")
+        if format_info.get('basis') == 'rows':
+            stats_lines.append(f"<b>完整数据中共 {total:,} 个结果值：</b><br>")
+        else:
+            stats_lines.append(f"<b>检测到 {total} 个唯一值样本：</b><br>")
         
         # 按数量排序显示
         sorted_formats = sorted(counts.items(), key=lambda x: x[1], reverse=True)
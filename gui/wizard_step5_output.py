@@ -3,10 +3,12 @@
 """
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, 
                              QPushButton, QLineEdit, QFileDialog, QGroupBox,
-                             QCheckBox, QRadioButton, QButtonGroup)
+                             QCheckBox, QRadioButton, QButtonGroup, QComboBox)
 from PyQt6.QtCore import pyqtSignal
 import os
 
+from core.constants import ExportConfig
+
 
 class WizardStep5Output(QWidget):
     """
@@ -64,6 +66,21 @@ class WizardStep5Output(QWidget):
         self.qc_report_check.setChecked(True)
         content_layout.addWidget(self.qc_report_check)
         
+        format_row = QHBoxLayout()
+        format_row.addWidget(QLabel("labs_long 格式:"))
+        self.format_combo = QComboBox()
+        self.format_combo.addItem("Excel (.xlsx，超过单表上限自动分表)", 'excel')
+        self.format_combo.addItem("Parquet (.parquet，列式压缩，适合大数据量)", 'parquet')
+        self.format_combo.addItem("Feather (.feather，Arrow IPC，读写最快)", 'feather')
+        self.format_combo.addItem("CSV (.csv)", 'csv')
+        self.format_combo.setCurrentIndex(self.format_combo.findData(ExportConfig.DEFAULT_FORMAT))
+        format_row.addWidget(self.format_combo, stretch=1)
+        content_layout.addLayout(format_row)
+        
+        self.incremental_check = QCheckBox("增量抽取 (只处理新增或修改的文件，每个源文件输出一个分区)")
+        self.incremental_check.setChecked(False)
+        content_layout.addWidget(self.incremental_check)
+        
         content_group.setLayout(content_layout)
         layout.addWidget(content_group)
         
@@ -126,6 +143,8 @@ class WizardStep5Output(QWidget):
         """获取输出选项"""
         return {
             'output_dir': self.output_dir_edit.text(),
+            'format': self.format_combo.currentData(),
+            'incremental': self.incremental_check.isChecked(),
             'include_qc_report': self.qc_report_check.isChecked(),
             'drop_unknown_tests': self.drop_unknown_check.isChecked(),
             'drop_failed_rows': self.drop_failed_check.isChecked(),
@@ -7,7 +7,7 @@ from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
 from PyQt6.QtCore import pyqtSignal
 import os
 
-from core import ProfileManager, UserMessage
+from core import ProfileManager, UserMessage, ExportConfig
 from .components import NavigationButtons
 
 
@@ -153,6 +153,8 @@ class WizardStep6Summary(QWidget):
         lines.append("【输出设置】")
         output_options = self.all_wizard_data.get('output_options', {})
         lines.append(f"  输出目录: {output_options.get('output_dir', 'N/A')}")
+        lines.append(f"  输出格式: {output_options.get('format', ExportConfig.DEFAULT_FORMAT)}")
+        lines.append(f"  增量抽取: {'是' if output_options.get('incremental', False) else '否'}")
         lines.append(f"  包含质量报告: {'是' if output_options.get('include_qc_report', True) else '否'}")
         
         self.summary_text.setPlainText("\n".join(lines))
@@ -191,7 +193,9 @@ class WizardStep6Summary(QWidget):
             skip_top_rows=self.all_wizard_data.get('header_row', 0),
             output_options={
                 'drop_unknown_tests': self.all_wizard_data.get('output_options', {}).get('drop_unknown_tests', True),
-                'drop_failed_rows': self.all_wizard_data.get('output_options', {}).get('drop_failed_rows', False)
+                'drop_failed_rows': self.all_wizard_data.get('output_options', {}).get('drop_failed_rows', False),
+                'format': self.all_wizard_data.get('output_options', {}).get('format', ExportConfig.DEFAULT_FORMAT),
+                'incremental': self.all_wizard_data.get('output_options', {}).get('incremental', False)
             }
         )
         
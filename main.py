@@ -2,6 +2,7 @@
 LIS Extractor 主程序入口
 """
 import sys
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from gui import MainWindow
 
@@ -23,5 +24,7 @@ def main():
 
 
 if __name__ == '__main__':
+    # 打包为可执行文件后，并行抽取的子进程需要此调用
+    multiprocessing.freeze_support()
     main()
 